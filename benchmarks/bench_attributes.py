@@ -0,0 +1,46 @@
+""" Benchmarks the per-node memory and attribute throughput of Node.
+
+Run from the repository root with `python benchmarks/bench_attributes.py`.
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+
+
+def buildTree(numNodes: int):
+    """ Builds a FileNode with numNodes children. """
+    root = FileNode(name="root")
+    root.attachMany([Node("Node{:d}".format(i)) for i in range(numNodes)])
+    return root
+
+
+def measureMemory(numNodes: int) -> float:
+    """ Returns the bytes allocated per node for a tree of numNodes nodes. """
+    tracemalloc.start()
+    root = buildTree(numNodes)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / numNodes
+
+
+if __name__ == '__main__':
+    numNodes = 100000
+    print("memory per node:         {:8.1f} B".format(measureMemory(numNodes)))
+    root = buildTree(numNodes)
+    children = root.children
+    t = timeit.timeit(lambda: [c.getAttributes() for c in children], number=5) / 5
+    print("getAttributes per node:  {:8.3f} us".format(1e6 * t / numNodes))
+    t = timeit.timeit(lambda: [c.updateAttributes({'name': 'x'}) for c in children], number=5) / 5
+    print("updateAttributes per node:{:7.3f} us".format(1e6 * t / numNodes))
+    t = timeit.timeit(lambda: root._buildSaveDict(), number=5) / 5
+    print("build save dict per node:{:8.3f} us".format(1e6 * t / numNodes))
+    data = root._buildSaveDict()
+    t = timeit.timeit(lambda: FileNode.fromAttributes(data['attributes'])._createNodes(data['children'], FileNode(name="r"), []), number=3) / 3
+    print("load from dict per node: {:8.3f} us".format(1e6 * t / numNodes))
@@ -0,0 +1,39 @@
+""" Compares loading a project the first time with loading it again from the parsed file cache.
+
+The first load records the nodes for the cache as they are read, the second builds the tree from the
+cache. The load without a cache shows what recording costs.
+
+Run from the repository root with `python benchmarks/bench_cache.py [numNodes]`.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.fileNode import FileNode
+from objectgui.core.fileCache import FileCache
+from bench_save import buildTree
+
+
+def timeLoad(filename: str) -> float:
+    start = timeit.default_timer()
+    FileNode.load(filename)
+    return timeit.default_timer() - start
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    FileNode.fileCache = FileCache(maxBytes=1 << 30)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'project.json')
+        buildTree(numNodes).save(filename)
+        size = os.path.getsize(filename)
+        print("file: {:d} nodes, {:.1f} MB".format(numNodes, size / 1e6))
+        print("{:>12s}: {:.2f} s".format("first load", timeLoad(filename)))
+        print("{:>12s}: {:.2f} s".format("cached", timeLoad(filename)))
+        print("{:>12s}: {:.1f} MB for {:.1f} MB on disk".format("cache size", FileNode.fileCache.size / 1e6, size / 1e6))
+        FileNode.fileCache = None
+        print("{:>12s}: {:.2f} s".format("no cache", timeLoad(filename)))
@@ -0,0 +1,69 @@
+""" Times dropping a large multi-row selection onto a folder of a TreeModel.
+
+Compares the previous drop, one moveRows per dropped row, with moveItems for a contiguous selection
+and for a selection of every other row. Runs without a view, persistent indexes stand in for the
+selection the view keeps.
+
+Run from the repository root with `python benchmarks/bench_drop.py [numRows] [numSelected]`.
+"""
+import os
+import sys
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QCoreApplication, QModelIndex, QPersistentModelIndex
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.gui.treeModel import TreeModel
+
+
+def buildModel(numRows: int):
+    """ Returns a model with a source folder of numRows nodes and an empty target folder. """
+    root = FileNode(name="root")
+    source = FolderNode(name="source")
+    source.parent = root
+    source.attachMany([Node("Node{:d}".format(i)) for i in range(numRows)])
+    FolderNode(name="target").parent = root
+    model = TreeModel(root)
+    # Show every row of both folders, the drops are timed without the batches a view fetches as it scrolls
+    model.fetchBatchSize = max(model.fetchBatchSize, numRows)
+    fileIndex = model.index(0, 0, QModelIndex())
+    return model, model.index(0, 0, fileIndex), model.index(1, 0, fileIndex)
+
+
+def rowByRowDrop(model: TreeModel, items: list, parentInd, row: int):
+    """ The previous dropMimeData loop, one single row move per dropped item. """
+    i = 0
+    for item in items:
+        sourceParentInd = model.parent(model.createIndex(item.row, 0, item))
+        sourceRow = item.row
+        model.moveRows(sourceParentInd, sourceRow, 1, parentInd, row + i)
+        i += 1
+
+
+def measure(drop, numRows: int, step: int, numSelected: int) -> float:
+    model, sourceInd, targetInd = buildModel(numRows)
+    source = sourceInd.internalPointer()
+    items = source.children[0:numSelected * step:step]
+    persistent = [QPersistentModelIndex(model.createIndex(item.row, 0, item)) for item in items]
+    start = timeit.default_timer()
+    drop(model, items, targetInd, 0)
+    elapsed = timeit.default_timer() - start
+    target = targetInd.internalPointer()
+    assert target.children == items and all(index.parent() == targetInd for index in persistent)
+    return elapsed
+
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    numSelected = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    app = QCoreApplication([])
+    print("{:d} of {:d} rows dropped on another folder".format(numSelected, numRows))
+    for label, step in (("contiguous", 1), ("every other", 2)):
+        old = measure(rowByRowDrop, numRows, step, numSelected)
+        new = measure(lambda model, items, parentInd, row: model.moveItems(items, parentInd, row), numRows, step, numSelected)
+        print("{:>12s}: row by row {:7.3f} s, moveItems {:7.3f} s".format(label, old, new))
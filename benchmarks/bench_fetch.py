@@ -0,0 +1,76 @@
+""" Times expanding a folder with a very large number of children in a QTreeView.
+
+Compares showing every child at once, the previous behavior reproduced with a fetchBatchSize larger
+than the folder, with the default batches fetched as the view is scrolled. Also times scrolling to the
+bottom once. The view may fetch a few batches in a row until its scroll bar is no longer at the bottom.
+Runs with the offscreen platform if there is no display.
+
+Run from the repository root with `python benchmarks/bench_fetch.py [numChildren]`.
+"""
+import os
+import sys
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+if 'DISPLAY' not in os.environ:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtWidgets import QApplication, QTreeView
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.gui.treeModel import TreeModel
+
+
+def buildTree(numChildren: int) -> FileNode:
+    """ Returns a file node with one folder of numChildren nodes. """
+    root = FileNode(name="root")
+    folder = FolderNode(name="wide")
+    folder.attachMany([Node("Node{:d}".format(i)) for i in range(numChildren)])
+    folder.parent = root
+    return root
+
+
+def measure(app: QApplication, root: FileNode, batchSize: int) -> tuple:
+    """ Returns the times to expand the folder and to scroll to the bottom once, and the rows shown after each. """
+    model = TreeModel(root)
+    model.fetchBatchSize = batchSize
+    view = QTreeView()
+    view.setUniformRowHeights(True)
+    view.resize(400, 600)
+    view.setModel(model)
+    view.show()
+    fileIndex = model.index(0, 0, QModelIndex())
+    view.setExpanded(fileIndex, True)
+    app.processEvents()
+    folderIndex = model.index(0, 0, fileIndex)
+
+    start = timeit.default_timer()
+    view.setExpanded(folderIndex, True)
+    app.processEvents()
+    expand = timeit.default_timer() - start
+    expandedRows = model.rowCount(folderIndex)
+
+    start = timeit.default_timer()
+    scrollBar = view.verticalScrollBar()
+    scrollBar.setValue(scrollBar.maximum())
+    app.processEvents()
+    scroll = timeit.default_timer() - start
+    scrolledRows = model.rowCount(folderIndex)
+    view.close()
+    return expand, scroll, expandedRows, scrolledRows
+
+
+if __name__ == '__main__':
+    numChildren = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    app = QApplication([])
+    root = buildTree(numChildren)
+    print("Expanding a folder of {:d} nodes".format(numChildren))
+    for label, batchSize in (("all at once", numChildren), ("batches", TreeModel.fetchBatchSize)):
+        expand, scroll, expandedRows, scrolledRows = measure(app, root, batchSize)
+        print("{:>12s}: expand {:8.1f} ms ({:d} rows), scroll to bottom {:8.1f} ms ({:d} rows)".format(
+            label, expand * 1e3, expandedRows, scroll * 1e3, scrolledRows))
@@ -0,0 +1,62 @@
+""" Compares file size and save/load time of the json and binary project formats.
+
+Run from the repository root with `python benchmarks/bench_format.py [numNodes]`.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+
+
+class NumericNode(Node):
+    """ Node with numeric attributes, typical of simulation parameters. """
+    savedAttributes = ('count', 'scale', 'samples')
+
+    def __init__(self, count=0, scale=1.0, samples=(), **kwargs):
+        super().__init__(**kwargs)
+        self.count = count
+        self.scale = scale
+        self.samples = list(samples)
+
+
+class NumericFileNode(FileNode):
+    classMapping = dict(FileNode.classMapping, NumericNode=NumericNode.fromAttributes)
+
+
+def buildTree(numNodes: int, fanout: int = 100) -> FileNode:
+    """ Builds a FileNode with folders of numeric nodes until there are numNodes nodes. """
+    root = NumericFileNode(name="root")
+    count = 0
+    while count < numNodes:
+        folder = FolderNode(name="Folder{:d}".format(count))
+        folder.parent = root
+        folder.attachMany([
+            NumericNode(i, i / 7, [j * 0.1 for j in range(8)], name="Node{:d}".format(count + i))
+            for i in range(fanout)
+        ])
+        count += fanout + 1
+    return root
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = buildTree(numNodes)
+    with tempfile.TemporaryDirectory() as directory:
+        print("tree: {:d} nodes".format(numNodes))
+        for label, extension in (("json", ".json"), ("binary", ".ogb")):
+            filename = os.path.join(directory, 'project' + extension)
+            start = timeit.default_timer()
+            root.save(filename)
+            saveTime = timeit.default_timer() - start
+            start = timeit.default_timer()
+            NumericFileNode.load(filename)
+            loadTime = timeit.default_timer() - start
+            size = os.path.getsize(filename)
+            print("{:<8s} {:8.1f} MB  save {:7.3f} s  load {:7.3f} s".format(label, size / 1e6, saveTime, loadTime))
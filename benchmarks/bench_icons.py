@@ -0,0 +1,68 @@
+""" Counts the icons created and times the decoration requests of scrolling through a large tree.
+
+Requests the DecorationRole of every row the way the view does while painting, then paints each
+icon, once creating a new icon per request as TreeModel.data used to and once with util.icon.
+Runs headless with the offscreen Qt platform.
+
+Run from the repository root with `python benchmarks/bench_icons.py [numRows]`.
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5 import QtGui
+from PyQt5.QtCore import Qt, QModelIndex
+from PyQt5.QtWidgets import QApplication
+
+from objectgui.gui import util
+from objectgui.gui.treeModel import TreeModel
+from bench_save import buildTree
+
+
+class CountingIcon(QtGui.QIcon):
+    """ QIcon that counts how many are constructed. """
+    created = 0
+
+    def __init__(self, *args):
+        CountingIcon.created += 1
+        super().__init__(*args)
+
+
+def uncachedIcon(*args):
+    """ What TreeModel.data did before the cache, a new icon for every request. """
+    return CountingIcon(util.iconPath(*args))
+
+
+def scroll(model: TreeModel, indexes: list):
+    """ Requests and paints the decoration of every index. """
+    for index in indexes:
+        model.data(index, Qt.DecorationRole).pixmap(16, 16)
+
+
+if __name__ == '__main__':
+    numRows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = QApplication([])
+    model = TreeModel(buildTree(numRows))
+    fileIndex = model.index(0, 0, QModelIndex())
+    indexes = []
+    for folderRow in range(model.rowCount(fileIndex)):
+        folderIndex = model.index(folderRow, 0, fileIndex)
+        indexes.append(folderIndex)
+        indexes.extend(model.index(row, 0, folderIndex) for row in range(model.rowCount(folderIndex)))
+    print("rows: {:d}".format(len(indexes)))
+    util.QtGui.QIcon = CountingIcon
+    for label, icon in (("new icon each time", uncachedIcon), ("util.icon", util.icon)):
+        util._icons.clear()
+        originalIcon = util.icon
+        util.icon = icon
+        CountingIcon.created = 0
+        first = timeit.timeit(lambda: scroll(model, indexes), number=1)
+        createdFirst = CountingIcon.created
+        second = timeit.timeit(lambda: scroll(model, indexes), number=1)
+        util.icon = originalIcon
+        print("{:>20s}: first paint {:6.2f} s, {:7d} icons, repaint {:6.2f} s, {:7d} more icons".format(
+            label, first, createdFirst, second, CountingIcon.created - createdFirst))
@@ -0,0 +1,29 @@
+""" Measures the time to import the core of objectgui in a fresh interpreter.
+
+Run from the repository root with `python benchmarks/bench_import.py`. The Qt import time
+is shown for comparison, it is what importing the core cost while Node depended on Qt.
+"""
+import os
+import subprocess
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+packageParent = os.path.realpath(os.path.join(scriptPath, '..', '..'))
+
+
+def timeImport(statement: str, repeats: int = 10) -> float:
+    """ Returns the best wall time in seconds to run an import statement in a new interpreter. """
+    code = (
+        "import sys, time; sys.path.append({!r}); "
+        "start = time.perf_counter(); {}; print(time.perf_counter() - start)"
+    ).format(packageParent, statement)
+    times = []
+    for i in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+        times.append(float(result.stdout))
+    return min(times)
+
+
+if __name__ == '__main__':
+    for statement in ("import objectgui.core.fileNode", "import PyQt5.QtWidgets", "import objectgui.gui.fileTab"):
+        print("{:<36s} {:8.1f} ms".format(statement, 1000 * timeImport(statement)))
@@ -0,0 +1,86 @@
+""" Times adding and removing many nodes through a TreeModel shown in a tree view.
+
+Compares notifying the view of each row, the way FileTab.addNode used to insert nodes, with
+insertNodes and removeNodes.
+Runs headless with the offscreen Qt platform.
+
+Run from the repository root with `python benchmarks/bench_insert.py [numNodes]`.
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtWidgets import QApplication, QTreeView
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+from objectgui.gui.treeModel import TreeModel
+
+
+def oneByOne(model: TreeModel, parentInd, nodes: list):
+    """ The previous FileTab.addNode loop, one row insertion per node. """
+    for node in nodes:
+        row = model.rowCount(parentInd)
+        model.beginInsertRows(parentInd, row, row)
+        node.parent = parentInd.internalPointer()
+        model.endInsertRows()
+
+
+def measure(insert, remove, numNodes: int):
+    """ Inserts numNodes nodes in a shown view then removes every other one.
+
+    Returns:
+        insertion: Time of the model calls and of the view handling them, in seconds.
+        notifications: Number of rowsInserted signals.
+        removal: Time of the model calls and of the view handling them, in seconds.
+    """
+    model = TreeModel(FileNode(name="root"))
+    view = QTreeView()
+    view.setModel(model)
+    view.show()
+    parentInd = model.index(0, 0, QModelIndex())
+    view.expand(parentInd)
+    QApplication.processEvents()
+    notifications = []
+    model.rowsInserted.connect(lambda *args: notifications.append(args))
+    nodes = [Node("Node{:d}".format(i)) for i in range(numNodes)]
+    insertion = timed(lambda: insert(model, parentInd, nodes))
+    removal = timed(lambda: remove(model, parentInd, nodes[::2]))
+    return insertion, len(notifications), removal
+
+
+def timed(function) -> tuple:
+    """ Returns the time of a call and the time the view then takes to process the events it caused. """
+    start = timeit.default_timer()
+    function()
+    middle = timeit.default_timer()
+    QApplication.processEvents()
+    return middle - start, timeit.default_timer() - middle
+
+
+def oneByOneRemoval(model: TreeModel, parentInd, nodes: list):
+    """ Removes each node with its own row removal. """
+    for node in reversed(nodes):
+        model.beginRemoveRows(parentInd, node.row, node.row)
+        node.parent = None
+        model.endRemoveRows()
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = QApplication([])
+    methods = (
+        ("one by one", oneByOne, oneByOneRemoval),
+        ("bulk", lambda m, p, n: m.insertNodes(n, p), lambda m, p, n: m.removeNodes(n)),
+    )
+    measure(methods[0][1], methods[0][2], 100)
+    print("{:d} nodes added to a shown view, then every other one removed (model + view time)".format(numNodes))
+    for label, insert, remove in methods:
+        insertion, notifications, removal = measure(insert, remove, numNodes)
+        print("{:>12s}: insert {:6.3f} + {:6.3f} s, {:6d} notifications, remove {:6.3f} + {:6.3f} s".format(
+            label, insertion[0], insertion[1], notifications, removal[0], removal[1]))
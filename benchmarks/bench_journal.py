@@ -0,0 +1,49 @@
+""" Compares the time of saving a small edit to a large project with and without the edit journal.
+
+Run from the repository root with `python benchmarks/bench_journal.py [numNodes]`.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+from bench_save import buildTree
+
+
+def editAndSave(root: FileNode, filename: str, i: int):
+    """ Renames one node and adds another, then saves. """
+    folder = root.children[i % len(root.children)]
+    folder.children[0].name = "Renamed{:d}".format(i)
+    Node("Added{:d}".format(i)).parent = folder
+    root.save(filename)
+
+
+def measure(root: FileNode, filename: str, edits: int) -> float:
+    """ Returns the mean time of a save after a small edit. """
+    start = timeit.default_timer()
+    for i in range(edits):
+        editAndSave(root, filename, i)
+    return (timeit.default_timer() - start) / edits
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    edits = 50
+    print("tree: {:d} nodes, {:d} edits".format(numNodes, edits))
+    for label, limit in (("full save", 0), ("journal", FileNode.journalLimit)):
+        FileNode.journalLimit = limit
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'project.json')
+            root = buildTree(numNodes)
+            root.save(filename)
+            elapsed = measure(root, filename, edits)
+            start = timeit.default_timer()
+            loaded = FileNode.load(filename)
+            loadTime = timeit.default_timer() - start
+            assert loaded._buildSaveDict() == root._buildSaveDict()
+        print("{:>10s}: {:8.2f} ms per save, load {:.2f} s".format(label, elapsed * 1e3, loadTime))
@@ -0,0 +1,31 @@
+""" Compares opening a project with many nested files eagerly and lazily.
+
+Run from the repository root with `python benchmarks/bench_lazy.py [numFiles] [latencyMs]`.
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.benchmarks.bench_nested import SlowFileNode, buildProject
+
+
+if __name__ == '__main__':
+    numFiles = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    SlowFileNode.latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 0.0) / 1000
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'project.json')
+        buildProject(directory, numFiles).save(filename)
+        print("{:d} nested files, {:.0f} ms per file access".format(numFiles, SlowFileNode.latency * 1000))
+        start = timeit.default_timer()
+        SlowFileNode.load(filename)
+        print("eager load           {:8.3f} s".format(timeit.default_timer() - start))
+        start = timeit.default_timer()
+        root = SlowFileNode.load(filename, lazy=True)
+        print("lazy load            {:8.3f} s".format(timeit.default_timer() - start))
+        start = timeit.default_timer()
+        root.children[0].fetchChildren()
+        print("expand one sub-file  {:8.3f} s".format(timeit.default_timer() - start))
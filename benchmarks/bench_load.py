@@ -0,0 +1,58 @@
+""" Compares time and peak memory of loading a FileNode with json.load or with the streaming reader.
+
+The times are measured without tracemalloc, which slows the many small allocations of building the
+nodes more than json.load. Fails if streaming is more than 10% slower than json.load.
+
+Run from the repository root with `python benchmarks/bench_load.py [numNodes]`.
+"""
+import os
+import sys
+import json
+import tempfile
+import timeit
+import tracemalloc
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.fileNode import FileNode
+from objectgui.benchmarks.bench_save import buildTree
+
+
+def dictLoad(filename: str) -> FileNode:
+    """ The previous load path, parses the whole file into dictionaries then builds the nodes. """
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    fileNode = FileNode.fromAttributes(data['attributes'])
+    FileNode._createNodes(data['children'], fileNode, [])
+    return fileNode
+
+
+def streamLoad(filename: str) -> FileNode:
+    """ The streaming load path up to the same tree as dictLoad, without replaying the journal or reading nested files. """
+    return FileNode._parseFile(filename, None, [])
+
+
+def measure(load, filename: str):
+    """ Returns the best time of a few loads and the peak traced memory of one more. """
+    elapsed = min(timeit.repeat(lambda: load(filename), number=1, repeat=3))
+    tracemalloc.start()
+    load(filename)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'project.json')
+        buildTree(numNodes).save(filename)
+        print("file: {:d} nodes, {:.1f} MB".format(numNodes, os.path.getsize(filename) / 1e6))
+        times = []
+        for label, load in (("json.load + build", dictLoad), ("streaming", streamLoad)):
+            elapsed, peak = measure(load, filename)
+            times.append(elapsed)
+            print("{:<18s} {:8.3f} s  peak {:8.1f} MB".format(label, elapsed, peak / 1e6))
+        # Allows for the noise between runs
+        assert times[1] <= 1.1 * times[0], "streaming is slower than json.load"
@@ -0,0 +1,74 @@
+""" Compares the memory used by the NodeMixin and CompactTree storage backends.
+
+Run from the repository root with `python benchmarks/bench_memory.py`.
+"""
+import os
+import sys
+import tracemalloc
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.tree import NodeMixin
+from objectgui.core.compactTree import CompactTree
+
+
+class Node(NodeMixin):
+    pass
+
+
+def buildNodeMixin(numNodes: int, fanout: int):
+    """ Builds a tree of NodeMixin objects where every node has fanout children. """
+    root = Node()
+    nodes = [root]
+    i = 0
+    while len(nodes) < numNodes:
+        children = [Node() for j in range(min(fanout, numNodes - len(nodes)))]
+        nodes[i].attachMany(children)
+        nodes.extend(children)
+        i += 1
+    return root
+
+
+def buildCompact(numNodes: int, fanout: int, materialize: bool):
+    """ Builds the same tree shape in a CompactTree, optionally creating and holding every handle. """
+    tree = CompactTree()
+    tree.newId()
+    i = 0
+    while len(tree) < numNodes:
+        tree.newIds(min(fanout, numNodes - len(tree)), i)
+        i += 1
+    if materialize:
+        # The handles are cached weakly, they only cost memory while something holds them
+        return tree, [tree.node(nodeId) for nodeId in range(len(tree))]
+    return tree
+
+
+def walkCompact(numNodes: int, fanout: int):
+    """ Builds the tree in a CompactTree and visits every node without holding the handles. """
+    tree = buildCompact(numNodes, fanout, False)
+    for node in tree.node(0).iterSubTree():
+        pass
+    return tree
+
+
+def measure(build, *args):
+    """ Returns the bytes allocated while building and holding the result. """
+    tracemalloc.start()
+    result = build(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+if __name__ == '__main__':
+    fanout = 10
+    print("{:>10s} {:>16s} {:>16s} {:>16s} {:>16s}".format(
+        "nodes", "NodeMixin (B/n)", "compact (B/n)", "+handles (B/n)", "walked (B/n)"))
+    for numNodes in (10**4, 10**5, 5 * 10**5):
+        mixin = measure(buildNodeMixin, numNodes, fanout) / numNodes
+        compact = measure(buildCompact, numNodes, fanout, False) / numNodes
+        handles = measure(buildCompact, numNodes, fanout, True) / numNodes
+        walked = measure(walkCompact, numNodes, fanout) / numNodes
+        print("{:>10d} {:>16.1f} {:>16.1f} {:>16.1f} {:>16.1f}".format(numNodes, mixin, compact, handles, walked))
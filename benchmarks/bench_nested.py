@@ -0,0 +1,63 @@
+""" Compares saving and loading a project with many nested files on one thread and on a thread pool.
+
+Each file access can be given an extra delay to imitate a network mounted home directory.
+Run from the repository root with `python benchmarks/bench_nested.py [numFiles] [latencyMs]`.
+"""
+import os
+import sys
+import time
+import tempfile
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+
+
+class SlowFileNode(FileNode):
+    """ FileNode that waits latency seconds before each file it reads or writes. """
+    latency = 0.0
+
+    def _writeFile(self, filename):
+        time.sleep(self.latency)
+        super()._writeFile(filename)
+
+
+    @classmethod
+    def _read(cls, filename, progress=None):
+        time.sleep(cls.latency)
+        return super()._read(filename, progress)
+
+
+SlowFileNode.classMapping = dict(FileNode.classMapping, SlowFileNode=SlowFileNode.fromAttributes)
+
+
+def buildProject(directory: str, numFiles: int, nodesPerFile: int = 200) -> SlowFileNode:
+    """ Builds a project with numFiles nested files of nodesPerFile nodes each. """
+    root = SlowFileNode(name="root")
+    for i in range(numFiles):
+        nested = SlowFileNode(name="Sub{:d}".format(i), filename=os.path.join(directory, 'sub{:d}.json'.format(i)))
+        nested.parent = root
+        nested.attachMany([Node("Node{:d}".format(j)) for j in range(nodesPerFile)])
+    return root
+
+
+if __name__ == '__main__':
+    numFiles = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    SlowFileNode.latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    print("{:d} nested files, {:.0f} ms per file access".format(numFiles, SlowFileNode.latency * 1000))
+    for workers in (1, 4, FileNode.maxWorkers, 16):
+        SlowFileNode.maxWorkers = workers
+        # A new directory for each run so every save creates all of its files
+        with tempfile.TemporaryDirectory() as directory:
+            root = buildProject(directory, numFiles)
+            filename = os.path.join(directory, 'project.json')
+            start = timeit.default_timer()
+            root.save(filename)
+            saveTime = timeit.default_timer() - start
+            start = timeit.default_timer()
+            SlowFileNode.load(filename)
+            loadTime = timeit.default_timer() - start
+        print("{:3d} workers  save {:7.3f} s  load {:7.3f} s".format(workers, saveTime, loadTime))
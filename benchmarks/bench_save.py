@@ -0,0 +1,72 @@
+""" Compares time and peak memory of saving a FileNode by dumping a dictionary or by streaming.
+
+Also times the part of a background save that runs on the GUI thread, capturing a snapshot of the
+tree, against building the dictionary of the whole tree that snapshots used to hold.
+
+Run from the repository root with `python benchmarks/bench_save.py [numNodes]`.
+"""
+import os
+import sys
+import json
+import tempfile
+import timeit
+import tracemalloc
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+
+
+def buildTree(numNodes: int, fanout: int = 100) -> FileNode:
+    """ Builds a FileNode with folders of fanout nodes until there are numNodes nodes. """
+    root = FileNode(name="root")
+    count = 0
+    while count < numNodes:
+        folder = FolderNode(name="Folder{:d}".format(count))
+        folder.parent = root
+        folder.attachMany([Node("Node{:d}".format(count + i)) for i in range(fanout)])
+        count += fanout + 1
+    return root
+
+
+def dumpSave(root: FileNode, filename: str):
+    """ The previous save path, builds the whole dictionary then dumps it. """
+    with open(filename, 'w') as f:
+        json.dump(root._buildSaveDict(), f)
+
+
+def measure(save, root: FileNode, filename: str):
+    """ Returns the time and the peak traced memory of a save. """
+    tracemalloc.start()
+    start = timeit.default_timer()
+    save(root, filename)
+    elapsed = timeit.default_timer() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    root = buildTree(numNodes)
+    tracemalloc.start()
+    buildTree(numNodes)
+    treeSize = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'project.json')
+        print("tree: {:d} nodes, {:.1f} MB".format(numNodes, treeSize / 1e6))
+        for label, save in (("dict + json.dump", dumpSave), ("streaming", lambda r, f: r.save(f))):
+            elapsed, peak = measure(save, root, filename)
+            print("{:<18s} {:8.3f} s  peak {:8.1f} MB".format(label, elapsed, peak / 1e6))
+        # A file other than the one saved to is written whole rather than appended to its journal
+        snapshot = lambda: root.takeSnapshot(os.path.join(directory, 'snapshot.json'))
+        for label, capture in (("build dict", root._buildSaveDict), ("snapshot", snapshot)):
+            elapsed = min(timeit.repeat(capture, number=1, repeat=3))
+            print("{:<18s} {:8.3f} s  on the GUI thread".format(label, elapsed))
+        start = timeit.default_timer()
+        snapshot().write()
+        print("{:<18s} {:8.3f} s  on the worker".format("snapshot write", timeit.default_timer() - start))
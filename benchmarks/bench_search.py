@@ -0,0 +1,80 @@
+""" Times searching the names of a large tree, as typed in the search box of a FileTab.
+
+Builds a tree of numNodes nodes in folders of 1000, then times the SearchIndex alone and the
+SearchProxyModel building the filtered tree for queries of growing length, from one matching nearly
+every node (capped at SearchIndex.maxResults) to one matching a single node. A QSortFilterProxyModel
+with recursive filtering, the naive approach, is timed on the same model for comparison.
+
+Run from the repository root with `python benchmarks/bench_search.py [numNodes]`.
+"""
+import os
+import sys
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QCoreApplication, QSortFilterProxyModel, QRegularExpression
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.core.searchIndex import SearchIndex
+from objectgui.gui.treeModel import TreeModel
+from objectgui.gui.searchProxy import SearchProxyModel
+
+
+QUERIES = ('n', 'no', 'node', 'node12', 'node1234', 'node123456', 'renamed')
+
+
+def buildTree(numNodes: int) -> FileNode:
+    """ Returns a file node with numNodes nodes named NodeN, in folders of 1000. """
+    root = FileNode(name="root")
+    folders = []
+    for start in range(0, numNodes, 1000):
+        folder = FolderNode(name="Folder{:d}".format(start // 1000))
+        folder.attachMany([Node("Node{:d}".format(i)) for i in range(start, min(start + 1000, numNodes))])
+        folders.append(folder)
+    root.attachMany(folders)
+    return root
+
+
+def best(function, repeat: int = 5) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+    numNodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    app = QCoreApplication([])
+    start = timeit.default_timer()
+    root = buildTree(numNodes)
+    model = TreeModel(root)
+    print("Built {:d} nodes in {:.1f} s".format(numNodes, timeit.default_timer() - start))
+
+    start = timeit.default_timer()
+    index = SearchIndex(root)
+    print("Indexed in {:.2f} s, done once when the first search is typed".format(timeit.default_timer() - start))
+    proxy = SearchProxyModel(model, index)
+
+    # Renames and moves made after the index was built are scanned separately until the next join
+    for node in root.children[0].children[:500]:
+        node.name = "Renamed" + node.name
+    root.children[1].moveRange(0, 500, root.children[2], 0)
+
+    print("{:>12s} {:>8s} {:>10s} {:>10s}".format("query", "matches", "index ms", "proxy ms"))
+    for query in QUERIES:
+        matches = len(index.search(query))
+        search = best(lambda: index.search(query))
+        filtered = best(lambda: proxy.setSearchText(query))
+        print("{:>12s} {:>8d} {:>10.1f} {:>10.1f}".format(query, matches, search * 1e3, filtered * 1e3))
+
+    naive = QSortFilterProxyModel()
+    naive.setRecursiveFilteringEnabled(True)
+    naive.setSourceModel(model)
+    # The proxy only filters the rows it has mapped, map every folder like an expanded view would
+    fileIndex = naive.index(0, 0)
+    for row in range(naive.rowCount(fileIndex)):
+        naive.rowCount(naive.index(row, 0, fileIndex))
+    start = timeit.default_timer()
+    naive.setFilterRegularExpression(QRegularExpression('node123456', QRegularExpression.CaseInsensitiveOption))
+    print("QSortFilterProxyModel: {:.0f} ms for 'node123456'".format((timeit.default_timer() - start) * 1e3))
@@ -0,0 +1,93 @@
+""" Measures application startup time against the number of node classes, importing them all or registering them.
+
+Generates a package of node classes, each importing a module that takes a few milliseconds to
+import the way an edit form importing Qt widgets does, then measures in a fresh interpreter the
+time to make every class loadable and the time to load a file using two of them.
+
+Run from the repository root with `python benchmarks/bench_startup.py`.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+packageParent = os.path.realpath(os.path.join(scriptPath, '..', '..'))
+
+_NODE_MODULE = """
+import time
+from objectgui.core.node import Node
+
+# Stands in for the import time of the classes the node and its edit form depend on
+_start = time.perf_counter()
+while time.perf_counter() - _start < 0.002:
+    pass
+
+class Plugin{0:d}(Node):
+    pass
+"""
+
+_EAGER = """
+from objectgui.core.fileNode import FileNode
+import importlib
+for i in range({count:d}):
+    module = importlib.import_module('benchplugins.plugin{{:d}}'.format(i))
+    name = 'Plugin{{:d}}'.format(i)
+    FileNode.classMapping[name] = getattr(module, name).fromAttributes
+"""
+
+_LAZY = """
+from objectgui.core.fileNode import FileNode
+for i in range({count:d}):
+    FileNode.nodeRegistry.register('Plugin{{:d}}'.format(i), 'benchplugins.plugin{{:d}}.Plugin{{:d}}'.format(i, i))
+"""
+
+_LOAD = "FileNode.load({filename!r})"
+
+
+def writePlugins(directory: str, count: int):
+    """ Writes the benchplugins package with count node classes. """
+    package = os.path.join(directory, 'benchplugins')
+    os.makedirs(package, exist_ok=True)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+    for i in range(count):
+        with open(os.path.join(package, 'plugin{:d}.py'.format(i)), 'w') as f:
+            f.write(_NODE_MODULE.format(i))
+
+
+def writeProject(filename: str):
+    """ Writes a project file containing nodes of two of the plugin classes. """
+    import json
+    children = [{'attributes': {'name': 'n{:d}'.format(i)}, 'class': 'Plugin{:d}'.format(i), 'children': []} for i in range(2)]
+    with open(filename, 'w') as f:
+        json.dump({'attributes': {'name': 'root', 'filename': None}, 'class': 'FileNode', 'children': children}, f)
+
+
+def timeStartup(directory: str, setup: str, load: str, repeats: int = 3):
+    """ Returns the best times in seconds of the setup code and of the load that follows it, each in a new interpreter. """
+    code = (
+        "import sys, time; sys.path.append({!r}); sys.path.append({!r}); "
+        "start = time.perf_counter()\n{}\nmiddle = time.perf_counter()\n{}\n"
+        "print(middle - start, time.perf_counter() - middle)"
+    ).format(packageParent, directory, setup, load)
+    best = None
+    for i in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+        times = tuple(float(t) for t in result.stdout.split())
+        best = times if best is None else tuple(min(a, b) for a, b in zip(best, times))
+    return best
+
+
+if __name__ == '__main__':
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 400]
+    with tempfile.TemporaryDirectory() as directory:
+        writePlugins(directory, max(counts))
+        filename = os.path.join(directory, 'project.json')
+        writeProject(filename)
+        print("{:>8s} {:>18s} {:>18s}".format("classes", "import all", "registry"))
+        for count in counts:
+            eager = timeStartup(directory, _EAGER.format(count=count), _LOAD.format(filename=filename))
+            lazy = timeStartup(directory, _LAZY.format(count=count), _LOAD.format(filename=filename))
+            print("{:8d} {:8.1f} + {:5.1f} ms {:8.1f} + {:5.1f} ms".format(
+                count, eager[0] * 1e3, eager[1] * 1e3, lazy[0] * 1e3, lazy[1] * 1e3))
+        print("(startup + loading a file that uses two of the classes)")
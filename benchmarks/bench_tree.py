@@ -0,0 +1,192 @@
+""" Benchmarks for the core tree operations.
+
+Run from the repository root with `python benchmarks/bench_tree.py`.
+"""
+import os
+import sys
+import timeit
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.tree import NodeMixin
+from objectgui.core.compactTree import CompactTree
+
+
+class Node(NodeMixin):
+    pass
+
+
+def benchRow(numSiblings: int, lookups: int = 1000):
+    """ Times reading the row of nodes spread across a wide parent, as TreeModel.parent does. """
+    parent = Node()
+    children = [Node() for i in range(numSiblings)]
+    parent.children = children
+    step = max(numSiblings // lookups, 1)
+    sample = children[::step]
+    t = timeit.timeit(lambda: [c.row for c in sample], number=10) / 10
+    return t / len(sample)
+
+
+def benchCompactRow(numSiblings: int, lookups: int = 1000):
+    """ Times reading the row of compact nodes spread across a wide parent once a move has been renumbered. """
+    tree = CompactTree()
+    parent = tree.newNode()
+    ids = tree.newIds(numSiblings, parent.id)
+    parent.childAt(0).row = numSiblings // 2
+    step = max(numSiblings // lookups, 1)
+    sample = [tree.node(nodeId) for nodeId in ids[::step]]
+    sample[0].row
+    t = timeit.timeit(lambda: [c.row for c in sample], number=10) / 10
+    return t / len(sample)
+
+
+def benchNextSibling(numSiblings: int):
+    """ Times walking every sibling with nextSibling. """
+    parent = Node()
+    parent.children = [Node() for i in range(numSiblings)]
+    node = parent.children[0]
+    start = timeit.default_timer()
+    for i in range(numSiblings):
+        node = node.nextSibling()
+    return (timeit.default_timer() - start) / numSiblings
+
+
+def benchRowMove(numSiblings: int, moves: int = 100):
+    """ Times moving a node a short distance within a wide parent. """
+    parent = Node()
+    parent.children = [Node() for i in range(numSiblings)]
+    middle = parent.children[numSiblings // 2]
+    start = timeit.default_timer()
+    for i in range(moves):
+        middle.row = middle.row + (1 if i % 2 == 0 else -1)
+    return (timeit.default_timer() - start) / moves
+
+
+def benchDeepBuild(depth: int):
+    """ Times building a single chain of the given depth one leaf at a time. """
+    start = timeit.default_timer()
+    node = Node()
+    for i in range(depth):
+        leaf = Node()
+        leaf.parent = node
+        node = leaf
+    return timeit.default_timer() - start
+
+
+def benchReplaceChildren(numChildren: int):
+    """ Times moving every child of one node to another with the children setter. """
+    source = Node()
+    target = Node()
+    source.children = [Node() for i in range(numChildren)]
+    start = timeit.default_timer()
+    target.children = source.children
+    return timeit.default_timer() - start
+
+
+def benchMoveRange(numChildren: int):
+    """ Times moving the first half of a node's children to another node as one range. """
+    source = Node()
+    target = Node()
+    source.children = [Node() for i in range(numChildren)]
+    start = timeit.default_timer()
+    source.moveRange(0, numChildren // 2, target, 0)
+    return timeit.default_timer() - start
+
+
+class IntervalIndex():
+    """ Euler tour numbering of a tree, the alternative to the depth walk of NodeMixin.isAncestorOf.
+
+    A node is an ancestor of another if its interval contains the other's, an O(1) test, but every
+    move shifts the numbers of all the nodes after the moved subtree so the whole tree is numbered again.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.renumber()
+
+
+    def renumber(self):
+        self.enter = {}
+        self.exit = {}
+        counter = 0
+        stack = [(self.root, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                self.exit[id(node)] = counter
+            else:
+                self.enter[id(node)] = counter
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+            counter += 1
+
+
+    def isAncestor(self, node, other) -> bool:
+        return node is not other and self.enter[id(node)] <= self.enter[id(other)] and self.exit[id(other)] <= self.exit[id(node)]
+
+
+def buildBalanced(numNodes: int, fanout: int):
+    """ Returns the root and the nodes of a tree where every node has fanout children, in level order. """
+    root = Node()
+    nodes = [root]
+    parentIndex = 0
+    while len(nodes) < numNodes:
+        children = [Node() for i in range(min(fanout, numNodes - len(nodes)))]
+        nodes[parentIndex].children = children
+        nodes.extend(children)
+        parentIndex += 1
+    return root, nodes
+
+
+def benchAncestry(numNodes: int, fanout: int, moves: int = 20):
+    """ Times ancestor queries and moves with the depth walk and with an interval index.
+
+    Each move is a drag and drop: the drop is checked with an ancestor query, then a leaf is moved
+    and, for the interval index, the tree is numbered again. Returns the time per query and per move.
+    """
+    root, nodes = buildBalanced(numNodes, fanout)
+    leaves = [node for node in nodes if not node.children]
+    sample = [(nodes[i % len(nodes)], leaves[(7 * i) % len(leaves)]) for i in range(1000)]
+    walk = timeit.timeit(lambda: [a.isAncestorOf(b) for a, b in sample], number=10) / 10 / len(sample)
+    index = IntervalIndex(root)
+    interval = timeit.timeit(lambda: [index.isAncestor(a, b) for a, b in sample], number=10) / 10 / len(sample)
+
+    def move(renumber):
+        for i in range(moves):
+            leaf = leaves[(13 * i) % len(leaves)]
+            target = nodes[(31 * i) % (len(nodes) // fanout + 1)]
+            if not leaf.isAncestorOf(target):
+                leaf.parent = target
+                if renumber:
+                    index.renumber()
+    walkMove = timeit.timeit(lambda: move(False), number=1) / moves
+    intervalMove = timeit.timeit(lambda: move(True), number=1) / moves
+    return walk, interval, walkMove, intervalMove
+
+
+if __name__ == '__main__':
+    print("{:>10s} {:>14s} {:>14s} {:>14s} {:>16s}".format(
+        "siblings", "row (s)", "nextSib (s)", "short move (s)", "compact row (s)"))
+    for exponent in range(3, 7):
+        n = 10**exponent
+        print("{:>10d} {:>14.3e} {:>14.3e} {:>14.3e} {:>16.3e}".format(
+            n, benchRow(n), benchNextSibling(n), benchRowMove(n), benchCompactRow(n)))
+
+    print()
+    print("{:>10s} {:>14s}".format("depth", "build (s)"))
+    for exponent in range(2, 6):
+        n = 10**exponent
+        print("{:>10d} {:>14.3e}".format(n, benchDeepBuild(n)))
+
+    print()
+    print("{:>10s} {:>14s} {:>14s}".format("children", "replace (s)", "moveRange (s)"))
+    for exponent in range(3, 6):
+        n = 5 * 10**exponent
+        print("{:>10d} {:>14.3e} {:>14.3e}".format(n, benchReplaceChildren(n), benchMoveRange(n)))
+
+    print()
+    print("{:>10s} {:>7s} {:>14s} {:>14s} {:>14s} {:>14s}".format(
+        "nodes", "fanout", "walk query", "interval query", "walk move", "interval move"))
+    for numNodes, fanout in ((10**5, 100), (10**5, 10), (10**5, 2), (10**4, 1)):
+        times = benchAncestry(numNodes, fanout)
+        print("{:>10d} {:>7d} {:>14.3e} {:>14.3e} {:>14.3e} {:>14.3e}".format(numNodes, fanout, *times))
@@ -0,0 +1,344 @@
+import json
+import struct
+from typing import Callable
+
+
+# File layout, all integers are little endian:
+#   header: magic, version, flags (unused), offset of the string table
+#   one node record for the root, children records are nested inside their parent's record
+#   string table: number of strings then each string as a length prefixed utf-8 byte string
+# Node record: length of the rest of the record (so a whole subtree can be skipped), class name index,
+# number of attributes, (attribute name index, value) pairs, number of children, the children records.
+MAGIC = b'OGUI'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')
+U32 = struct.Struct('<I')
+RECORD = struct.Struct('<III')
+INT = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+
+# Value tags
+NONE = 0
+FALSE = 1
+TRUE = 2
+INTEGER = 3
+REAL = 4
+STRING = 5
+LIST = 6
+DICT = 7
+BIGINT = 8
+
+_INT_MIN = -(1 << 63)
+_INT_MAX = (1 << 63) - 1
+
+
+class BinaryFormatError(ValueError):
+    """ Raised when a file isn't a binary project file or uses a newer version of the format. """
+
+
+def isBinaryFile(filename: str) -> bool:
+    """ Returns True if the file starts with the binary project file magic. """
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BinaryTreeWriter():
+    """ Builds a binary project file one node at a time.
+
+    Every beginNode must be matched by an endNode once all of the node's children have been written,
+    the first node written is the root. The encoded file is returned by getvalue.
+    """
+    def __init__(self):
+        self._buffer = bytearray(HEADER.size)
+        self._strings = {}
+        # Offsets of the record start and the children count of each open node and its number of children
+        self._open = []
+
+
+    def beginNode(self, className: str, attributes: dict):
+        """ Starts the record of a node, it becomes the parent of the following nodes until endNode.
+
+        Args:
+            className: Name of the node's class.
+            attributes: The node's saved attributes.
+        """
+        buffer = self._buffer
+        if self._open:
+            self._open[-1][2] += 1
+        start = len(buffer)
+        buffer += RECORD.pack(0, self._stringIndex(className), len(attributes))
+        for key, value in attributes.items():
+            buffer += U32.pack(self._stringIndex(str(key)))
+            self._writeValue(value)
+        self._open.append([start, len(buffer), 0])
+        buffer += U32.pack(0)
+
+
+    def endNode(self):
+        """ Closes the record of the most recently started node. """
+        start, childrenOffset, numChildren = self._open.pop()
+        buffer = self._buffer
+        U32.pack_into(buffer, start, len(buffer) - start - U32.size)
+        U32.pack_into(buffer, childrenOffset, numChildren)
+
+
+    def getvalue(self) -> bytes:
+        """ Returns the encoded file. """
+        if self._open:
+            raise ValueError("Not every node has been closed with endNode.")
+        buffer = bytearray(self._buffer)
+        HEADER.pack_into(buffer, 0, MAGIC, VERSION, 0, len(buffer))
+        buffer += U32.pack(len(self._strings))
+        for string in self._strings:
+            encoded = string.encode('utf-8')
+            buffer += U32.pack(len(encoded))
+            buffer += encoded
+        return bytes(buffer)
+
+
+    def _stringIndex(self, string: str) -> int:
+        """ Returns the index of the string in the string table, adding it if it isn't there yet. """
+        index = self._strings.get(string)
+        if index is None:
+            index = len(self._strings)
+            self._strings[string] = index
+        return index
+
+
+    def _writeValue(self, value):
+        """ Appends the tagged encoding of an attribute value to the buffer. """
+        buffer = self._buffer
+        # bool must be checked before int because it is a subclass of it
+        if value is None:
+            buffer.append(NONE)
+        elif value is True:
+            buffer.append(TRUE)
+        elif value is False:
+            buffer.append(FALSE)
+        elif isinstance(value, int):
+            if _INT_MIN <= value <= _INT_MAX:
+                buffer.append(INTEGER)
+                buffer += INT.pack(value)
+            else:
+                buffer.append(BIGINT)
+                self._writeString(str(value))
+        elif isinstance(value, float):
+            buffer.append(REAL)
+            buffer += FLOAT.pack(value)
+        elif isinstance(value, str):
+            buffer.append(STRING)
+            self._writeString(value)
+        elif isinstance(value, (list, tuple)):
+            buffer.append(LIST)
+            buffer += U32.pack(len(value))
+            for item in value:
+                self._writeValue(item)
+        elif isinstance(value, dict):
+            buffer.append(DICT)
+            buffer += U32.pack(len(value))
+            for key, item in value.items():
+                self._writeString(str(key))
+                self._writeValue(item)
+        else:
+            raise TypeError("Object of type {} can't be saved in a binary project file.".format(type(value).__name__))
+
+
+    def _writeString(self, string: str):
+        """ Appends a length prefixed utf-8 string to the buffer. """
+        encoded = string.encode('utf-8')
+        self._buffer += U32.pack(len(encoded))
+        self._buffer += encoded
+
+
+class BinaryTreeReader():
+    """ Reads the nodes of a binary project file.
+
+    Has the same read interface as JsonTreeReader so FileNode can build its tree from either format.
+
+    Args:
+        data: The contents of the file.
+    """
+    def __init__(self, data: bytes):
+        if len(data) < HEADER.size:
+            raise BinaryFormatError("File is too short to be a binary project file.")
+        magic, version, flags, tableOffset = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise BinaryFormatError("File is not a binary project file.")
+        if version > VERSION:
+            raise BinaryFormatError("Binary project file version {:d} is newer than the supported version {:d}.".format(version, VERSION))
+        self.data = data
+        self.version = version
+        self.strings = self._readStringTable(tableOffset)
+
+
+    @property
+    def rootOffset(self) -> int:
+        """ Offset of the root node's record. """
+        return HEADER.size
+
+
+    def read(self, createRoot: Callable, createNode: Callable, attachChildren: Callable = None) -> object:
+        """ Reads the whole file and returns the root node, the children of each node are created together.
+
+        Args:
+            createRoot: Function called with the root's attributes, returns the root node.
+            createNode: Function called with (className, attributes, parent), creates the node,
+                attaches it to parent and returns it.
+            attachChildren: Optional function called with (parent, children) to attach all the
+                children of parent at once, createNode then only creates the node. Parents are
+                attached before their children.
+        """
+        className, attributes, numChildren, pos = self.readRecord(self.rootOffset)
+        root = createRoot(attributes)
+        # Each entry is a node, its number of children and the offset of its first child record
+        stack = [(root, numChildren, pos)]
+        while stack:
+            parent, numChildren, pos = stack.pop()
+            items = []
+            subtrees = []
+            for i in range(numChildren):
+                # The record length skips the child's subtree, see childOffsets
+                nextPos = pos + U32.size + U32.unpack_from(self.data, pos)[0]
+                className, attributes, childCount, childPos = self.readRecord(pos)
+                item = createNode(className, attributes, parent)
+                items.append(item)
+                if childCount:
+                    subtrees.append((item, childCount, childPos))
+                pos = nextPos
+            if attachChildren is not None and items:
+                attachChildren(parent, items)
+            stack.extend(reversed(subtrees))
+        return root
+
+
+    def readRecord(self, offset: int):
+        """ Reads the node record starting at offset without its children.
+
+        Returns:
+            className: Name of the node's class.
+            attributes: Dictionary of the node's saved attributes.
+            numChildren: Number of children records that follow.
+            pos: Offset of the first child record.
+        """
+        strings = self.strings
+        length, classIndex, numAttributes = RECORD.unpack_from(self.data, offset)
+        pos = offset + RECORD.size
+        attributes = {}
+        for i in range(numAttributes):
+            key = strings[U32.unpack_from(self.data, pos)[0]]
+            attributes[key], pos = self._readValue(pos + U32.size)
+        numChildren = U32.unpack_from(self.data, pos)[0]
+        return strings[classIndex], attributes, numChildren, pos + U32.size
+
+
+    def childOffsets(self, offset: int) -> list:
+        """ Returns the offsets of the children records of the record at offset, skipping their subtrees. """
+        className, attributes, numChildren, pos = self.readRecord(offset)
+        offsets = []
+        for i in range(numChildren):
+            offsets.append(pos)
+            pos += U32.size + U32.unpack_from(self.data, pos)[0]
+        return offsets
+
+
+    def _readStringTable(self, offset: int) -> list:
+        """ Reads the class and attribute names stored at the end of the file. """
+        data = self.data
+        count = U32.unpack_from(data, offset)[0]
+        pos = offset + U32.size
+        strings = []
+        for i in range(count):
+            length = U32.unpack_from(data, pos)[0]
+            pos += U32.size
+            strings.append(data[pos:pos + length].decode('utf-8'))
+            pos += length
+        return strings
+
+
+    def _readValue(self, pos: int):
+        """ Decodes the tagged value at pos, returns it and the offset after it. """
+        data = self.data
+        tag = data[pos]
+        pos += 1
+        if tag == NONE:
+            return None, pos
+        if tag == FALSE:
+            return False, pos
+        if tag == TRUE:
+            return True, pos
+        if tag == INTEGER:
+            return INT.unpack_from(data, pos)[0], pos + INT.size
+        if tag == REAL:
+            return FLOAT.unpack_from(data, pos)[0], pos + FLOAT.size
+        if tag == STRING:
+            return self._readString(pos)
+        if tag == LIST:
+            count = U32.unpack_from(data, pos)[0]
+            pos += U32.size
+            items = []
+            for i in range(count):
+                item, pos = self._readValue(pos)
+                items.append(item)
+            return items, pos
+        if tag == DICT:
+            count = U32.unpack_from(data, pos)[0]
+            pos += U32.size
+            items = {}
+            for i in range(count):
+                key, pos = self._readString(pos)
+                items[key], pos = self._readValue(pos)
+            return items, pos
+        if tag == BIGINT:
+            string, pos = self._readString(pos)
+            return int(string), pos
+        raise BinaryFormatError("Unknown value tag {:d} at offset {:d}.".format(tag, pos - 1))
+
+
+    def _readString(self, pos: int):
+        """ Decodes the length prefixed string at pos, returns it and the offset after it. """
+        length = U32.unpack_from(self.data, pos)[0]
+        pos += U32.size
+        return self.data[pos:pos + length].decode('utf-8'), pos + length
+
+
+def writeSaveDict(writer: BinaryTreeWriter, data: dict):
+    """ Writes a tree in the dictionary format of FileNode._buildSaveDict to a writer. """
+    writer.beginNode(data['class'], data['attributes'])
+    stack = [iter(data['children'])]
+    while stack:
+        nodeData = next(stack[-1], None)
+        if nodeData is None:
+            stack.pop()
+            writer.endNode()
+            continue
+        writer.beginNode(nodeData['class'], nodeData['attributes'])
+        stack.append(iter(nodeData['children']))
+
+
+def readSaveDict(reader: BinaryTreeReader) -> dict:
+    """ Returns the tree of a reader in the dictionary format of FileNode._buildSaveDict. """
+    def createNode(className, attributes, parent):
+        nodeData = {'attributes': attributes, 'class': className, 'children': []}
+        parent['children'].append(nodeData)
+        return nodeData
+
+    rootClass = reader.readRecord(reader.rootOffset)[0]
+    return reader.read(lambda attributes: {'attributes': attributes, 'class': rootClass, 'children': []}, createNode)
+
+
+def jsonToBinary(jsonFilename: str, binaryFilename: str):
+    """ Converts a json project file to the binary format. """
+    with open(jsonFilename, 'r') as f:
+        data = json.load(f)
+    writer = BinaryTreeWriter()
+    writeSaveDict(writer, data)
+    with open(binaryFilename, 'wb') as f:
+        f.write(writer.getvalue())
+
+
+def binaryToJson(binaryFilename: str, jsonFilename: str):
+    """ Converts a binary project file to the json format. """
+    with open(binaryFilename, 'rb') as f:
+        data = readSaveDict(BinaryTreeReader(f.read()))
+    with open(jsonFilename, 'w') as f:
+        json.dump(data, f)
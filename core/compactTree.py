@@ -0,0 +1,546 @@
+from array import array
+from collections import deque
+from typing import Callable
+import weakref
+
+from objectgui.core.tree import CircularTreeError
+
+
+NONE = -1
+
+
+class CompactTree():
+    """ Array backed storage for the structure of a tree.
+
+    An alternative storage backend to NodeMixin for very large trees. The structure of every node
+    (parent, first/last child, previous/next sibling, depth and number of children) lives in typed
+    arrays indexed by an integer node id, so a node costs a few dozen bytes instead of a full python
+    object with a __dict__ and a children list. Node objects are thin CompactNode handles that are
+    only created when a node is accessed, each id has one handle while it is referenced.
+
+    The handles are cached weakly, so walking the whole tree doesn't leave a handle behind for every
+    node. Anything that relies on a handle outliving its references has to keep it, as TreeModel does
+    for the handles it gives Qt as the internal pointers of its indexes.
+
+    The row of each node is stored too. Appending keeps the rows up to date, other changes to the
+    children of a node mark their rows as stale and they are renumbered the next time one is read.
+    """
+    def __init__(self, nodeCls: type = None):
+        self.nodeCls = CompactNode if nodeCls is None else nodeCls
+        self._parent = array('q')
+        self._firstChild = array('q')
+        self._lastChild = array('q')
+        self._prevSibling = array('q')
+        self._nextSibling = array('q')
+        self._depth = array('i')
+        self._numChildren = array('i')
+        self._row = array('i')
+        # Ids of the nodes whose children's rows are out of date, see CompactNode.row
+        self._staleRows = set()
+        self._handles = weakref.WeakValueDictionary()
+        # Names of the nodes that have been given one, see CompactNode.name
+        self._names = {}
+        # (parentId, row, childId) of the last child looked up by row, so walking the rows in order is O(1) per row
+        self._cursor = None
+
+
+    def __len__(self) -> int:
+        """ Returns the number of nodes that have been allocated in the tree. """
+        return len(self._parent)
+
+
+    def newId(self, parentId: int = NONE) -> int:
+        """ Allocates a new node without creating its handle and returns its id.
+
+        Args:
+            parentId: Optional id of the node to append the new node to.
+        """
+        nodeId = len(self._parent)
+        for column in (self._parent, self._firstChild, self._lastChild, self._prevSibling, self._nextSibling):
+            column.append(NONE)
+        self._depth.append(0)
+        self._numChildren.append(0)
+        self._row.append(NONE)
+        if parentId != NONE:
+            self._link(nodeId, parentId, NONE)
+            self._depth[nodeId] = self._depth[parentId] + 1
+        return nodeId
+
+
+    def newIds(self, count: int, parentId: int = NONE) -> range:
+        """ Allocates count new nodes appended to the given parent and returns their ids. """
+        start = len(self._parent)
+        for i in range(count):
+            self.newId(parentId)
+        return range(start, start + count)
+
+
+    def newNode(self, parent: object = None) -> object:
+        """ Allocates a new node and returns its handle.
+
+        Args:
+            parent: Optional handle of the node to append the new node to.
+        """
+        parentId = NONE if parent is None else self._idOf(parent)
+        return self.node(self.newId(parentId))
+
+
+    def node(self, nodeId: int) -> object:
+        """ Returns the handle for the given id, creating it the first time it is requested. """
+        if nodeId == NONE:
+            return None
+        handle = self._handles.get(nodeId)
+        if handle is None:
+            handle = self.nodeCls.__new__(self.nodeCls)
+            handle.tree = self
+            handle.id = nodeId
+            self._handles[nodeId] = handle
+        return handle
+
+
+    def _idOf(self, node: object) -> int:
+        """ Returns the id of the given handle, raising an error if it belongs to another tree. """
+        if not isinstance(node, CompactNode) or node.tree is not self:
+            raise ValueError("Compact nodes can only be connected to nodes in the same CompactTree.")
+        return node.id
+
+
+    def _childIds(self, nodeId: int):
+        """ Iterates through the ids of the children of the given node. """
+        child = self._firstChild[nodeId]
+        nextSibling = self._nextSibling
+        while child != NONE:
+            yield child
+            child = nextSibling[child]
+
+
+    def _childAt(self, nodeId: int, row: int) -> int:
+        """ Returns the id of the child at the given row, walking from the nearest end or the last child looked up. """
+        count = self._numChildren[nodeId]
+        if row < 0:
+            row += count
+        if row < 0 or row >= count:
+            raise IndexError("Child index out of range.")
+        cursor = self._cursor
+        if cursor is not None and cursor[0] == nodeId and abs(row - cursor[1]) < min(row, count - 1 - row):
+            child = cursor[2]
+            step = self._nextSibling if row > cursor[1] else self._prevSibling
+            for i in range(abs(row - cursor[1])):
+                child = step[child]
+        elif row < count // 2:
+            child = self._firstChild[nodeId]
+            for i in range(row):
+                child = self._nextSibling[child]
+        else:
+            child = self._lastChild[nodeId]
+            for i in range(count - 1 - row):
+                child = self._prevSibling[child]
+        self._cursor = (nodeId, row, child)
+        return child
+
+
+    def _link(self, nodeId: int, parentId: int, beforeId: int):
+        """ Links a detached node into the children of parentId in front of beforeId (NONE appends). """
+        self._cursor = None
+        self._parent[nodeId] = parentId
+        if beforeId == NONE:
+            prev = self._lastChild[parentId]
+            self._lastChild[parentId] = nodeId
+            self._row[nodeId] = self._numChildren[parentId]
+        else:
+            prev = self._prevSibling[beforeId]
+            self._prevSibling[beforeId] = nodeId
+            self._staleRows.add(parentId)
+        self._prevSibling[nodeId] = prev
+        self._nextSibling[nodeId] = beforeId
+        if prev == NONE:
+            self._firstChild[parentId] = nodeId
+        else:
+            self._nextSibling[prev] = nodeId
+        self._numChildren[parentId] += 1
+
+
+    def _unlink(self, nodeId: int):
+        """ Removes a node from its parent's children, leaving it as a root. """
+        parentId = self._parent[nodeId]
+        if parentId == NONE:
+            return
+        self._cursor = None
+        prev = self._prevSibling[nodeId]
+        nxt = self._nextSibling[nodeId]
+        if prev == NONE:
+            self._firstChild[parentId] = nxt
+        else:
+            self._nextSibling[prev] = nxt
+        if nxt == NONE:
+            self._lastChild[parentId] = prev
+        else:
+            self._prevSibling[nxt] = prev
+            self._staleRows.add(parentId)
+        self._numChildren[parentId] -= 1
+        self._row[nodeId] = NONE
+        self._parent[nodeId] = NONE
+        self._prevSibling[nodeId] = NONE
+        self._nextSibling[nodeId] = NONE
+
+
+    def _renumber(self, parentId: int):
+        """ Updates the stored rows of the children of a node after they were marked as stale. """
+        row = self._row
+        for i, child in enumerate(self._childIds(parentId)):
+            row[child] = i
+        self._staleRows.discard(parentId)
+
+
+    def _updateDepth(self, nodeId: int):
+        """ Recomputes the depth of a node and shifts the depth of its subtree to match. """
+        parentId = self._parent[nodeId]
+        depth = 0 if parentId == NONE else self._depth[parentId] + 1
+        delta = depth - self._depth[nodeId]
+        if delta == 0:
+            return
+        stack = [nodeId]
+        while stack:
+            current = stack.pop()
+            self._depth[current] += delta
+            stack.extend(self._childIds(current))
+
+
+    def _isAncestor(self, ancestorId: int, nodeId: int) -> bool:
+        """ Returns if ancestorId is a strict ancestor of nodeId. """
+        if self._numChildren[ancestorId] == 0:
+            return False
+        steps = self._depth[nodeId] - self._depth[ancestorId]
+        if steps <= 0:
+            return False
+        for i in range(steps):
+            nodeId = self._parent[nodeId]
+        return nodeId == ancestorId
+
+
+    def _move(self, nodeId: int, parentId: int, beforeId: int = NONE):
+        """ Moves a node to a new parent, in front of beforeId, refusing moves that create a loop. """
+        if parentId != NONE and (parentId == nodeId or self._isAncestor(nodeId, parentId)):
+            raise CircularTreeError
+        oldParentId = self._parent[nodeId]
+        self._unlink(nodeId)
+        if parentId != NONE:
+            self._link(nodeId, parentId, beforeId)
+        if parentId != oldParentId:
+            self._updateDepth(nodeId)
+
+
+class CompactNode():
+    """ Thin handle to a node stored in a CompactTree.
+
+    Provides the same tree interface as NodeMixin (parent, children, row, root, depth, iteration and
+    the bulk operations) and the display interface of Node (name, getDisplayData, iconPath and the
+    flags read by TreeModel) so TreeModel can display it. Handles are freed when they aren't referenced,
+    subclasses that need extra per-node data should store it in the tree by id, as the names are.
+    """
+    __slots__ = ('tree', 'id', '__weakref__')
+
+    # Same class attributes as Node, read by TreeModel
+    dragable = True
+    dropable = True
+    suppressed = False
+    default = False
+    columnCount = 1
+
+    def __init__(self, tree: CompactTree = None, parent: object = None):
+        if tree is None:
+            tree = CompactTree(type(self)) if parent is None else parent.tree
+        self.tree = tree
+        self.id = tree.newId(NONE if parent is None else tree._idOf(parent))
+        tree._handles[self.id] = self
+
+
+    def __repr__(self):
+        return "<{} {} of {}>".format(type(self).__name__, self.id, hex(id(self.tree)))
+
+
+    @property
+    def name(self) -> str:
+        """ Returns the name of this node, Node followed by its id until it is given one. """
+        name = self.tree._names.get(self.id)
+        return "Node{:d}".format(self.id) if name is None else name
+
+
+    @name.setter
+    def name(self, value: str):
+        """ Renames this node, names are only stored for the nodes that are given one. """
+        self.tree._names[self.id] = value
+
+
+    def getDisplayData(self, column: int) -> str:
+        """ Returns the display text for the given column of this item, see Node.getDisplayData. """
+        if column == 0:
+            return self.name
+        return ""
+
+
+    def iconPath(self) -> tuple:
+        """ Returns the path to the icon to display on the tree view for this item, see Node.iconPath. """
+        return 'icons', 'test.png'
+
+
+    @property
+    def parent(self) -> object:
+        """ Returns this node's parent in the tree, None if this node is the root. """
+        tree = self.tree
+        return tree.node(tree._parent[self.id])
+
+
+    @parent.setter
+    def parent(self, value: object):
+        """ Changes this nodes's parent to the given node, pass None to remove it from the tree. """
+        tree = self.tree
+        parentId = NONE if value is None else tree._idOf(value)
+        if tree._parent[self.id] != parentId:
+            tree._move(self.id, parentId)
+
+
+    @parent.deleter
+    def parent(self):
+        """ Sets this parents node to None. """
+        self.parent = None
+
+
+    @property
+    def children(self) -> list:
+        """ Returns a new list of the children of this node. """
+        tree = self.tree
+        return [tree.node(child) for child in tree._childIds(self.id)]
+
+
+    @children.setter
+    def children(self, children: list):
+        """ Changes the children of this node to the given list. """
+        children = list(children)
+        self._validateNewChildren(children)
+        del self.children
+        self.attachMany(children)
+
+
+    @children.deleter
+    def children(self):
+        """ Removes all children of this node and sets all children's parents to None. """
+        tree = self.tree
+        for child in list(tree._childIds(self.id)):
+            tree._move(child, NONE)
+
+
+    @property
+    def root(self) -> object:
+        """ Returns the root node of the tree. """
+        tree = self.tree
+        nodeId = self.id
+        parent = tree._parent
+        while parent[nodeId] != NONE:
+            nodeId = parent[nodeId]
+        return tree.node(nodeId)
+
+
+    @property
+    def depth(self) -> int:
+        """ Returns the number of edges between this node and the root, 0 for the root. """
+        return self.tree._depth[self.id]
+
+
+    @property
+    def row(self) -> int:
+        """ Returns the index of this node in its parent's children list, None if the node is the root.
+
+        The rows are stored, the siblings are only walked to renumber them after a change that wasn't an append.
+        """
+        tree = self.tree
+        parentId = tree._parent[self.id]
+        if parentId == NONE:
+            return None
+        if parentId in tree._staleRows:
+            tree._renumber(parentId)
+        return tree._row[self.id]
+
+
+    @row.setter
+    def row(self, value: int):
+        """ Moves this node to a given index within its parent's children list. """
+        tree = self.tree
+        parentId = tree._parent[self.id]
+        if parentId == NONE:
+            return
+        tree._unlink(self.id)
+        count = tree._numChildren[parentId]
+        if value < 0:
+            value = max(value + count, 0)
+        beforeId = NONE if value >= count else tree._childAt(parentId, value)
+        tree._link(self.id, parentId, beforeId)
+
+
+    def isRoot(self) -> bool:
+        """ Returns if this node is the root node. """
+        return self.tree._parent[self.id] == NONE
+
+
+    def numChildren(self) -> int:
+        """ Returns the number of children this node has. """
+        return self.tree._numChildren[self.id]
+
+
+    def childAt(self, row: int) -> object:
+        """ Returns the child at the given row without building the list of children. """
+        tree = self.tree
+        return tree.node(tree._childAt(self.id, row))
+
+
+    def nextSibling(self) -> object:
+        """ Returns the next sibling of this node, wrapping to the first child. None for the root. """
+        tree = self.tree
+        parentId = tree._parent[self.id]
+        if parentId == NONE:
+            return None
+        nxt = tree._nextSibling[self.id]
+        if nxt == NONE:
+            nxt = tree._firstChild[parentId]
+        return tree.node(nxt)
+
+
+    def __iter__(self):
+        """ Iterates through this node's children. """
+        tree = self.tree
+        return (tree.node(child) for child in tree._childIds(self.id))
+
+
+    def isAncestorOf(self, node: object) -> bool:
+        """ Returns if this node is a strict ancestor of the given node. """
+        if not isinstance(node, CompactNode) or node.tree is not self.tree:
+            return False
+        return self.tree._isAncestor(self.id, node.id)
+
+
+    def lowestCommonAncestor(self, node: object) -> object:
+        """ Returns the deepest common ancestor of this node and the given node, None if in different trees. """
+        tree = self.tree
+        if not isinstance(node, CompactNode) or node.tree is not tree:
+            return None
+        a = self.id
+        b = node.id
+        depth = tree._depth
+        parent = tree._parent
+        while depth[a] > depth[b]:
+            a = parent[a]
+        while depth[b] > depth[a]:
+            b = parent[b]
+        while a != b:
+            a = parent[a]
+            b = parent[b]
+            if a == NONE:
+                return None
+        return tree.node(a)
+
+
+    def attachMany(self, children: list, row: int = None):
+        """ Makes the given nodes children of this node, inserted as a block at the given row. """
+        tree = self.tree
+        ids = self._validateNewChildren(children)
+        for child in ids:
+            tree._unlink(child)
+        count = tree._numChildren[self.id]
+        beforeId = NONE if row is None or row >= count else tree._childAt(self.id, row)
+        for child in ids:
+            tree._move(child, self.id, beforeId)
+
+
+    def _validateNewChildren(self, children: list) -> list:
+        """ Raises an error if the given nodes cannot all become children of this node, returns their ids. """
+        tree = self.tree
+        ids = [tree._idOf(child) for child in children]
+        for child in ids:
+            if child == self.id or tree._isAncestor(child, self.id):
+                raise CircularTreeError
+        if len(set(ids)) != len(ids):
+            raise ValueError("A node can only be added to the children of a node once.")
+        return ids
+
+
+    def detachMany(self, children: list):
+        """ Removes the given children of this node from the tree. """
+        tree = self.tree
+        ids = [tree._idOf(child) for child in children]
+        for child in ids:
+            if tree._parent[child] != self.id:
+                raise ValueError("Can only detach the children of this node.")
+        for child in ids:
+            tree._move(child, NONE)
+
+
+    def moveRange(self, start: int, count: int, newParent: object, destRow: int):
+        """ Moves a contiguous range of this node's children to a new parent/row.
+
+        Follows the same convention as NodeMixin.moveRange and QAbstractItemModel.moveRows.
+        """
+        tree = self.tree
+        if count <= 0:
+            return
+        if start < 0 or start + count > tree._numChildren[self.id]:
+            raise IndexError("Range to move is outside of this node's children.")
+        newParentId = tree._idOf(newParent)
+        if newParentId == self.id and start <= destRow <= start + count:
+            return
+        first = tree._childAt(self.id, start)
+        block = [first]
+        for i in range(count - 1):
+            block.append(tree._nextSibling[block[-1]])
+        for child in block:
+            if child == newParentId or tree._isAncestor(child, newParentId):
+                raise CircularTreeError
+        numDest = tree._numChildren[newParentId]
+        beforeId = NONE if destRow >= numDest else tree._childAt(newParentId, destRow)
+        for child in block:
+            tree._move(child, newParentId, beforeId)
+
+
+    def iterSubTree(self, order: str = 'pre', prune: Callable = None, maxDepth: int = None) -> object:
+        """ Iterates through the subtree with this node as the root, see NodeMixin.iterSubTree. """
+        if order not in ('pre', 'post', 'breadth'):
+            raise ValueError("Unknown traversal order '{}'.".format(order))
+        return self._iterSubTree(order, prune, maxDepth)
+
+
+    def _iterSubTree(self, order: str, prune: Callable, maxDepth: int):
+        """ Explicit stack traversal over the node ids of the subtree. """
+        tree = self.tree
+        depth = tree._depth
+        limit = None if maxDepth is None else depth[self.id] + maxDepth
+        node = tree.node
+
+        def expand(nodeId):
+            if tree._numChildren[nodeId] == 0:
+                return False
+            if limit is not None and depth[nodeId] >= limit:
+                return False
+            return prune is None or not prune(node(nodeId))
+
+        if order == 'pre':
+            stack = [self.id]
+            while stack:
+                nodeId = stack.pop()
+                yield node(nodeId)
+                if expand(nodeId):
+                    stack.extend(reversed(list(tree._childIds(nodeId))))
+        elif order == 'post':
+            stack = [(self.id, False)]
+            while stack:
+                nodeId, visited = stack.pop()
+                if visited or not expand(nodeId):
+                    yield node(nodeId)
+                    continue
+                stack.append((nodeId, True))
+                stack.extend((child, False) for child in reversed(list(tree._childIds(nodeId))))
+        elif order == 'breadth':
+            queue = deque([self.id])
+            while queue:
+                nodeId = queue.popleft()
+                yield node(nodeId)
+                if expand(nodeId):
+                    queue.extend(tree._childIds(nodeId))
@@ -0,0 +1,172 @@
+import os
+import sys
+import copy
+import threading
+from collections import OrderedDict
+
+
+class FileCache():
+    """ Least recently used cache of parsed project files shared by every load in the process.
+
+    Stores the tree of each file as a CachedTree, keyed by the absolute path of the file. An entry is
+    only returned while the size and modification time of the file are the ones it had when it was
+    read, so a file changed on disk is parsed again. Files written by FileNode discard their entry as
+    the modification time may not change for quick successive writes. The cached trees are shared and
+    must not be modified.
+
+    A file is cached the first time it is read unless it is larger on disk than the budget, see shouldCache.
+
+    Safe to use from the threads that read nested files.
+
+    Args:
+        maxBytes: Budget of the cache, measured as the estimated memory held by the cached trees,
+            see estimateSize. The least recently used files are evicted once it is exceeded.
+    """
+    def __init__(self, maxBytes: int = 64 << 20):
+        self.maxBytes = maxBytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Absolute path to (stamp, data, size), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def stamp(filename: str) -> tuple:
+        """ Returns the size, modification time and inode that identify the current version of a file, size first. """
+        stat = os.stat(filename)
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+    def get(self, filename: str, stamp: tuple) -> dict:
+        """ Returns the cached tree of a file if it was read from the version identified by stamp, otherwise None. """
+        key = os.path.abspath(filename)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+
+    def shouldCache(self, filename: str, stamp: tuple) -> bool:
+        """ Returns if the tree of the version of a file identified by stamp should be recorded while it is read.
+
+        Files that are larger on disk than the budget are never cached, their tree would be larger still.
+        """
+        return stamp[0] <= self.maxBytes
+
+
+    def put(self, filename: str, stamp: tuple, data, size: int):
+        """ Caches the tree read from the version of a file identified by stamp, see stamp.
+
+        Args:
+            filename: Path of the file.
+            stamp: Version of the file the tree was read from.
+            data: The tree read from the file, a CachedTree.
+            size: Estimate of the memory held by data, counted against maxBytes.
+        """
+        key = os.path.abspath(filename)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            if size > self.maxBytes:
+                return
+            self._entries[key] = (stamp, data, size)
+            self.size += size
+            while self.size > self.maxBytes:
+                evicted = self._entries.popitem(last=False)[1]
+                self.size -= evicted[2]
+
+
+    def discard(self, filename: str):
+        """ Removes the entry of a file, if there is one. """
+        key = os.path.abspath(filename)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+
+
+    def clear(self):
+        """ Removes every entry. """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedTree():
+    """ Compact record of the nodes read from a file, built while the file is parsed.
+
+    Holds the class name and attributes of every node in the order the readers create them, and for
+    each batch of children attached together the index of their parent and their number, the root is
+    node 0. The readers attach the children of a batch right after creating them, so recording them
+    takes a few appends per node rather than a walk of the finished tree.
+    """
+    def __init__(self):
+        self.rootAttributes = None
+        self.classNames = []
+        self.attributes = []
+        # (parent index, number of children) for each batch, in the order they were attached
+        self.batches = []
+        # Indexes in attributes of the nodes with list or dictionary values, the others only need a shallow copy
+        self.deepCopies = set()
+        # Set once the whole file was recorded, a file the readers fail on is read with json.load instead
+        self.complete = False
+        self.size = sys.getsizeof(self)
+        self._names = {}
+
+
+    def setRoot(self, attributes: dict):
+        """ Records the attributes of the root. """
+        self.rootAttributes = copyAttributes(attributes)
+        self.size += estimateSize(self.rootAttributes)
+
+
+    def add(self, className: str, attributes: dict):
+        """ Records a node, its attributes are copied so the node can own the values it was created with. """
+        if any(isinstance(value, (list, dict)) for value in attributes.values()):
+            self.deepCopies.add(len(self.attributes))
+            attributes = copyAttributes(attributes)
+        else:
+            attributes = attributes.copy()
+        self.classNames.append(self._names.setdefault(className, className))
+        self.attributes.append(attributes)
+        # The two list slots and the attributes, the class names are shared
+        self.size += 16 + estimateSize(attributes)
+
+
+    def nodeAttributes(self, index: int) -> dict:
+        """ Returns a copy of the attributes of the node at index, counting from 0 without the root, that a node can own. """
+        attributes = self.attributes[index]
+        if index in self.deepCopies:
+            return copyAttributes(attributes)
+        return attributes.copy()
+
+
+    def addBatch(self, parentIndex: int, count: int):
+        """ Records that the last count nodes added were attached to the node at parentIndex. """
+        self.batches.append((parentIndex, count))
+        self.size += 72
+
+
+def estimateSize(attributes: dict) -> int:
+    """ Returns an estimate of the memory held by attributes, the dictionary and its values but not what they contain. """
+    return sys.getsizeof(attributes) + sum(map(sys.getsizeof, attributes.values()))
+
+
+def copyAttributes(attributes: dict) -> dict:
+    """ Returns a copy of cached attributes that a node can own, only lists and dictionaries are copied deeply. """
+    return {key: copy.deepcopy(value) if isinstance(value, (list, dict)) else value for key, value in attributes.items()}
+
+
+# Cache used by FileNode unless a subclass sets its own
+defaultCache = FileCache()
@@ -1,9 +1,17 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from objectgui.core.tree import NodeMixin
 from objectgui.core.node import Node
 from objectgui.core.defaultNode import DefaultNode
 from objectgui.core.folderNode import FolderNode
+from objectgui.core.jsonReader import JsonTreeReader
+from objectgui.core import binaryFormat
+from objectgui.core import journal
+from objectgui.core.fileCache import defaultCache, copyAttributes, CachedTree
+from objectgui.core.registry import defaultRegistry
+from objectgui.core.signal import Signal
+from objectgui.core.snapshot import SaveSnapshot
 
 
 class FileNode(Node):
@@ -12,14 +20,55 @@ class FileNode(Node):
     Contains the code to convert this node and it's sutree into json and methods
     to build a tree from json. One of these is always the root in the objectGui,
     but they can also be further down in the tree.
+
+    A nested FileNode loaded lazily is a placeholder until its children are needed, they are
+    read from its file the first time children is used or the tree view expands it.
+
+    Once a FileNode has been saved or loaded, changes to its file are appended to a journal next to the
+    file as they happen, so they survive the program stopping. A save only appends a commit line to the
+    journal instead of rewriting the file. Loading replays the committed changes, the ones made after
+    the last save are replayed too when load is asked to recover them. A save rewrites the whole file
+    and removes the journal once it would grow past journalLimit entries.
     """
+    # Emitted with the list of children once they have been read from the file of a placeholder
+    childrenFetched = Signal()
+
     newInstance = 1
     defaultName = "File"
+    savedAttributes = ('filename',)
+    # Size of the write buffer used when streaming a save to disk
+    saveBufferSize = 1 << 20
+    # Files saved with this extension use the binary format instead of json
+    binaryExtension = '.ogb'
+    # Number of threads reading or writing nested files at the same time, 1 does everything on the calling thread
+    maxWorkers = 8
+    # Cache of parsed files shared by the loads of the process, None to always parse the file
+    fileCache = defaultCache
+    # Number of journal entries a file can have before a save rewrites it instead of appending to the journal
+    journalLimit = 1000
+    # Constructors of the classes every file can contain, other classes are registered by dotted path
+    # in nodeRegistry so they are only imported when a file uses them
     classMapping = {
         "Node": Node.fromAttributes,
         "DefaultNode": DefaultNode.fromAttributes,
         "FolderNode": FolderNode.fromAttributes,
     }
+    nodeRegistry = defaultRegistry
+    # Class that loaded this node as a placeholder, None once the children have been read from the file
+    _placeholderLoader = None
+    _fetching = False
+    # The saved file the journaled changes apply to, None when changes aren't recorded and the next save
+    # rewrites the whole file. Number of lines already in its journal and the encoded entries still to append
+    _journalBase = None
+    _journalLength = 0
+    _journalEntries = None
+    # The journal opened for appending, if there are entries in it that no save has committed yet, and if a
+    # save running in the background owns the journal, entries are kept in _journalEntries until it finishes
+    _journalFile = None
+    _journalUncommitted = False
+    _journalWriting = False
+    # Set on placeholders loaded with recover, their unsaved changes are replayed when their file is read
+    _recoverJournal = False
 
     def __init__(self, filename=None, **kwargs):
         self.dragable = False
@@ -27,24 +76,441 @@ class FileNode(Node):
         self.ownFile = True
         self.filename = filename
         super().__init__(**kwargs)
-        self.addAttribute('filename')
     
 
+    @property
+    def children(self) -> list:
+        """ Returns the list of children of this node, reading them from its file if it is a placeholder. """
+        self.fetchChildren()
+        return NodeMixin.children.fget(self)
+
+
+    @children.setter
+    def children(self, children: list):
+        """ Changes the children of this node, the children in the file of a placeholder are never read. """
+        self._placeholderLoader = None
+        NodeMixin.children.fset(self, children)
+
+
+    @children.deleter
+    def children(self):
+        """ Removes all children of this node, the children in the file of a placeholder are never read. """
+        self._placeholderLoader = None
+        NodeMixin.children.fdel(self)
+
+
+    def hasUnfetchedChildren(self) -> bool:
+        """ Returns True if this node is a placeholder whose children haven't been read from its file yet. """
+        return self._placeholderLoader is not None
+
+
+    def fetchChildren(self):
+        """ Reads the children of a placeholder from its file, does nothing if they have already been read. """
+        if self._placeholderLoader is not None:
+            self.attachFetchedChildren(self.readUnfetchedChildren())
+
+
+    def readUnfetchedChildren(self) -> list:
+        """ Reads the children of a placeholder from its file without attaching them.
+
+        The node stops being a placeholder, the children must be passed to attachFetchedChildren.
+        Used by the tree model, which needs to know how many rows will be inserted before they are.
+
+        Returns:
+            children: The children saved in the node's file, files nested in it are placeholders too.
+        """
+        loader = self._placeholderLoader
+        if loader is None:
+            return []
+        self._placeholderLoader = None
+        fileNode, nested = loader._read(self.filename, recover=self._recoverJournal)
+        loader._deferNestedFiles(nested, self._recoverJournal)
+        # Nothing read from the file is an unsaved change, apart from the recovered ones
+        fileNode.markSaved()
+        self._beginJournal(self.filename, fileNode._journalLength, fileNode._journalUncommitted)
+        return list(NodeMixin.children.fget(fileNode))
+
+
+    def attachFetchedChildren(self, children: list):
+        """ Attaches the children read by readUnfetchedChildren in front of any added since the node was loaded. """
+        self._fetching = True
+        try:
+            self.attachMany(children, row=0)
+        finally:
+            self._fetching = False
+        self.childrenFetched.emit(children)
+
+
+    def onChange(self, children: bool = False):
+        """ Marks the files this change is saved in as dirty, see Node.onChange.
+
+        Children added to a placeholder are kept after the ones read from its file.
+        """
+        if self._fetching:
+            return
+        if children and self._placeholderLoader is not None:
+            self.fetchChildren()
+            # The change that made the node read its file happened before it could be journaled
+            self._journalBase = None
+        super().onChange(children)
+
+
+    # Journal
+    # -------------------------------------------------------------------------
+    def isJournaling(self) -> bool:
+        """ Returns True if changes to this node's file are recorded so the next save only appends them to its journal. """
+        return self._journalBase is not None and not self._fetching
+
+
+    def recordAttributes(self, node):
+        """ Records the new attributes of a node saved in this node's file. """
+        self._recordEntry({'op': 'attributes', 'path': self._journalPath(node), 'attributes': node.createSaveData()})
+
+
+    def recordRemoved(self, parent, rows: list):
+        """ Records the removal of the children at the given rows of a node saved in this node's file. """
+        self._recordEntry({'op': 'remove', 'path': self._journalPath(parent), 'rows': rows})
+
+
+    def recordInserted(self, parent, row: int, count: int):
+        """ Records the subtrees of children inserted in a node saved in this node's file. """
+        nodes = []
+        for child in NodeMixin.children.fget(parent)[row:row + count]:
+            data = {}
+            self._saveNode(data, child)
+            nodes.append(data)
+        self._recordEntry({'op': 'insert', 'path': self._journalPath(parent), 'row': row, 'nodes': nodes})
+
+
+    def _recordEntry(self, entry: dict):
+        """ Encodes a journal entry right away so later changes to the values it holds don't alter it, and appends it. """
+        if self._journalEntries is None:
+            self._journalEntries = []
+        self._journalEntries.append(json.dumps(entry))
+        self._flushJournal()
+
+
+    def _flushJournal(self):
+        """ Appends the recorded entries to the journal, unless a save running in the background owns it.
+
+        The entries are flushed to the operating system, which keeps them if the program stops, only a
+        save waits for them to be on the disk.
+        """
+        entries = self._journalEntries
+        if not entries or self._journalWriting or self._journalBase is None:
+            return
+        if self._journalFile is None:
+            self._journalFile = journal.openJournal(self._journalBase)
+        self._journalFile.write(''.join(entry + '\n' for entry in entries))
+        self._journalFile.flush()
+        self._journalLength += len(entries)
+        self._journalUncommitted = True
+        self._journalEntries = []
+
+
+    def _closeJournal(self):
+        """ Closes the journal opened to append entries, before it is removed or replaced. """
+        if self._journalFile is not None:
+            self._journalFile.close()
+            self._journalFile = None
+
+
+    def _journalPath(self, node) -> list:
+        """ Returns the rows leading from this node down to a node saved in its file. """
+        path = []
+        while node is not self:
+            path.append(node.row)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+    def _beginJournal(self, filename: str, length: int, uncommitted: bool = False):
+        """ Starts recording changes to append to the journal of a file that has just been loaded or saved.
+
+        Args:
+            filename: The file the node was loaded from or saved to.
+            length: Number of lines in its journal, None if the journal can't be appended to, in which
+                case changes aren't recorded and the next save rewrites the whole file.
+            uncommitted: If unsaved changes in the journal were recovered, the next save commits them.
+        """
+        self._closeJournal()
+        self._journalEntries = []
+        self._journalLength = length or 0
+        self._journalBase = None if length is None else filename
+        self._journalUncommitted = uncommitted
+        if uncommitted:
+            self.markDirty()
+
+
+    def _takeJournal(self, filename: str) -> list:
+        """ Takes the entries recorded since the last save if saving to filename can just append them to its journal.
+
+        The entries already in the journal are committed by the COMMIT line ending the returned ones.
+
+        Returns:
+            entries: The encoded lines to append, empty if nothing changed, None if the whole file has to be
+                written because it is a different file, changes weren't recorded, or the journal would grow
+                past journalLimit. The journal is then closed as the save removes it.
+        """
+        entries = self._journalEntries
+        self._journalEntries = []
+        if (self._journalBase != filename or entries is None or not os.path.exists(filename)
+                or self._journalLength + len(entries) > self.journalLimit):
+            self._closeJournal()
+            return None
+        if entries or self._journalUncommitted:
+            entries.append(journal.COMMIT)
+            self._journalUncommitted = False
+        return entries
+
+
+    def _journalSaved(self, filename: str, appended: int, changed: bool):
+        """ Updates the journal state once a save taken with _takeJournal has been written.
+
+        Args:
+            filename: The file that was saved.
+            appended: Number of lines appended to its journal, None if the whole file was written.
+            changed: If the file changed while it was being written, only possible for saves in the background.
+        """
+        self._journalWriting = False
+        if appended is not None:
+            self._journalLength += appended
+        else:
+            self._journalLength = 0
+            # Changes made during the save are only on top of what was written if they were recorded
+            if self._journalBase is not None or not changed:
+                self._journalBase = filename
+        # Changes recorded while a background save owned the journal
+        self._flushJournal()
+
+
     # TODO should the type hint be string or path-like?
     def save(self, filename: str):
         """ Encodes the FileNode and its subtree to json and saves the json to disk. 
+
+        The json is streamed to the file as the tree is walked, so the dictionary representation
+        of the whole tree is never built. The output is identical to json.dump(self._buildSaveDict()).
+        
+        Filenames ending in binaryExtension are saved in the binary format instead.
+
+        Nested nodes that own a file are saved to their own file if it changed since it was saved,
+        the files are written on up to maxWorkers threads.
         
         Args:
             filename: The filename to save the the json to.
         """
         if not os.path.exists(os.path.dirname(filename)):
             return False
-        data = self._buildSaveDict()
-        with open(filename, 'w') as f:
-            json.dump(data, f)
+        written, searched = self._nestedFilesToSave()
+        files = [(self, filename)] + [(node, node.filename) for node in written]
+        # Placeholders are read here rather than by the threads writing them
+        for node, name in files:
+            node.fetchChildren()
+        self._mapFiles(lambda entry: entry[0]._writeFile(entry[1]), files)
+        # Only clear the flags once every file has been written
+        for node in [self] + written + searched:
+            node.dirty = False
+            node.nestedDirty = False
         return True
 
 
+    def takeSnapshot(self, filename: str) -> SaveSnapshot:
+        """ Captures the data of this FileNode and of its changed nested files so they can be saved in the background.
+
+        Only the nodes are read here, serializing and writing happen in SaveSnapshot.write which can run
+        on another thread while the tree keeps changing.
+
+        Args:
+            filename: The filename to save this FileNode to.
+
+        Returns:
+            snapshot: The data to pass to a background writer, see SaveSnapshot.
+        """
+        written, searched = self._nestedFilesToSave()
+        snapshot = SaveSnapshot()
+        for node, name in [(self, filename)] + [(node, node.filename) for node in written]:
+            node.fetchChildren()
+            snapshot.addFile(node, name, os.path.splitext(name)[1] == self.binaryExtension)
+        for node in searched:
+            snapshot.addSearched(node)
+        return snapshot
+
+
+    def _writeFile(self, filename: str):
+        """ Writes this node and its subtree, down to the nested nodes that own a file, to filename. 
+
+        Only the changes recorded since the last save are appended to the file's journal when possible.
+        
+        Args:
+            filename: The file to write, the format is chosen from its extension.
+        """
+        entries = self._takeJournal(filename)
+        if entries is not None:
+            if entries:
+                journal.appendJournal(filename, entries)
+            self._journalSaved(filename, len(entries), False)
+            return
+        if os.path.splitext(filename)[1] == self.binaryExtension:
+            writer = binaryFormat.BinaryTreeWriter()
+            self._writeBinaryNode(writer, self)
+            with open(filename, 'wb') as f:
+                f.write(writer.getvalue())
+        else:
+            with open(filename, 'w', buffering=self.saveBufferSize) as f:
+                self._writeNode(f, self)
+        if self.fileCache is not None:
+            self.fileCache.discard(filename)
+        journal.removeJournal(filename)
+        self._journalSaved(filename, None, False)
+
+
+    def markSaved(self):
+        """ Clears the unsaved change flags of this node and of every file nested below it. """
+        for node in self.iterSubTree():
+            if node.ownFile:
+                node.dirty = False
+                node.nestedDirty = False
+
+
+    def _nestedFilesToSave(self):
+        """ Finds the nested files that need to be written, skipping the ones that haven't changed since they were saved.
+
+        Returns:
+            written: Nested nodes that own a file that changed or doesn't exist.
+            searched: Nested nodes whose own file is unchanged but that have changed files nested below them.
+        """
+        written = []
+        searched = []
+        stack = [self]
+        while stack:
+            owner = stack.pop()
+            isNested = lambda n, owner=owner: n.ownFile and n is not owner
+            for node in owner.iterSubTree(prune=isNested):
+                if not isNested(node) or getattr(node, 'filename', None) is None:
+                    continue
+                if node.dirty or not os.path.exists(node.filename):
+                    written.append(node)
+                    stack.append(node)
+                elif node.nestedDirty:
+                    searched.append(node)
+                    stack.append(node)
+        return written, searched
+
+
+    @classmethod
+    def _mapFiles(cls, function, items: list) -> list:
+        """ Calls function on every item on up to maxWorkers threads.
+        
+        Returns:
+            results: The return values in the same order as items.
+        """
+        if cls.maxWorkers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(cls.maxWorkers, len(items))) as pool:
+            return list(pool.map(function, items))
+
+
+    def _writeNode(self, f, node):
+        """ Writes the json encoding of node and its subtree to the file f.
+
+        Produces the same text as json.dump of the dictionary built by _saveNode, one node at a time.
+        The subtrees of nested nodes that own a file are left out because they are saved in their own file.
+
+        Args:
+            f: A writable text file.
+            node: An object that inherits from the Node class an represents a node in a tree.
+        """
+        self._writeRecords(f, self._iterSaveRecords(node))
+
+
+    def _writeBinaryNode(self, writer, node):
+        """ Writes node and its subtree to a binary format writer.
+
+        The subtrees of nested nodes that own a file are left out, the same as in _writeNode.
+
+        Args:
+            writer: A BinaryTreeWriter.
+            node: An object that inherits from the Node class an represents a node in a tree.
+        """
+        self._writeBinaryRecords(writer, self._iterSaveRecords(node))
+
+
+    def _iterSaveRecords(self, node):
+        """ Yields (class name, saved attributes, number of children) for node and its subtree in depth first order.
+
+        The subtrees of nested nodes that own a file are left out and counted as having no children.
+
+        Args:
+            node: An object that inherits from the Node class an represents a node in a tree.
+        """
+        isNested = lambda n: n.ownFile and n is not self
+        # Each entry is the iterator over the children of an open node
+        stack = [iter((node,))]
+        while stack:
+            current = next(stack[-1], None)
+            if current is None:
+                stack.pop()
+                continue
+            children = () if isNested(current) else current.children
+            yield type(current).__name__, current.createSaveData(), len(children)
+            if children:
+                stack.append(iter(children))
+
+
+    @staticmethod
+    def _writeRecords(f, records):
+        """ Writes the json encoding of a tree given as the records of _iterSaveRecords to the file f.
+
+        Only reads the records, so a list of them captured from the tree can be written on another thread.
+
+        Args:
+            f: A writable text file.
+            records: (class name, attributes, number of children) of every node in depth first order.
+        """
+        dumps = json.dumps
+        write = f.write
+        # Number of children still to write of each open node
+        remaining = []
+        for className, attributes, numChildren in records:
+            write('{"attributes": ')
+            write(dumps(attributes))
+            write(', "class": ')
+            write(dumps(className))
+            write(', "children": [')
+            if numChildren:
+                remaining.append(numChildren)
+                continue
+            write(']}')
+            while remaining:
+                remaining[-1] -= 1
+                if remaining[-1]:
+                    write(', ')
+                    break
+                remaining.pop()
+                write(']}')
+
+
+    @staticmethod
+    def _writeBinaryRecords(writer, records):
+        """ Writes a tree given as the records of _iterSaveRecords to a binary format writer, see _writeRecords. """
+        beginNode = writer.beginNode
+        endNode = writer.endNode
+        remaining = []
+        for className, attributes, numChildren in records:
+            beginNode(className, attributes)
+            if numChildren:
+                remaining.append(numChildren)
+                continue
+            endNode()
+            while remaining:
+                remaining[-1] -= 1
+                if remaining[-1]:
+                    break
+                remaining.pop()
+                endNode()
+
+
     def _buildSaveDict(self):
         """ Encodes this FileNode's subtree into a dictionary structure. 
         
@@ -57,9 +523,9 @@ class FileNode(Node):
 
 
     def _saveNode(self, data, node):
-        """ Saves the information of a given node and its children in a dictionary format for saving to disk.
+        """ Saves the information of a given node and its subtree in a dictionary format for saving to disk.
         
-        Recursively calls itself on node's children to encode an entire tree in a dicitonary.
+        Walks node's subtree with an explicit stack to encode an entire tree in a dicitonary.
         If one of the child nodes is a FileNode, it is not encoded in the dictionary because
         it has its own file.
 
@@ -67,66 +533,333 @@ class FileNode(Node):
             data: A dictionary that stores the saved information of a node and its children.
             node: An object that inherits from the Node class an represents a node in a tree.
         """
-        data['attributes'] = node.createSaveData()
-        data['class'] = type(node).__name__
-        data['children'] = []
-        if len(node.children) > 0 and (not node.ownFile or node == self):
-            for child in node.children:
-                childData = {}
-                data['children'].append(childData)
-                self._saveNode(childData, child)
-        elif node.ownFile and node.filename is not None:
-            node.save(node.filename)
+        # Nested nodes that own a file are saved to their own file, so don't descend into them
+        prune = lambda n: n.ownFile and n is not self
+        childrenData = {}
+        for n in node.iterSubTree(prune=prune):
+            nodeData = data if n is node else {}
+            nodeData['attributes'] = n.createSaveData()
+            nodeData['class'] = type(n).__name__
+            nodeData['children'] = []
+            if n is not node:
+                childrenData[id(n.parent)].append(nodeData)
+            if not prune(n) and n.children:
+                childrenData[id(n)] = nodeData['children']
 
 
     @classmethod
-    def load(cls, filename):
+    def load(cls, filename, progress=None, lazy=False, recover=False):
         """ Constructs an FileNode from a given filename. 
+
+        The file is read incrementally and each node is created as soon as it has been read,
+        if the file isn't laid out the way save writes it, the whole file is parsed with json.load instead.
+        
+        Binary project files are recognised by their header and read with the binary format reader.
         
         Args:
             filename: The path to the JSON file containing the serialized FileNode object.
+            progress: Optional function called with the number of bytes read so far.
+            lazy: If True, nested FileNodes are placeholders whose files are only read when their
+                children are needed, otherwise every nested file is read now.
+            recover: If True, the changes left in the journals by a program that stopped before saving
+                them are replayed too and their files are marked as changed, see hasRecoverableChanges.
         
         Returns:
             FileNode: A new FileNode object constructed from the data in the specified JSON file.
         """
+        fileNode, nested = cls._read(filename, progress, recover)
+        if lazy:
+            cls._deferNestedFiles(nested, recover)
+        else:
+            cls._loadNestedFiles(nested, recover)
+        # Building the tree marked every file as changed, nothing has changed since it was loaded
+        fileNode.markSaved()
+        fileNode._beginJournal(filename, fileNode._journalLength, fileNode._journalUncommitted)
+        if recover:
+            # Apart from the recovered changes, markSaved cleared those of the nested files
+            for node in fileNode.iterSubTree():
+                if node is not fileNode and getattr(node, '_journalUncommitted', False):
+                    node.markDirty()
+        return fileNode
+
+
+    @staticmethod
+    def hasRecoverableChanges(filename: str) -> bool:
+        """ Returns True if the journal of a file has changes made after it was last saved, see load. """
+        return bool(journal.readJournal(filename)[1])
+
+
+    @classmethod
+    def _read(cls, filename, progress=None, recover=False):
+        """ Builds the tree saved in a file in either format without reading the files nested in it, see load.
+
+        The saved changes in the file's journal are replayed on the tree, and the unsaved ones if recover is
+        set. The number of lines in the journal is left in the root's _journalLength, None if the journal can't
+        be appended to, which is also the case if it has unsaved changes that aren't recovered.
+        
+        Returns:
+            fileNode: The root of the tree saved in the file.
+            nested: The nodes of the tree that own a file, their children still need to be read from it.
+        """
+        nested = []
+        fileNode = cls._readTree(filename, progress, nested)
+        entries, uncommitted, length = journal.readJournal(filename)
+        if recover:
+            entries = entries + uncommitted
+        elif uncommitted:
+            # The next save would commit them
+            length = None
+        try:
+            for entry in entries:
+                cls._applyJournalEntry(fileNode, entry, nested)
+        except (KeyError, IndexError, TypeError):
+            length = None
+        fileNode._journalLength = length
+        fileNode._journalUncommitted = recover and bool(uncommitted)
+        if entries:
+            # Nodes removed by the journal don't need their file read
+            nested = [item for item in nested if item.root is fileNode]
+        return fileNode, nested
+
+
+    @classmethod
+    def _applyJournalEntry(cls, fileNode, entry: dict, nested: list):
+        """ Applies one change recorded by recordAttributes, recordRemoved or recordInserted to a tree read from a file.
+
+        Args:
+            fileNode: The root of the tree.
+            entry: The decoded journal entry.
+            nested: List the created nodes that own a file are appended to, their file isn't read.
+        """
+        node = fileNode
+        for row in entry['path']:
+            node = node.children[row]
+        op = entry['op']
+        if op == 'attributes':
+            node.updateAttributes(entry['attributes'])
+        elif op == 'remove':
+            children = node.children
+            node.detachMany([children[row] for row in entry['rows']])
+        elif op == 'insert':
+            items = [cls._createClass(data['class'], data['attributes']) for data in entry['nodes']]
+            node.attachMany(items, row=entry['row'])
+            for item, data in zip(items, entry['nodes']):
+                if item.ownFile:
+                    nested.append(item)
+                cls._createNodes(data['children'], item, nested)
+        else:
+            raise KeyError(op)
+
+
+    @classmethod
+    def _readTree(cls, filename, progress, nested: list):
+        """ Builds the tree saved in a file, appending the nodes that own a file to nested.
+
+        If the file hasn't changed since it was last read, the tree is built from fileCache without parsing it.
+        Otherwise its nodes are recorded for fileCache as they are read, see FileCache.shouldCache.
+        """
+        cache = cls.fileCache
+        if cache is None:
+            return cls._parseFile(filename, progress, nested)
+        stamp = cache.stamp(filename)
+        tree = cache.get(filename, stamp)
+        if tree is not None:
+            if progress is not None:
+                progress(stamp[0])
+            return cls._createCachedNodes(tree, nested)
+        if not cache.shouldCache(filename, stamp):
+            return cls._parseFile(filename, progress, nested)
+        tree = CachedTree()
+        fileNode = cls._parseFile(filename, progress, nested, tree)
+        if tree.complete:
+            cache.put(filename, stamp, tree, tree.size)
+        return fileNode
+
+
+    @classmethod
+    def _createCachedNodes(cls, tree: CachedTree, nested: list):
+        """ Builds a tree recorded by _parseFile, the nodes get copies of the cached attributes. """
+        fileNode = cls.fromAttributes(copyAttributes(tree.rootAttributes))
+        nodes = [fileNode]
+        classNames = tree.classNames
+        nodeAttributes = tree.nodeAttributes
+        start = 0
+        for parentIndex, count in tree.batches:
+            end = start + count
+            items = [cls._createClass(classNames[i], nodeAttributes(i)) for i in range(start, end)]
+            nodes[parentIndex].attachMany(items)
+            nodes.extend(items)
+            start = end
+        nested.extend(item for item in nodes[1:] if item.ownFile)
+        return fileNode
+
+
+    @classmethod
+    def _parseFile(cls, filename, progress, nested: list, tree: CachedTree = None):
+        """ Parses a file in either format and builds its tree, appending the nodes that own a file to nested.
+
+        If tree is given, the nodes are recorded in it as they are created, see CachedTree.
+        """
+        createRoot = cls.fromAttributes
+        createNode = lambda clsType, attributes, parent: cls._createStreamedNode(clsType, attributes, parent, nested, False)
+        attachChildren = lambda parent, children: parent.attachMany(children)
+        if tree is not None:
+            createRoot, createNode, attachChildren = cls._recordingFunctions(tree, createRoot, createNode, attachChildren)
+        if binaryFormat.isBinaryFile(filename):
+            with open(filename, 'rb') as f:
+                data = f.read()
+            if progress is not None:
+                progress(len(data))
+            reader = binaryFormat.BinaryTreeReader(data)
+            fileNode = reader.read(createRoot, createNode, attachChildren)
+            if tree is not None:
+                tree.complete = True
+            return fileNode
+
+        try:
+            with open(filename, 'rb') as f:
+                reader = JsonTreeReader(f, progress)
+                fileNode = reader.read(createRoot, createNode, attachChildren)
+            if tree is not None:
+                tree.complete = True
+            return fileNode
+        except ValueError:
+            nested.clear()
+
         with open(filename, 'r') as f:
             data = json.load(f)
         
         fileNode = cls.fromAttributes(data['attributes'])
-        for child in data['children']:
-            fileNode._createNode(child, fileNode)
+        fileNode._createNodes(data['children'], fileNode, nested)
         return fileNode
 
 
+    @staticmethod
+    def _recordingFunctions(tree: CachedTree, createRoot, createNode, attachChildren) -> tuple:
+        """ Returns the functions given to the readers wrapped to record the nodes in tree. """
+        # Index of each node in tree, keyed by id
+        indexes = {}
+
+        def recordRoot(attributes):
+            tree.setRoot(attributes)
+            root = createRoot(attributes)
+            indexes[id(root)] = 0
+            return root
+
+        def recordNode(clsType, attributes, parent):
+            tree.add(clsType, attributes)
+            item = createNode(clsType, attributes, parent)
+            indexes[id(item)] = len(tree.attributes)
+            return item
+
+        def recordBatch(parent, children):
+            tree.addBatch(indexes[id(parent)], len(children))
+            attachChildren(parent, children)
+
+        return recordRoot, recordNode, recordBatch
+
+
+    @classmethod
+    def _createStreamedNode(cls, clsType: str, attributes: dict, parent, nested: list = None, attach: bool = True):
+        """ Creates a node read by the streaming reader and attaches it to its parent.
+        
+        Nodes that own a file are appended to nested so their file can be read afterwards. If attach
+        is False the node isn't attached, the reader attaches the children of each node in one batch.
+        """
+        # _createClass inlined, this is called for every node of the file
+        constructor = cls.classMapping.get(clsType)
+        if constructor is None:
+            constructor = cls.nodeRegistry.constructor(clsType)
+        item = constructor(attributes)
+        if attach:
+            item.parent = parent
+        if item.ownFile and nested is not None:
+            nested.append(item)
+        return item
+
+
+    @classmethod
+    def _deferNestedFiles(cls, items: list, recover: bool = False):
+        """ Makes nested FileNodes placeholders that read their file when it is needed.
+
+        Other nodes that own a file can't be placeholders, their files are read now.
+
+        Args:
+            items: Nodes with ownFile set, nothing is loaded for the ones without a filename.
+            recover: If the unsaved changes in the journals are replayed when the files are read, see load.
+        """
+        eager = []
+        for item in items:
+            if isinstance(item, FileNode) and item.filename is not None:
+                item._placeholderLoader = cls
+                if recover:
+                    item._recoverJournal = True
+            else:
+                eager.append(item)
+        cls._loadNestedFiles(eager, recover)
+
+
     @classmethod
-    def _createNode(cls, data: dict, parent):
-        """ Recursively creates a new node in a FileNode tree from a dictionary.
+    def _loadNestedFiles(cls, items: list, recover: bool = False):
+        """ Reads the files of nested nodes that own a file and moves the children saved in them into the nodes.
+
+        The files are read and parsed on up to maxWorkers threads, the children are attached on the
+        calling thread in the order of items. Files nested in those files are read in the next round.
 
         Args:
-            data: A dictionary representing the node to be constructed.
-            parent: A reference to the new nodes parent node.
+            items: Nodes with ownFile set, nothing is loaded for the ones without a filename.
+            recover: If the unsaved changes in the journals are replayed, see load.
         """
-        attributes = data['attributes']
-        clsType = data['class']
-        item = cls._createClass(clsType, attributes)
-        item.parent = parent
-        if item.ownFile:
-            item.load(attributes['filename'])
-        for child in data['children']:
-            cls._createNode(child, item)
+        hasFile = lambda item: getattr(item, 'filename', None) is not None
+        items = [item for item in items if hasFile(item)]
+        while items:
+            results = cls._mapFiles(lambda item: cls._read(item.filename, recover=recover), items)
+            found = []
+            for item, (nested, nestedItems) in zip(items, results):
+                item.attachMany(list(nested.children))
+                if isinstance(item, FileNode):
+                    item._beginJournal(item.filename, nested._journalLength, nested._journalUncommitted)
+                found.extend(nestedItems)
+            items = [item for item in found if hasFile(item)]
+
+
+    @classmethod
+    def _createNodes(cls, childrenData: list, parent, nested: list):
+        """ Creates the nodes of a FileNode tree from their dictionaries.
+
+        Each parent's children are constructed first and then attached in one batch,
+        the tree is built top down with an explicit stack so depth is not limited by recursion.
+
+        Args:
+            childrenData: A list of dictionaries representing the children to construct.
+            parent: A reference to the new nodes' parent node.
+            nested: List the created nodes that own a file are appended to, their file isn't read.
+        """
+        stack = [(childrenData, parent)]
+        while stack:
+            childrenData, parent = stack.pop()
+            items = []
+            for data in childrenData:
+                attributes = data['attributes']
+                item = cls._createClass(data['class'], attributes)
+                items.append(item)
+            parent.attachMany(items)
+            for item, data in zip(items, childrenData):
+                if item.ownFile:
+                    nested.append(item)
+                if data['children']:
+                    stack.append((data['children'], item))
 
 
     @classmethod
     def _createClass(cls, clsType, attributes):
         """ Map the class names onto constructors.
         
-        Subclasses need to implement this to correctly load data.
-        """
-        return cls.classMapping[clsType](attributes)
-        if clsType == "Node":
-            return Node.fromAttributes(attributes)
-        if clsType == "DefaultNode":
-            return DefaultNode.fromAttributes(attributes)
-        if clsType == "FolderNode":
-            return FolderNode.fromAttributes(attributes)
+        The classes in classMapping are used first, any other class name is looked up in nodeRegistry
+        which imports the class the first time it is needed.
+        """
+        constructor = cls.classMapping.get(clsType)
+        if constructor is None:
+            constructor = cls.nodeRegistry.constructor(clsType)
+        return constructor(attributes)
     
@@ -6,6 +6,13 @@ class FolderNode(Node):
         super().__init__(**kwargs)
     
 
+    def getDisplayData(self, column: int) -> str:
+        """ Shows the number of nodes in the folder in the second column. """
+        if column == 1:
+            return str(self.numDescendants())
+        return super().getDisplayData(column)
+
+
     def iconPath(self):
         # The icon function is defined here to change the icon
         location = 'icons'
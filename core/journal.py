@@ -0,0 +1,94 @@
+import os
+import json
+
+
+# The journal of a project file is kept next to it with this suffix added to the filename
+SUFFIX = '.journal'
+# Appended by a save, the entries before it are part of the saved file, the ones after it are unsaved edits
+COMMIT = json.dumps({'op': 'commit'})
+
+
+def journalFilename(filename: str) -> str:
+    """ Returns the filename of the journal of the given project file. """
+    return filename + SUFFIX
+
+
+def _baseStamp(filename: str) -> dict:
+    """ Returns the size and modification time that identify the saved file a journal applies to. """
+    stat = os.stat(filename)
+    return {'op': 'base', 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def appendJournal(filename: str, lines: list):
+    """ Appends encoded entries to the journal of a project file, creating it if needed.
+
+    A new journal starts with a line identifying the saved file so it is ignored if that file
+    is later replaced without the journal being removed.
+
+    Args:
+        filename: The project file the entries apply to.
+        lines: Entries already encoded as json, without line endings.
+    """
+    name = journalFilename(filename)
+    with open(name, 'a') as f:
+        if f.tell() == 0:
+            f.write(json.dumps(_baseStamp(filename)) + '\n')
+        for line in lines:
+            f.write(line + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def openJournal(filename: str):
+    """ Opens the journal of a project file to append entries as they are made, creating it if needed.
+
+    Returns:
+        f: The journal opened for appending text, entries written to it must end with a line ending.
+    """
+    f = open(journalFilename(filename), 'a')
+    if f.tell() == 0:
+        f.write(json.dumps(_baseStamp(filename)) + '\n')
+        f.flush()
+    return f
+
+
+def removeJournal(filename: str):
+    """ Removes the journal of a project file after the whole file has been saved. """
+    name = journalFilename(filename)
+    if os.path.exists(name):
+        os.remove(name)
+
+
+def readJournal(filename: str):
+    """ Reads the entries of the journal of a project file.
+
+    Returns:
+        entries: The decoded entries saved with COMMIT, in the order they were made, empty if there is no usable journal.
+        uncommitted: The entries made after the last COMMIT, edits that weren't saved before the program stopped.
+        length: Number of lines after the first one, None if the journal can't be appended to, because it
+            belongs to a previous version of the file or its last line was cut short.
+    """
+    name = journalFilename(filename)
+    if not os.path.exists(name):
+        return [], [], 0
+    entries = []
+    uncommitted = []
+    with open(name, 'r') as f:
+        lines = f.read().split('\n')
+    try:
+        base = json.loads(lines[0])
+    except ValueError:
+        return [], [], None
+    if base != _baseStamp(filename):
+        return [], [], None
+    # Every line ends with a line ending, anything after the last one was being written during a crash
+    for line in lines[1:-1]:
+        if line == COMMIT:
+            entries.extend(uncommitted)
+            uncommitted = []
+            continue
+        try:
+            uncommitted.append(json.loads(line))
+        except ValueError:
+            return entries, uncommitted, None
+    return entries, uncommitted, len(lines) - 2 if lines[-1] == '' else None
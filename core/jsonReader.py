@@ -0,0 +1,291 @@
+import re
+import json
+import codecs
+from typing import Callable
+
+
+# Stands in for the parent of the outermost object of the file
+_ROOT = object()
+
+# The start of a child node up to its attributes and what follows them, as FileNode.save writes them
+_FIRST_NODE = re.compile(r'\s*\{\s*"attributes"\s*:\s*')
+_NEXT_NODE = re.compile(r'\s*,\s*\{\s*"attributes"\s*:\s*')
+_NODE_CLASS = re.compile(r'\s*,\s*"class"\s*:\s*"([^"\\]*)"\s*,\s*"children"\s*:\s*\[\s*(\]\s*\})?')
+# The comma in front of a child node that isn't the first
+_NEXT_CHILD = re.compile(r'\s*,\s*(?=\{)')
+
+# First characters of the json values that may continue past the end of the buffer without being a decode error
+_OPEN_ENDED = frozenset('-0123456789tfn')
+
+
+class UnsupportedLayoutError(ValueError):
+    """ Raised when the json is valid but not laid out the way the streaming reader expects. """
+
+
+class JsonTreeReader():
+    """ Incremental reader for the json format written by FileNode.save.
+
+    Reads the file in chunks and creates each node as soon as its 'attributes' and 'class' have
+    been read, without ever holding the dictionary of the whole file. Nodes found whole in the current
+    chunk are decoded with their subtree by the json scanner, so most of the file is parsed in C like
+    json.load, see _readChildren. The reader only understands
+    files where 'attributes' and 'class' come before 'children' in every node, which is how
+    FileNode.save writes them. Anything else raises a ValueError (json.JSONDecodeError for broken
+    json, UnsupportedLayoutError for a different layout) so the caller can fall back to json.load.
+
+    Args:
+        f: File opened in binary mode.
+        progress: Optional function called with the number of bytes read so far after each chunk.
+        chunkSize: Number of bytes to read at a time.
+    """
+    # Number of children that fail to decode whole, cut off by the end of the buffer, before no more are tried until the next chunk
+    maxMisses = 4
+
+    def __init__(self, f, progress: Callable = None, chunkSize: int = 1 << 16):
+        self.f = f
+        self.progress = progress
+        self.chunkSize = chunkSize
+        self.bytesRead = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        decoder = json.JSONDecoder()
+        self._rawDecode = decoder.raw_decode
+        # raw_decode without its python wrapper, raises StopIteration when there is no value to decode
+        self._scanOnce = decoder.scan_once
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        # Number of bytes read at once to complete a value cut off by the end of the buffer, see _value
+        self._fillSize = chunkSize
+        self._misses = 0
+
+
+    def read(self, createRoot: Callable, createNode: Callable, attachChildren: Callable = None) -> object:
+        """ Reads the whole file, creating the nodes as they are found, and returns the root node.
+
+        Args:
+            createRoot: Function called with the root's attributes, returns the root node.
+            createNode: Function called with (className, attributes, parent), creates the node,
+                attaches it to parent and returns it.
+            attachChildren: Optional function called with (parent, children) to attach new children
+                after the children parent already has, createNode then only creates the node. The
+                children decoded together are attached in one batch, parents before their children.
+        """
+        # Each frame is [parent, node, attributes, className, firstMember, inChildren, firstChild]
+        self._expect('{')
+        stack = [[_ROOT, None, None, None, True, False, True]]
+        root = None
+        while stack:
+            frame = stack[-1]
+            if frame[5]:
+                if self._readChildren(frame, stack, createNode, attachChildren):
+                    continue
+                char = self._peek()
+                if char == ']':
+                    self._pos += 1
+                    frame[5] = False
+                    frame[4] = False
+                    continue
+                if not frame[6]:
+                    self._expect(',')
+                self._expect('{')
+                frame[6] = False
+                stack.append([frame[1], None, None, None, True, False, True])
+                continue
+
+            char = self._peek()
+            if char == '}':
+                self._pos += 1
+                if frame[1] is None:
+                    self._create(frame, createRoot, createNode, attachChildren)
+                stack.pop()
+                if not stack:
+                    root = frame[1]
+                continue
+            if not frame[4]:
+                self._expect(',')
+            key = self._value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", self._buffer, self._pos)
+            self._expect(':')
+            if key == 'attributes':
+                frame[2] = self._value()
+            elif key == 'class':
+                frame[3] = self._value()
+            elif key == 'children':
+                if frame[1] is None:
+                    self._create(frame, createRoot, createNode, attachChildren)
+                self._expect('[')
+                frame[5] = True
+                frame[6] = True
+                continue
+            else:
+                self._value()
+            frame[4] = False
+        if self._peek(allowEnd=True) is not None:
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+        return root
+
+
+    def _readChildren(self, frame: list, stack: list, createNode: Callable, attachChildren: Callable) -> bool:
+        """ Reads the next children of a frame laid out the way FileNode.save writes them, without going through _peek and _value.
+
+        Children after the first are decoded whole with the json scanner, with their subtree, as long as
+        they fit in the buffer. A child that doesn't fit is read up to its children like the first child,
+        its frame is pushed on the stack so its children are read next. The first child of a frame is
+        never decoded whole, it is the one whose subtree reaches the end of the buffer in deep trees,
+        decoding it would scan the rest of the buffer once per level.
+
+        Returns False when no child was read because the next one is cut off by the end of the buffer or
+        laid out differently, read then continues member by member.
+        """
+        buffer = self._buffer
+        parent = frame[1]
+        pos = self._pos
+        read = False
+        if not frame[6]:
+            scanOnce = self._scanOnce
+            decoded = []
+            while self._misses < self.maxMisses:
+                match = _NEXT_CHILD.match(buffer, pos)
+                if match is None:
+                    break
+                try:
+                    data, pos = scanOnce(buffer, match.end())
+                except (StopIteration, ValueError, RecursionError):
+                    self._misses += 1
+                    break
+                decoded.append(data)
+            if decoded:
+                self._createNodes(decoded, parent, createNode, attachChildren)
+                read = True
+
+        match = (_FIRST_NODE if frame[6] else _NEXT_NODE).match(buffer, pos)
+        if match is not None:
+            try:
+                attributes, end = self._scanOnce(buffer, match.end())
+            except (StopIteration, ValueError):
+                attributes = None
+            match = _NODE_CLASS.match(buffer, end) if isinstance(attributes, dict) else None
+            if match is not None:
+                className, leaf = match.groups()
+                item = createNode(className, attributes, parent)
+                if attachChildren is not None:
+                    attachChildren(parent, [item])
+                if leaf is None:
+                    stack.append([parent, item, attributes, className, False, True, True])
+                pos = match.end()
+                read = True
+        if read:
+            frame[6] = False
+            self._pos = pos
+        return read
+
+
+    def _createNodes(self, childrenData: list, parent, createNode: Callable, attachChildren: Callable):
+        """ Creates the nodes decoded whole and their subtrees.
+
+        Like FileNode._createNodes, the children of a node are all created and then attached in one batch,
+        the tree is built top down so attaching never updates the depth of a subtree.
+        """
+        stack = [(childrenData, parent)]
+        while stack:
+            childrenData, parent = stack.pop()
+            items = []
+            for data in childrenData:
+                try:
+                    attributes = data['attributes']
+                    className = data['class']
+                except (KeyError, TypeError):
+                    raise UnsupportedLayoutError("A node is missing its attributes or class.") from None
+                if type(attributes) is not dict:
+                    raise UnsupportedLayoutError("The attributes of a node aren't a json object.")
+                item = createNode(className, attributes, parent)
+                items.append(item)
+                children = data.get('children')
+                if children:
+                    stack.append((children, item))
+            if attachChildren is not None:
+                attachChildren(parent, items)
+
+
+    def _create(self, frame: list, createRoot: Callable, createNode: Callable, attachChildren: Callable):
+        """ Creates the node described by a frame once its attributes and class are known. """
+        parent = frame[0]
+        attributes = frame[2]
+        className = frame[3]
+        if not isinstance(attributes, dict) or (parent is not _ROOT and className is None):
+            raise UnsupportedLayoutError("Node children were found before its attributes and class.")
+        if parent is _ROOT:
+            frame[1] = createRoot(attributes)
+        else:
+            frame[1] = createNode(className, attributes, parent)
+            if attachChildren is not None:
+                attachChildren(parent, [frame[1]])
+
+
+    def _fill(self, size: int = None) -> bool:
+        """ Reads the next chunk, or size bytes, into the buffer, returns False at the end of the file. """
+        if self._eof:
+            return False
+        chunk = self.f.read(self.chunkSize if size is None else size)
+        self.bytesRead += len(chunk)
+        text = self._decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            self._eof = True
+        if self._pos < len(self._buffer):
+            self._buffer = self._buffer[self._pos:] + text
+        else:
+            self._buffer = text
+        self._pos = 0
+        self._misses = 0
+        if self.progress is not None and chunk:
+            self.progress(self.bytesRead)
+        return bool(chunk) or bool(text)
+
+
+    def _peek(self, allowEnd: bool = False) -> str:
+        """ Skips whitespace and returns the next character without consuming it. """
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            length = len(buffer)
+            while pos < length and buffer[pos] in ' \t\n\r':
+                pos += 1
+            self._pos = pos
+            if pos < length:
+                return buffer[pos]
+            if not self._fill():
+                if allowEnd:
+                    return None
+                raise json.JSONDecodeError("Unexpected end of file", self._buffer, self._pos)
+
+
+    def _expect(self, char: str):
+        """ Consumes the given structural character or raises an error. """
+        if self._peek() != char:
+            raise json.JSONDecodeError("Expecting '{}'".format(char), self._buffer, self._pos)
+        self._pos += 1
+
+
+    def _value(self) -> object:
+        """ Decodes the complete json value at the current position, reading more of the file if needed.
+
+        Objects, arrays and strings cut off by the end of the buffer fail to decode, the value is decoded
+        again once more of the file is read. The bytes read for it double each time so a large value is
+        decoded a few times rather than once per chunk. Numbers and literals reaching the end of the
+        buffer may continue in the next chunk and are decoded again too.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._rawDecode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill(self._fillSize):
+                    self._fillSize *= 2
+                    continue
+                raise
+            if end == len(self._buffer) and self._buffer[self._pos] in _OPEN_ENDED and self._fill():
+                continue
+            self._fillSize = self.chunkSize
+            self._pos = end
+            return value
@@ -1,26 +1,51 @@
+from operator import attrgetter
 from typing import Tuple, Callable
 
-from PyQt5.QtCore import pyqtSlot, pyqtSignal, QObject
-from PyQt5.QtWidgets import (
-    QMenu
-)
-
 from objectgui.core.tree import NodeMixin
-from objectgui.gui.editObject import EditObject
+from objectgui.core import searchIndex
+from objectgui.core.signal import Signal
+
+
+class Attribute():
+    """ Declaration of a saved attribute that is shared by every instance of a Node class.
+
+    Args:
+        name: The name of the attribute, will be displayed in the save file.
+        getter: Optional function taking the node and returning the value, defaults to getattr.
+        setter: Optional function taking the node and the value, defaults to setattr.
+    """
+    __slots__ = ('name', 'getter', 'setter')
+
+    def __init__(self, name: str, getter: Callable=None, setter: Callable=None):
+        if not isinstance(name, str):
+            raise TypeError("Attribute name must be a string.")
+        if (getter is not None and not callable(getter)) or (setter is not None and not callable(setter)):
+            raise TypeError("Getter and setter must be callable.")
+        self.name = name
+        self.getter = getter
+        self.setter = setter
 
 
-# QObject is needed in order to emit signals
-class Node(NodeMixin, QObject):
+# Node doesn't import Qt so the core can be used headless, the edit form is only imported when it is first shown
+class Node(NodeMixin):
     """ Class that controls how a node behaves when viewed in the gui.
     
     Adds an interface to a tree node to interact with the gui.
     Implement methods in the subclass to change how the gui behaves.
     """
-    editSubmitted = pyqtSignal()
-    editCancelled = pyqtSignal()
+    editSubmitted = Signal()
+    editCancelled = Signal()
 
     # Attributes that control save/load behavior
     ownFile = False
+    # Only set on nodes that own a file: something saved in the node's own file changed since it was
+    # last saved or loaded, or something changed in one of the files nested below it
+    dirty = False
+    nestedDirty = False
+    # Number of times the node's own file and the files nested below it were marked dirty, lets a save
+    # running in the background tell if a file changed again after its snapshot was taken
+    _changes = 0
+    _nestedChanges = 0
     # Attributes that control drag/drop behavior
     dragable = True
     dropable = True
@@ -28,20 +53,62 @@ class Node(NodeMixin, QObject):
     suppressed = False
     default = False
     columnCount = 1 # The number of data columns to display for the children of this node
-    editFormInnerClass = None # subclasses need to set this attribute to create the form
+    # Subclasses need to set this attribute to create the form, if the class has a bindNode(node) method
+    # one form is shared by all the nodes of the class in a FileTab
+    editFormInnerClass = None
     # Come up with default names for the classes
     newInstance = 1
     defaultName = "File"
+    # Attributes saved by every instance of the class, names or Attribute declarations.
+    # Subclasses only list their own attributes, the ones of the parent classes are inherited.
+    savedAttributes = ('name',)
+    # Attributes added to a single instance with addAttribute, most nodes never have any
+    _instanceAttributes = None
+    _fields = None
+    # The edit form is only built the first time it is shown, see editForm
+    _editForm = None
 
     def __init__(self, name, **kwargs):
         self.name = name
         super().__init__(**kwargs)
-
-        # Initialization work
-        self.__attributes = {}
-        self.addAttribute('name')
         #self.addActionsToMenu('name')
-        self._createEditForm()
+
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compileAttributes()
+
+
+    @classmethod
+    def _compileAttributes(cls):
+        """ Builds the attribute schema of the class and fast paths to get them and to create nodes.
+
+        The schema is built once per class from savedAttributes of the class and its parents.
+        When every attribute uses the default getter, getAttributes is a single attrgetter call.
+        Classes that keep the constructor, name and onChange of Node are created by fromAttributes
+        without going through __init__.
+        """
+        schema = {}
+        for klass in reversed(cls.__mro__):
+            for attr in klass.__dict__.get('savedAttributes', ()):
+                if isinstance(attr, str):
+                    attr = Attribute(attr)
+                schema[attr.name] = attr
+        cls._attributeSchema = schema
+        names = tuple(schema)
+        if any(attr.getter is not None for attr in schema.values()):
+            getters = [(name, attr.getter or attrgetter(name)) for name, attr in schema.items()]
+            cls._getClassAttributes = staticmethod(lambda node: {name: get(node) for name, get in getters})
+        elif len(names) == 1:
+            name = names[0]
+            cls._getClassAttributes = staticmethod(lambda node: {name: getattr(node, name)})
+        elif len(names) > 1:
+            get = attrgetter(*names)
+            cls._getClassAttributes = staticmethod(lambda node: dict(zip(names, get(node))))
+        else:
+            cls._getClassAttributes = staticmethod(lambda node: {})
+        cls._createFromName = (cls.__init__ is Node.__init__ and cls.name is Node.name
+                               and cls.onChange is Node.onChange and names == ('name',))
 
 
     @classmethod
@@ -63,32 +130,39 @@ class Node(NodeMixin, QObject):
         Return:
             Node: Instance of the Node class created from the parameters dictionary.
         """
+        # A node that isn't in a tree yet has nothing for onChange to do when its name is set
+        if cls._createFromName and len(attributes) == 1 and 'name' in attributes:
+            return cls._createNamed(attributes['name'])
         return cls(**attributes)
 
     
     def addAttribute(self, name: str, getter: Callable=None, setter: Callable=None):
-        """ Adds an attribute of the main class to the node
+        """ Adds an attribute of the main class to this instance of the node.
         
         The full set of attributes for the class should be sufficient to recreate the class.
         Attributes will be saved to disk when the ObjectTree is saved and loaded from disk
         when the tree is loaded. They are also used to reset the object to its prior state
         when clicking cancel on an edit gui.
 
+        Attributes shared by every instance should be declared in savedAttributes instead,
+        which costs nothing per instance.
+
         Args:
             name: The name of the attribute, will be displayed in the save file.
             getter: The function to get the attribute from the main class. If not defined,
-                will set the class a
-            setter: The function to set the attribute in the main class.
+                will get the attribute of this node with the same name.
+            setter: The function to set the attribute in the main class. If not defined,
+                will set the attribute of this node with the same name.
         """
         if not isinstance(name, str):
             raise TypeError("Attribute name must be a string.")
-        if getter is None:
-            getter = lambda: getattr(self, name)
-        if setter is None:
-            setter = lambda x: setattr(self, name, x)
-        if not callable(getter) or not callable(setter):
+        if (getter is not None and not callable(getter)) or (setter is not None and not callable(setter)):
             raise TypeError("Getter and setter must be callable.")
-        self.__attributes[name] = {
+        if getter is None and setter is None and name in self._attributeSchema:
+            return
+        if self._instanceAttributes is None:
+            self._instanceAttributes = {}
+        self._instanceAttributes[name] = {
             'getter': getter,
             'setter': setter
         }
@@ -100,8 +174,35 @@ class Node(NodeMixin, QObject):
         Args:
             attributes: Dictionary of attribute name/value pairs.
         """
-        for name, value in attributes.items():
-            self.__attributes[name]['setter'](value)
+        schema = self._attributeSchema
+        instanceAttributes = self._instanceAttributes or {}
+        # The attributes set here only call onChange once at the end, see NodeMixin._updating
+        nested = self._updating
+        self._updating = True
+        try:
+            for name, value in attributes.items():
+                attr = instanceAttributes.get(name)
+                if attr is not None:
+                    setter = attr['setter']
+                    if setter is None:
+                        setattr(self, name, value)
+                    else:
+                        setter(value)
+                    continue
+                setter = schema[name].setter
+                if setter is None:
+                    setattr(self, name, value)
+                else:
+                    setter(self, value)
+        finally:
+            if not nested:
+                # Back to the class default so nodes don't keep the flag in their dictionary
+                del self._updating
+        if nested:
+            return
+        # Attributes may be reduced over the subtrees this node is part of
+        self.invalidateAggregates()
+        self.onChange()
 
 
     def getAttributes(self):
@@ -113,12 +214,19 @@ class Node(NodeMixin, QObject):
         # TODO Do we need to worry about copying here if the attribute is an array?
         # Would the attribute ever be an array? they are meant to be set using fields in a gui
         # If it should never be an array then it should throw an error or something
-        attributes = {}
-        for name, attr in self.__attributes.items():
-            attributes[name] = attr['getter']()
+        attributes = self._getClassAttributes(self)
+        if self._instanceAttributes is not None:
+            for name, attr in self._instanceAttributes.items():
+                getter = attr['getter']
+                attributes[name] = getattr(self, name) if getter is None else getter()
         return attributes
 
 
+    def _attributeSetter(self, name: str) -> Callable:
+        """ Returns a function of one argument that sets the given attribute on this node. """
+        return lambda value: self.updateAttributes({name: value})
+
+
     def cacheAttributes(self):
         """ Saves the class attributes when the edit window is shown. 
         
@@ -135,6 +243,93 @@ class Node(NodeMixin, QObject):
         self.updateAttributes(self.__cache)
     
 
+    # Unsaved change tracking
+    # -------------------------------------------------------------------------
+    def owningFile(self) -> object:
+        """ Returns the nearest ancestor that owns a file, the node whose file this node is saved in. """
+        node = self.parent
+        while node is not None and not node.ownFile:
+            node = node.parent
+        return node
+
+
+    def onChange(self, children: bool = False):
+        """ Marks the files this change is saved in as dirty and journals attribute changes.
+
+        The node's attributes are saved in the file of its owning file node (and in its own file if it
+        has one), its list of children in its own file if it has one, otherwise in its owning file.
+        Attribute changes also update the search indexes the node is in, see SearchIndex. The attributes
+        set by updateAttributes only call this once, after all of them have been set.
+        """
+        if self._updating and not children:
+            return
+        if not children and searchIndex.activeIndexes:
+            searchIndex.nodeChanged(self)
+        if self.ownFile:
+            if not children and self.isJournaling():
+                self.recordAttributes(self)
+            self.markDirty()
+            if children:
+                return
+        owner = self.owningFile()
+        if owner is not None:
+            if not children and owner.isJournaling():
+                owner.recordAttributes(self)
+            owner.markDirty()
+
+
+    def onChildrenRemoved(self, rows: list, children: list):
+        """ Records the removal in the journal of the file the node's children are saved in, see isJournaling.
+
+        The removed subtrees are also dropped from the search indexes the node is in.
+        """
+        file = self if self.ownFile else self.owningFile()
+        if file is not None and file.isJournaling():
+            file.recordRemoved(self, rows)
+        if searchIndex.activeIndexes:
+            searchIndex.childrenRemoved(self, children)
+
+
+    def onChildrenInserted(self, row: int, count: int):
+        """ Records the insertion in the journal of the file the node's children are saved in, see isJournaling.
+
+        The inserted subtrees are also added to the search indexes the node is in.
+        """
+        file = self if self.ownFile else self.owningFile()
+        if file is not None and file.isJournaling():
+            file.recordInserted(self, row, count)
+        if searchIndex.activeIndexes:
+            # The list the tree holds, children would read the file of a placeholder in the middle of the insert
+            children = NodeMixin.children.fget(self)
+            searchIndex.childrenInserted(self, children[row:row + count])
+
+
+    def isJournaling(self) -> bool:
+        """ Returns True if changes to this node's file are recorded so a save only appends them, see FileNode. """
+        return False
+
+
+    def markDirty(self):
+        """ Flags this node's file as changed and every file it is nested in as having a changed nested file. """
+        self.dirty = True
+        self._changes += 1
+        owner = self.owningFile()
+        while owner is not None:
+            owner.nestedDirty = True
+            owner._nestedChanges += 1
+            owner = owner.owningFile()
+
+
+    def hasUnfetchedChildren(self) -> bool:
+        """ Returns True if the node's children haven't been read from disk yet, see FileNode.fetchChildren. """
+        return False
+
+
+    def hasUnsavedChanges(self) -> bool:
+        """ Returns True if this node's file or any file nested below it has changed since it was saved. """
+        return self.dirty or self.nestedDirty
+
+
     def createSaveData(self):
         """ Builds the dictionary that will be saved to disk for this class.
         
@@ -190,7 +385,7 @@ class Node(NodeMixin, QObject):
     
 
     # XXX Not sure if I like this structure of passing actions down through the application
-    def addActionsToMenu(self, menu: QMenu, actions) -> QMenu:
+    def addActionsToMenu(self, menu: 'QMenu', actions) -> 'QMenu':
         """ Creates the context menu when the user right clicks on the tree item.
 
         Subclasses should override this method to add actions to the context menu.
@@ -205,22 +400,29 @@ class Node(NodeMixin, QObject):
         return menu
     
 
+    @property
+    def editForm(self):
+        """ Returns the edit form for the object, creating it the first time it is requested. """
+        if self._editForm is None:
+            self._createEditForm()
+        return self._editForm
+
+
     def _createEditForm(self):
         """ Creates the edit form for the object.
         
         The edit form is the outer edit box that contains the cancel and submit button.
         """
-        self.editForm = EditObject()
-        self.editForm.cancelButton.clicked.connect(self.cancelForm)
-        self.editForm.okButton.clicked.connect(self.submitForm)
-        self.editForm.parent = self
+        from objectgui.gui.editObject import EditObject
+        editForm = EditObject()
         if self.editFormInnerClass is not None:
             self.editFormInner = self.editFormInnerClass(self)
-            self.editForm.editFormInner = self.editFormInner
-            self.editForm.scrollArea.setWidget(self.editFormInner)
+            editForm.setInnerForm(self.editFormInner)
         else:
             # Do nothing, nodes are allowed not to have edit forms; for example, the fileNode doesn't
             pass
+        editForm.bindNode(self)
+        self._editForm = editForm
     
 
     def submitForm(self):
@@ -248,15 +450,22 @@ class Node(NodeMixin, QObject):
             field: 
             attribute: 
         """
+        if attribute not in self._attributeSchema and attribute not in (self._instanceAttributes or {}):
+            raise KeyError(attribute)
         if hasattr(field, 'editingFinished'):
-            setter = self.__attributes[attribute]['setter']
-            field.editingFinished.connect(setter)
-        self.__attributes[attribute]['field'] = field
+            field.editingFinished.connect(self._attributeSetter(attribute))
+        if self._fields is None:
+            self._fields = {}
+        self._fields[attribute] = field
     
 
     def updateFieldsFromAttributes(self):
-        for name, attr in self.__attributes.items():
-            if 'field' in attr:
-                field = attr['field']
-                if 'setValue' in field:
-                    field.setValue(attr['getter']())
+        if self._fields is None:
+            return
+        attributes = self.getAttributes()
+        for name, field in self._fields.items():
+            if hasattr(field, 'setValue'):
+                field.setValue(attributes[name])
+
+
+Node._compileAttributes()
@@ -0,0 +1,125 @@
+import importlib
+import threading
+from typing import Callable
+
+
+# Entry point group packages list their node classes under, the entry point name is the saved class name
+ENTRY_POINT_GROUP = 'objectgui.nodes'
+
+
+class NodeRegistry():
+    """ Maps the class names saved in project files to the node classes that load them.
+
+    Classes are registered by dotted path and only imported the first time a file containing their
+    class name is loaded, so an application doesn't need to import every node class (and its edit
+    form) at startup. Packages can also list their classes as entry points in the ENTRY_POINT_GROUP
+    group, the entry points are only looked up when a class name hasn't been registered.
+
+    Safe to use from the threads that read nested files.
+
+    Args:
+        entryPoints: If the installed packages' entry points are searched for unknown class names.
+    """
+    def __init__(self, entryPoints: bool = True):
+        self.entryPoints = entryPoints
+        # Class name to dotted path of the classes that haven't been imported yet
+        self._paths = {}
+        # Class name to the function creating a node from its saved attributes
+        self._constructors = {}
+        self._entryPointsLoaded = False
+        self._lock = threading.Lock()
+
+
+    def register(self, name: str, target):
+        """ Registers the class that loads nodes saved with the given class name.
+
+        Args:
+            name: The class name saved in project files, normally the class's __name__.
+            target: The dotted path of the class ('package.module.Class' or 'package.module:Class'),
+                imported the first time it is needed, or the class itself.
+        """
+        with self._lock:
+            self._constructors.pop(name, None)
+            self._paths.pop(name, None)
+            if isinstance(target, str):
+                self._paths[name] = target
+            else:
+                self._constructors[name] = _constructorOf(target)
+
+
+    def constructor(self, name: str) -> Callable:
+        """ Returns the function that creates a node of the given class name from its saved attributes.
+
+        Imports the class if this is the first time it is needed.
+
+        Raises:
+            KeyError: If no class is registered under the name.
+        """
+        constructor = self._constructors.get(name)
+        if constructor is not None:
+            return constructor
+        with self._lock:
+            path = self._paths.get(name)
+            if path is None and self._loadEntryPoints():
+                path = self._paths.get(name)
+            if path is None:
+                # Another thread may have imported the class since it was looked up above
+                constructor = self._constructors.get(name)
+                if constructor is None:
+                    raise KeyError(name)
+                return constructor
+        # Imported without holding the lock so the imported module can register classes itself
+        constructor = _constructorOf(importObject(path))
+        with self._lock:
+            constructor = self._constructors.setdefault(name, constructor)
+            self._paths.pop(name, None)
+        return constructor
+
+
+    def isImported(self, name: str) -> bool:
+        """ Returns True if the class registered under name has already been imported. """
+        return name in self._constructors
+
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            if name in self._constructors or name in self._paths:
+                return True
+            return self._loadEntryPoints() and name in self._paths
+
+
+    def _loadEntryPoints(self) -> bool:
+        """ Registers the classes listed as entry points the first time it is called, returns True if it did.
+
+        Called with the lock held.
+        """
+        if not self.entryPoints or self._entryPointsLoaded:
+            return False
+        self._entryPointsLoaded = True
+        # Only imported here, importing it takes longer than importing the rest of the core
+        from importlib import metadata
+        for entryPoint in metadata.entry_points(group=ENTRY_POINT_GROUP):
+            if entryPoint.name not in self._constructors:
+                self._paths.setdefault(entryPoint.name, entryPoint.value)
+        return True
+
+
+def importObject(path: str) -> object:
+    """ Imports the object at a dotted path, 'package.module.name' or 'package.module:name'. """
+    if ':' in path:
+        moduleName, attribute = path.split(':', 1)
+    else:
+        moduleName, attribute = path.rsplit('.', 1)
+    obj = importlib.import_module(moduleName)
+    for part in attribute.split('.'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _constructorOf(target) -> Callable:
+    """ Returns fromAttributes for node classes, other callables are used to create the node as they are. """
+    return getattr(target, 'fromAttributes', target)
+
+
+# Registry used by FileNode unless a subclass sets its own
+defaultRegistry = NodeRegistry()
@@ -0,0 +1,201 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+
+# Separates the texts of the nodes in the searched string, queries containing it never match
+SEPARATOR = '\n'
+
+# Indexes kept up to date by the Node change hooks, see SearchIndex.close
+activeIndexes = []
+
+
+def nodeChanged(node: object):
+    """ Updates the indexes containing a node after its attributes changed. """
+    for index in activeIndexes:
+        index._nodeChanged(node)
+
+
+def childrenInserted(parent: object, children: list):
+    """ Adds nodes inserted under parent, and their subtrees, to the indexes containing parent. """
+    for index in activeIndexes:
+        index._childrenInserted(parent, children)
+
+
+def childrenRemoved(parent: object, children: list):
+    """ Removes nodes removed from parent, and their subtrees, from the indexes containing parent. """
+    for index in activeIndexes:
+        index._childrenRemoved(parent, children)
+
+
+def searchText(node: object) -> str:
+    """ Returns the lowercase text a node is found by, its name and the display text of its first column. """
+    text = str(node.name)
+    getDisplayData = getattr(node, 'getDisplayData', None)
+    if getDisplayData is not None:
+        display = getDisplayData(0)
+        if display is not None and display != text:
+            text = text + SEPARATOR + str(display)
+    return text.lower()
+
+
+class SearchIndex():
+    """ Case insensitive substring search over the names and display text of every node in a tree.
+
+    Each node gets a slot holding its search text. The texts of the slots are kept joined in one string
+    so a query is a scan of that string with str.find, which stays in C and takes a few milliseconds for
+    a million nodes whatever the query, short queries included. A match is mapped back to its slot by
+    bisecting the offsets the texts start at.
+
+    The index is kept up to date as nodes are inserted, removed, moved or renamed through the Node
+    change hooks. A changed node gets a new slot and its old slot is emptied, new slots are appended
+    to a short list that is scanned separately until it is large enough to be joined to the string.
+    Children of placeholder nodes are indexed once they are fetched.
+
+    Args:
+        root: The node at the top of the indexed tree, it is indexed with all its descendants.
+    """
+    # Most matches returned by a search, a query matching nearly every node would otherwise build a huge list
+    maxResults = 10000
+    # Slots added since the text was last joined that are scanned one by one, once there are more
+    # than this (or more than an eighth of the joined slots) the text is joined again
+    maxPending = 1024
+
+    def __init__(self, root: object):
+        self.root = root
+        self._build(root.iterSubTree())
+        activeIndexes.append(self)
+
+
+    def _build(self, nodes):
+        """ Gives a slot to each node and joins their texts. """
+        self._nodes = list(nodes)
+        self._texts = [searchText(node) for node in self._nodes]
+        self._slots = {id(node): slot for slot, node in enumerate(self._nodes)}
+        self._live = len(self._nodes)
+        self._join()
+
+
+    def _join(self):
+        """ Joins the text of every slot into the searched string, emptied slots keep an empty text. """
+        texts = self._texts
+        self._text = SEPARATOR.join(texts)
+        # Offset of the start of each slot's text, each text is followed by a separator
+        self._starts = array('q', accumulate((len(text) + 1 for text in texts), initial=0))
+        self._joined = len(texts)
+
+
+    def close(self):
+        """ Stops keeping the index up to date and frees it. """
+        if self in activeIndexes:
+            activeIndexes.remove(self)
+        self._build(())
+
+
+    def __len__(self) -> int:
+        """ Returns the number of indexed nodes. """
+        return self._live
+
+
+    def __contains__(self, node: object) -> bool:
+        return id(node) in self._slots
+
+
+    def search(self, text: str, limit: int = None) -> list:
+        """ Returns the nodes whose name or display text contains text, ignoring case.
+
+        Args:
+            text: The text to look for, nothing matches an empty text.
+            limit: Most nodes to return, defaults to maxResults.
+
+        Returns:
+            matches: The matching nodes, roughly in tree order for nodes that haven't changed since the
+                index was built.
+        """
+        text = text.lower()
+        if limit is None:
+            limit = self.maxResults
+        if not text or SEPARATOR in text or limit <= 0:
+            return []
+        pending = len(self._texts) - self._joined
+        if pending > max(self.maxPending, self._joined >> 3):
+            self._join()
+        matches = []
+        nodes = self._nodes
+        starts = self._starts
+        joined = self._text
+        find = joined.find
+        lastSlot = self._joined - 1
+        position = find(text)
+        while position != -1:
+            slot = bisect_right(starts, position) - 1
+            node = nodes[slot]
+            if node is not None:
+                matches.append(node)
+                if len(matches) == limit:
+                    return matches
+            if slot == lastSlot:
+                break
+            # A node matches once even if both its name and display text contain the query
+            position = find(text, starts[slot + 1])
+        texts = self._texts
+        for slot in range(self._joined, len(texts)):
+            node = nodes[slot]
+            if node is not None and text in texts[slot]:
+                matches.append(node)
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+    def _add(self, node: object):
+        """ Gives a new slot to a node, its text is scanned separately until the next join. """
+        self._slots[id(node)] = len(self._nodes)
+        self._nodes.append(node)
+        self._texts.append(searchText(node))
+        self._live += 1
+
+
+    def _discard(self, slot: int):
+        """ Empties a slot, it is dropped the next time the index is rebuilt. """
+        self._nodes[slot] = None
+        self._texts[slot] = ''
+        self._live -= 1
+
+
+    def _compact(self):
+        """ Rebuilds the index without its empty slots once they outnumber the nodes. """
+        if len(self._nodes) - self._live > max(self._live, self.maxPending):
+            self._build(node for node in self._nodes if node is not None)
+
+
+    def _nodeChanged(self, node: object):
+        slot = self._slots.get(id(node))
+        if slot is None or searchText(node) == self._texts[slot]:
+            return
+        self._discard(slot)
+        self._add(node)
+        self._compact()
+
+
+    def _childrenInserted(self, parent: object, children: list):
+        if id(parent) not in self._slots:
+            return
+        slots = self._slots
+        for child in children:
+            for node in child.iterSubTree():
+                # Descendants attached after their ancestor was inserted are added by their own insertion
+                if id(node) not in slots:
+                    self._add(node)
+
+
+    def _childrenRemoved(self, parent: object, children: list):
+        if id(parent) not in self._slots:
+            return
+        slots = self._slots
+        for child in children:
+            for node in child.iterSubTree():
+                slot = slots.pop(id(node), None)
+                if slot is not None:
+                    self._discard(slot)
+        self._compact()
@@ -0,0 +1,51 @@
+class Signal():
+    """ Pure python stand in for pyqtSignal so the core can emit signals without importing Qt.
+
+    Declared as a class attribute like pyqtSignal, each instance gets its own bound signal with
+    the same connect/disconnect/emit interface, slots are called directly when the signal is emitted.
+    Qt slots can be connected to it like any other callable.
+    """
+    def __init__(self, *types):
+        self.types = types
+        self.attr = None
+
+
+    def __set_name__(self, owner, name):
+        self.attr = '_signal_' + name
+
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        bound = instance.__dict__.get(self.attr)
+        if bound is None:
+            bound = BoundSignal()
+            instance.__dict__[self.attr] = bound
+        return bound
+
+
+class BoundSignal():
+    """ The signal of a single object, keeps track of the connected slots. """
+    def __init__(self):
+        self.slots = []
+
+
+    def connect(self, slot):
+        """ Connects a callable to the signal. """
+        if not callable(slot):
+            raise TypeError("Slot must be callable.")
+        self.slots.append(slot)
+
+
+    def disconnect(self, slot=None):
+        """ Disconnects the given slot, or every slot if none is given. """
+        if slot is None:
+            self.slots.clear()
+        else:
+            self.slots.remove(slot)
+
+
+    def emit(self, *args):
+        """ Calls every connected slot with the given arguments. """
+        for slot in list(self.slots):
+            slot(*args)
@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+from objectgui.core import binaryFormat
+from objectgui.core import journal
+
+
+class SaveSnapshot():
+    """ The save data of a FileNode and of its changed nested files, captured so it can be written on another thread.
+
+    Built by FileNode.takeSnapshot on the thread that owns the tree, which only collects the class name,
+    saved attributes and number of children of each node in a flat list. write encodes that list with
+    the same streaming writers as FileNode.save, so it can run on any thread while the tree keeps changing. markSaved must be called back on
+    the tree's thread, it clears the unsaved change flags of the files that didn't change again since.
+    markFailed is called instead if write raised.
+    """
+    def __init__(self):
+        # (filename, node, records, binary, entries) for each file to write, records are the list of
+        # FileNode._iterSaveRecords, entries are the journal entries to append instead if records is None
+        self.files = []
+        # (node, changes, nestedChanges, filename, appended) for each file node the snapshot covers, filename is None
+        # if its file isn't written, appended the number of journal entries written or None for the whole file
+        self._nodes = []
+
+
+    def addFile(self, node: object, filename: str, binary: bool):
+        """ Captures the data of a node that owns a file, only its new journal entries if they can be appended.
+        
+        Args:
+            node: The node whose file will be written.
+            filename: The file to write.
+            binary: If the file is written in the binary format rather than json.
+        """
+        entries = node._takeJournal(filename)
+        # Entries recorded until the save finishes are kept for it to append, see FileNode._flushJournal
+        node._journalWriting = True
+        records = list(node._iterSaveRecords(node)) if entries is None else None
+        self.files.append((filename, node, records, binary, entries))
+        self._nodes.append((node, node._changes, node._nestedChanges, filename, None if entries is None else len(entries)))
+
+
+    def addSearched(self, node: object):
+        """ Records a node whose own file is unchanged but that has changed files nested below it. """
+        self._nodes.append((node, node._changes, node._nestedChanges, None, None))
+
+
+    def write(self):
+        """ Writes every captured file, each to a temporary file that then replaces it. 
+        
+        A save interrupted part way leaves the previous version of each file intact, a journal left next
+        to a file that has been replaced is ignored when it is loaded.
+        """
+        for filename, node, records, binary, entries in self.files:
+            if records is None:
+                if entries:
+                    journal.appendJournal(filename, entries)
+                continue
+            directory, name = os.path.split(os.path.abspath(filename))
+            handle, tempName = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp', dir=directory)
+            try:
+                if binary:
+                    writer = binaryFormat.BinaryTreeWriter()
+                    node._writeBinaryRecords(writer, records)
+                    with os.fdopen(handle, 'wb') as f:
+                        f.write(writer.getvalue())
+                else:
+                    with os.fdopen(handle, 'w', buffering=node.saveBufferSize) as f:
+                        node._writeRecords(f, records)
+                os.replace(tempName, filename)
+            except BaseException:
+                if os.path.exists(tempName):
+                    os.remove(tempName)
+                raise
+            journal.removeJournal(filename)
+
+
+    def markSaved(self):
+        """ Clears the unsaved change flags of the files that haven't changed since the snapshot was taken. """
+        for node, changes, nestedChanges, filename, appended in self._nodes:
+            if filename is not None:
+                node._journalSaved(filename, appended, node._changes != changes)
+                if node._changes == changes:
+                    node.dirty = False
+            if node._nestedChanges == nestedChanges:
+                node.nestedDirty = False
+
+
+    def markFailed(self):
+        """ Makes the next save of every file the snapshot should have written rewrite the whole file. 
+        
+        The journal entries taken by the snapshot weren't committed, the files are still flagged as changed.
+        """
+        for node, changes, nestedChanges, filename, appended in self._nodes:
+            if filename is not None:
+                node._journalWriting = False
+                node._journalBase = None
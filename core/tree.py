@@ -1,15 +1,101 @@
+from collections import deque
+from typing import Callable
+
+
+class SubtreeAggregate():
+    """ Definition of a reduction of a node attribute over a subtree. """
+    reductions = {'sum': sum, 'min': min, 'max': max}
+
+    def __init__(self, attribute: str, reduction='sum'):
+        self.attribute = attribute
+        if isinstance(reduction, str):
+            reduction = self.reductions[reduction]
+        self.reduce = reduction
+
+
+    def compute(self, node: object, childValues: list) -> object:
+        """ Returns the value of the aggregate for node given the values of its children. """
+        values = [value for value in childValues if value is not None]
+        own = getattr(node, self.attribute, None)
+        if own is not None:
+            values.append(own)
+        if not values:
+            return None
+        return self.reduce(values)
+
+
+class DescendantCount(SubtreeAggregate):
+    """ Aggregate counting the number of nodes below a node. """
+    def __init__(self):
+        super().__init__(None)
+
+
+    def compute(self, node: object, childValues: list) -> int:
+        return sum(childValues) + len(childValues)
+
+
 class NodeMixin():
     """ Mixin class that allows objects to be nodes of a tree. 
     
     Adds an interface to an object to interact with the tree.
-    Will throw an error if code attempts to create a loop in the tree
+    Will throw an error if code attempts to create a loop in the tree,
+    the check uses each node's cached depth and happens before the tree is modified.
     """
+    subtreeAggregates = {'descendants': DescendantCount()}
+    # Class level defaults so the name can be set before NodeMixin.__init__ runs
+    __name = None
+    __parent = None
+    __nameIndex = None
+    # Set by subclasses while they change several attributes, the name setter then leaves onChange to them
+    _updating = False
+
     def __init__(self, *args, **kwargs):
         self.__parent = None
         self.__children = []
+        # Cached index of this node in its parent's children list, kept in sync on every move
+        self.__row = None
+        # Number of edges between this node and the root, kept in sync on every move
+        self.__depth = 0
+        # Cached subtree aggregates {name: value}, None when a change below this node invalidated them
+        self.__aggregates = None
+        # Index {name: [children]} of this node's children, built the first time a child is looked up by name
+        self.__nameIndex = None
+        self.__duplicateNames = set()
         super().__init__(*args, **kwargs)
 
 
+    @classmethod
+    def _createNamed(cls, name: str) -> object:
+        """ Creates a detached node with the given name without calling __init__ of the subclasses or onChange.
+
+        Only for classes whose constructor does nothing more than set the name, see Node.fromAttributes.
+        """
+        node = cls.__new__(cls)
+        NodeMixin.__init__(node)
+        node.__name = name
+        return node
+
+
+    @property
+    def name(self) -> str:
+        """ Returns the name of this node, used to address it with find and path. """
+        return self.__name
+
+
+    @name.setter
+    def name(self, value: str):
+        """ Renames this node, keeping the parent's name index up to date. """
+        parent = self.__parent
+        if parent is not None and parent.__nameIndex is not None:
+            parent.__unindexChild(self)
+            self.__name = value
+            parent.__indexChild(self)
+        else:
+            self.__name = value
+        if not self._updating:
+            self.onChange()
+
+
     @property
     def parent(self) -> object:
         """ Returns this node's parent in the tree, None if this node is the root. """
@@ -28,10 +114,12 @@ class NodeMixin():
         """
         parent = self.__parent
         if parent is not value:
+            # Refuse the move before touching the tree so a failed move leaves it unchanged
+            if value is not None and (value is self or self.isAncestorOf(value)):
+                raise CircularTreeError
             self.__detach(parent)
             self.__attach(value)
-            # If a loop exists, there will be no root and the following line will throw an error
-            self.root
+            self.__updateDepth()
     
 
     @parent.deleter
@@ -41,15 +129,22 @@ class NodeMixin():
 
 
     def __detach(self, parent: object):
-        """ Removes this node from the old parent's children by rebuilding the children array. 
+        """ Removes this node from the old parent's children and renumbers the later siblings. 
         
         Args:
             parent: The old parent node of this node.
         """
         if parent is not None:
             parentsChildren = parent.__children
-            parentsChildren.remove(self)
+            row = self.__row
+            del parentsChildren[row]
+            NodeMixin._renumber(parentsChildren, row, len(parentsChildren))
             self.__parent = None
+            self.__row = None
+            parent.invalidateAggregates()
+            parent.__unindexChild(self)
+            parent.onChildrenRemoved([row], [self])
+            parent.onChange(children=True)
 
 
     def __attach(self, parent: object):
@@ -60,8 +155,44 @@ class NodeMixin():
         """
         if parent is not None:
             parentsChildren = parent.__children
+            self.__row = len(parentsChildren)
             parentsChildren.append(self)
             self.__parent = parent
+            parent.invalidateAggregates()
+            parent.__indexChild(self)
+            parent.onChildrenInserted(self.__row, 1)
+            parent.onChange(children=True)
+
+
+    def __updateDepth(self):
+        """ Recomputes the depth of this node and shifts the depth of its subtree to match.
+
+        Costs the size of the moved subtree when its depth changes, less than the whole tree an
+        interval index would renumber, and nothing for moves between parents at the same depth.
+        """
+        parent = self.__parent
+        depth = 0 if parent is None else parent.__depth + 1
+        delta = depth - self.__depth
+        if delta == 0:
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.__depth += delta
+            stack.extend(node.__children)
+
+
+    @staticmethod
+    def _renumber(children: list, start: int, stop: int):
+        """ Updates the cached row of the children in the range [start, stop). 
+        
+        Args:
+            children: The children list of a node.
+            start: Index of the first child whose row may have changed.
+            stop: One past the index of the last child whose row may have changed.
+        """
+        for i in range(start, stop):
+            children[i].__row = i
 
 
     @property
@@ -72,48 +203,232 @@ class NodeMixin():
 
     @children.setter
     def children(self, children: list):
-        """ Changes the children of this node, accomplished by changing each child's parent. 
+        """ Changes the children of this node to the given list in a single pass.
 
         Orphaned children have their parent set to None.
         
         Args:
             children: List of children to set.
         """
+        children = list(children)
+        self._validateNewChildren(children)
         del self.children
-        for child in children:
-            child.parent = self
+        self.attachMany(children)
 
 
     @children.deleter
     def children(self):
         """ Removes all children of this node and sets all children's parents to None. """
-        for child in reversed(self.children):
-            child.parent = None
+        self.detachMany(self.__children)
+
+
+    def attachMany(self, children: list, row: int = None):
+        """ Makes the given nodes children of this node, inserted as a block at the given row.
+
+        Every node is validated before the tree is changed, then each old parent's children
+        list and this node's children list are rebuilt once, rather than once per node.
+        Attaching no nodes does nothing and calls none of the change hooks.
+        
+        Args:
+            children: List of nodes to attach, in the order they should appear.
+            row: Index in this node's children to insert the block at, counted after any of the
+                given nodes that are already children of this node have been removed.
+                Defaults to the end of the list.
+        """
+        children = list(children)
+        if not children:
+            return
+        self._validateNewChildren(children)
+        NodeMixin._detachNodes(children)
+        parentsChildren = self.__children
+        if row is None or row > len(parentsChildren):
+            row = len(parentsChildren)
+        parentsChildren[row:row] = children
+        for child in children:
+            child.__parent = self
+        NodeMixin._renumber(parentsChildren, row, len(parentsChildren))
+        for child in children:
+            child.__updateDepth()
+            self.__indexChild(child)
+        self.invalidateAggregates()
+        self.onChildrenInserted(row, len(children))
+        self.onChange(children=True)
+
+
+    def detachMany(self, children: list):
+        """ Removes the given children of this node from the tree in a single pass.
+        
+        Args:
+            children: List of nodes to detach, each must be a child of this node.
+        """
+        children = list(children)
+        for child in children:
+            if child.__parent is not self:
+                raise ValueError("Can only detach the children of this node.")
+        NodeMixin._detachNodes(children)
+        for child in children:
+            child.__updateDepth()
+
+
+    def moveRange(self, start: int, count: int, newParent: object, destRow: int):
+        """ Moves a contiguous range of this node's children to a new parent/row.
+
+        Follows the same convention as QAbstractItemModel.moveRows, destRow is the row in
+        newParent's children (before the move) that the range will be inserted in front of.
+        
+        Args:
+            start: Index of the first child to move.
+            count: Number of children to move.
+            newParent: The node that will be the new parent of the range, may be this node.
+            destRow: The row in newParent to insert the range before.
+        """
+        parentsChildren = self.__children
+        if count <= 0:
+            return
+        if start < 0 or start + count > len(parentsChildren):
+            raise IndexError("Range to move is outside of this node's children.")
+        block = parentsChildren[start:start + count]
+        if newParent is self:
+            if start <= destRow <= start + count:
+                return
+            if destRow > start:
+                destRow -= count
+        else:
+            for child in block:
+                if child is newParent or child.isAncestorOf(newParent):
+                    raise CircularTreeError
+        del parentsChildren[start:start + count]
+        NodeMixin._renumber(parentsChildren, start, len(parentsChildren))
+        self.onChildrenRemoved(list(range(start, start + count)), block)
+        destChildren = newParent.__children
+        destChildren[destRow:destRow] = block
+        NodeMixin._renumber(destChildren, destRow, len(destChildren))
+        if newParent is not self:
+            for child in block:
+                child.__parent = newParent
+                child.__updateDepth()
+                self.__unindexChild(child)
+                newParent.__indexChild(child)
+            self.invalidateAggregates()
+            newParent.invalidateAggregates()
+        newParent.onChildrenInserted(destRow, count)
+        if newParent is not self:
+            newParent.onChange(children=True)
+        self.onChange(children=True)
+
+
+    def _validateNewChildren(self, children: list):
+        """ Raises an error if the given nodes cannot all become children of this node. 
+        
+        Args:
+            children: List of nodes that will be attached to this node.
+        """
+        seen = set()
+        for child in children:
+            if child is self or child.isAncestorOf(self):
+                raise CircularTreeError
+            if id(child) in seen:
+                raise ValueError("A node can only be added to the children of a node once.")
+            seen.add(id(child))
+
+
+    @staticmethod
+    def _detachNodes(nodes: list):
+        """ Removes the given nodes from their parents, rebuilding each parent's children list once. 
+        
+        Args:
+            nodes: List of nodes to detach, nodes without a parent are ignored.
+        """
+        byParent = {}
+        for node in nodes:
+            parent = node.__parent
+            if parent is not None:
+                byParent.setdefault(id(parent), (parent, []))[1].append(node)
+        for parent, removed in byParent.values():
+            parentsChildren = parent.__children
+            removed.sort(key=lambda node: node.__row)
+            rows = [node.__row for node in removed]
+            first = rows[0]
+            if len(removed) == 1:
+                del parentsChildren[first]
+            else:
+                removedIds = {id(node) for node in removed}
+                parentsChildren[first:] = [c for c in parentsChildren[first:] if id(c) not in removedIds]
+            NodeMixin._renumber(parentsChildren, first, len(parentsChildren))
+            for node in removed:
+                node.__parent = None
+                node.__row = None
+                parent.__unindexChild(node)
+            parent.invalidateAggregates()
+            parent.onChildrenRemoved(rows, removed)
+            parent.onChange(children=True)
 
 
     @property
     def root(self) -> object:
         """ Returns the root node of the tree. """
+        # Loops are refused when a parent is set, so walking up always terminates
         node = self
-        while node.parent is not None:
-            node = node.parent
-            # Then we must have looped back to ourself and the tree has a loop
-            if node == self:
-                raise CircularTreeError
+        while node.__parent is not None:
+            node = node.__parent
         return node
 
 
+    @property
+    def depth(self) -> int:
+        """ Returns the number of edges between this node and the root, 0 for the root. """
+        return self.__depth
+
+
+    def isAncestorOf(self, node: object) -> bool:
+        """ Returns if this node is a strict ancestor of the given node.
+
+        Only walks up from the given node as far as this node's depth, so it costs
+        the difference in depth rather than the distance to the root. An Euler tour interval
+        index would answer in O(1) but has to renumber the tree on every move, the trees here
+        are shallow and edited often so the walk is faster overall, see benchAncestry in
+        benchmarks/bench_tree.py.
+
+        Args:
+            node: The node that may be a descendant of this node.
+        """
+        if not self.__children:
+            return False
+        steps = node.__depth - self.__depth
+        if steps <= 0:
+            return False
+        for i in range(steps):
+            node = node.__parent
+        return node is self
+
+
+    def lowestCommonAncestor(self, node: object) -> object:
+        """ Returns the deepest node that is an ancestor of (or equal to) both this node and the given node.
+
+        Returns None if the two nodes are in different trees.
+
+        Args:
+            node: The node to find the common ancestor with.
+        """
+        a = self
+        b = node
+        while a.__depth > b.__depth:
+            a = a.__parent
+        while b.__depth > a.__depth:
+            b = b.__parent
+        while a is not b:
+            a = a.__parent
+            b = b.__parent
+        return a
+
+
     @property
     def row(self) -> int:
         """ Returns the index of this node in its parent's children list. 
 
         Returns None if the node is the root.
         """
-        parent = self.__parent
-        if self.isRoot():
-            return None
-        parentsChildren = parent.__children
-        return parentsChildren.index(self)
+        return self.__row
 
 
     @row.setter
@@ -126,8 +441,199 @@ class NodeMixin():
         if self.__parent is not None:
             parent = self.__parent
             parentsChildren = parent.__children
-            parentsChildren.remove(self)
-            parentsChildren.insert(value, self)
+            oldRow = self.__row
+            del parentsChildren[oldRow]
+            parent.onChildrenRemoved([oldRow], [self])
+            # Resolve the index the same way list.insert does so negative indices work
+            newRow = value
+            if newRow < 0:
+                newRow = max(newRow + len(parentsChildren), 0)
+            newRow = min(newRow, len(parentsChildren))
+            parentsChildren.insert(newRow, self)
+            # Only the nodes between the old and new position change index
+            NodeMixin._renumber(parentsChildren, min(oldRow, newRow), max(oldRow, newRow) + 1)
+            parent.onChildrenInserted(newRow, 1)
+            parent.onChange(children=True)
+
+
+    @classmethod
+    def registerAggregate(cls, name: str, attribute: str, reduction='sum'):
+        """ Registers a reduction of a node attribute over the subtree of every node of this class.
+
+        The value is computed the first time it is requested and cached on every node of the subtree.
+        Moving nodes invalidates the cache along the ancestor path, so the next request only recomputes
+        the nodes whose subtree changed. Nodes that change the attribute should call invalidateAggregates.
+
+        Args:
+            name: Name used to request the value with aggregate.
+            attribute: Name of the node attribute to reduce, nodes without it (or set to None) are skipped.
+            reduction: 'sum', 'min', 'max' or a function taking a list of values and returning their reduction.
+        """
+        if 'subtreeAggregates' not in cls.__dict__:
+            cls.subtreeAggregates = dict(cls.subtreeAggregates)
+        cls.subtreeAggregates[name] = SubtreeAggregate(attribute, reduction)
+
+
+    def aggregate(self, name: str) -> object:
+        """ Returns the value of a registered aggregate over the subtree rooted at this node.
+
+        Args:
+            name: Name the aggregate was registered with.
+        """
+        definition = self.subtreeAggregates[name]
+        cache = self.__aggregates
+        if cache is not None and name in cache:
+            return cache[name]
+        # Children are visited before their parent, subtrees that are still cached are not entered
+        isCached = lambda node: node.__aggregates is not None and name in node.__aggregates
+        for node in self._iterPostOrder(isCached, None):
+            if isCached(node):
+                continue
+            values = [child.__aggregates[name] for child in node.__children]
+            if node.__aggregates is None:
+                node.__aggregates = {}
+            node.__aggregates[name] = definition.compute(node, values)
+        return self.__aggregates[name]
+
+
+    def numDescendants(self) -> int:
+        """ Returns the number of nodes below this node, using the cached subtree aggregates. """
+        return self.aggregate('descendants')
+
+
+    def invalidateAggregates(self):
+        """ Discards the cached aggregates of this node and its ancestors.
+
+        Stops at the first ancestor that is already invalid because its ancestors must be invalid too.
+        """
+        node = self
+        while node is not None and node.__aggregates is not None:
+            node.__aggregates = None
+            node = node.__parent
+
+
+    def onChange(self, children: bool = False):
+        """ Called after this node was renamed or, when children is True, after its list of children changed.
+
+        Does nothing here, subclasses override it to react to changes in the tree (e.g. tracking unsaved changes).
+
+        Args:
+            children: True if children were added, removed or reordered, False if the node itself changed.
+        """
+        pass
+
+
+    def onChildrenRemoved(self, rows: list, children: list):
+        """ Called as soon as children have been removed from this node, before onChange.
+
+        A move calls onChildrenRemoved on the old parent then onChildrenInserted on the new one, the
+        tree is in the state between the two when the first is called. Does nothing here.
+
+        Args:
+            rows: Sorted rows the children had before they were removed.
+            children: The removed children, in the same order as rows.
+        """
+        pass
+
+
+    def onChildrenInserted(self, row: int, count: int):
+        """ Called as soon as children have been inserted in this node, before onChange. Does nothing here.
+
+        Args:
+            row: Row of the first inserted child.
+            count: Number of children inserted, they are the contiguous rows starting at row.
+        """
+        pass
+
+
+    def childByName(self, name: str) -> object:
+        """ Returns the child with the given name, the first one if several share it, None if there is none.
+
+        Args:
+            name: The name of the child to find.
+        """
+        index = self.__nameIndex
+        if index is None:
+            index = self.__buildNameIndex()
+        matches = index.get(name)
+        if not matches:
+            return None
+        if len(matches) == 1:
+            return matches[0]
+        return min(matches, key=lambda child: child.__row)
+
+
+    def find(self, path: str) -> object:
+        """ Returns the node at the given '/' separated path of names below this node, None if it doesn't exist.
+
+        For example root.find("File1/Folder3/Node17").
+
+        Args:
+            path: Names of the nodes to step through, starting with a child of this node.
+        """
+        node = self
+        for name in path.strip('/').split('/'):
+            if name == '':
+                continue
+            node = node.childByName(name)
+            if node is None:
+                return None
+        return node
+
+
+    @property
+    def path(self) -> str:
+        """ Returns the '/' separated names from the root (exclusive) to this node, so node.root.find(node.path) is node. """
+        names = []
+        node = self
+        while node.__parent is not None:
+            names.append(str(node.__name))
+            node = node.__parent
+        return '/'.join(reversed(names))
+
+
+    def duplicateChildNames(self) -> set:
+        """ Returns the set of names shared by more than one child of this node. """
+        if self.__nameIndex is None:
+            self.__buildNameIndex()
+        return set(self.__duplicateNames)
+
+
+    def __buildNameIndex(self) -> dict:
+        """ Builds the name index of this node's children, it is kept up to date from then on. """
+        self.__nameIndex = {}
+        self.__duplicateNames = set()
+        for child in self.__children:
+            self.__indexChild(child)
+        return self.__nameIndex
+
+
+    def __indexChild(self, child: object):
+        """ Adds a child to the name index if the index has been built. """
+        index = self.__nameIndex
+        if index is None:
+            return
+        name = child.__name
+        matches = index.get(name)
+        if matches is None:
+            index[name] = [child]
+        else:
+            matches.append(child)
+            self.__duplicateNames.add(name)
+
+
+    def __unindexChild(self, child: object):
+        """ Removes a child from the name index if the index has been built. """
+        index = self.__nameIndex
+        if index is None:
+            return
+        name = child.__name
+        matches = index[name]
+        matches.remove(child)
+        if not matches:
+            del index[name]
+        elif len(matches) == 1:
+            self.__duplicateNames.discard(name)
 
 
     def isRoot(self) -> bool:
@@ -138,6 +644,11 @@ class NodeMixin():
     def numChildren(self) -> int:
         """ Returns the number of children this node has. """
         return len(self.__children)
+
+
+    def childAt(self, row: int) -> object:
+        """ Returns the child at the given row. """
+        return self.__children[row]
     
 
     def nextSibling(self) -> object:
@@ -157,11 +668,73 @@ class NodeMixin():
         return iter(self.__children)
     
 
-    def iterSubTree(self) -> object:
-        """ Iterates through the subtree with this node as the root in depth first order."""
-        yield self
-        for c in self:
-            yield from c.iterSubTree()
+    def iterSubTree(self, order: str = 'pre', prune: Callable = None, maxDepth: int = None) -> object:
+        """ Iterates through the subtree with this node as the root.
+
+        Uses an explicit stack/queue rather than recursion, so each node costs O(1) to yield
+        and the depth of the tree is not limited by the recursion limit.
+
+        Args:
+            order: 'pre' for depth first order with parents before children (order displayed in the gui),
+                'post' for depth first order with children before parents and 'breadth' for level order.
+            prune: Optional function called with each node, if it returns True the node is still
+                yielded but its children are skipped.
+            maxDepth: Optional number of levels below this node to visit, 0 only yields this node.
+        """
+        if order == 'pre':
+            return self._iterPreOrder(prune, maxDepth)
+        elif order == 'post':
+            return self._iterPostOrder(prune, maxDepth)
+        elif order == 'breadth':
+            return self._iterBreadthFirst(prune, maxDepth)
+        raise ValueError("Unknown traversal order '{}'.".format(order))
+
+
+    def _expand(self, node: object, prune: Callable, limit: int) -> bool:
+        """ Returns if the traversal should descend into the children of node. """
+        if not node.__children:
+            return False
+        if limit is not None and node.__depth >= limit:
+            return False
+        return prune is None or not prune(node)
+
+
+    def _iterPreOrder(self, prune: Callable, maxDepth: int):
+        """ Depth first traversal that yields each node before its children. """
+        limit = None if maxDepth is None else self.__depth + maxDepth
+        expand = self._expand
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if expand(node, prune, limit):
+                stack.extend(reversed(node.__children))
+
+
+    def _iterPostOrder(self, prune: Callable, maxDepth: int):
+        """ Depth first traversal that yields each node after its children. """
+        limit = None if maxDepth is None else self.__depth + maxDepth
+        expand = self._expand
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited or not expand(node, prune, limit):
+                yield node
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.__children))
+
+
+    def _iterBreadthFirst(self, prune: Callable, maxDepth: int):
+        """ Level order traversal that yields all nodes at one depth before the next depth. """
+        limit = None if maxDepth is None else self.__depth + maxDepth
+        expand = self._expand
+        queue = deque([self])
+        while queue:
+            node = queue.popleft()
+            yield node
+            if expand(node, prune, limit):
+                queue.extend(node.__children)
 
 
 class CircularTreeError(Exception):
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal, pyqtSlot
+
+
+class _SaveJob():
+    """ A save of one FileNode that has been handed to a worker thread. """
+    def __init__(self, fileNode, filename, snapshot):
+        self.fileNode = fileNode
+        self.filename = filename
+        self.snapshot = snapshot
+        self.future = None
+        self.finished = False
+
+
+class BackgroundSaver(QtCore.QObject):
+    """ Saves FileNodes without blocking the GUI thread.
+
+    The data to save is captured on the GUI thread with FileNode.takeSnapshot, which only reads the tree,
+    then serialized and written on a worker thread. Each file is written to a temporary file first and
+    renamed over the old one. Saves of a FileNode requested while one is in flight are coalesced into a
+    single save that starts, with a fresh snapshot, once the running one finishes.
+
+    Signals:
+        saveFinished(object, str): Emitted on the GUI thread with the FileNode and filename once a save succeeded.
+        saveFailed(object, str): Emitted on the GUI thread with the FileNode and the error if a save failed.
+    """
+    maxWorkers = 2
+
+    saveFinished = pyqtSignal(object, str)
+    saveFailed = pyqtSignal(object, str)
+    # Emitted from the worker thread, delivered to _finish on the GUI thread by the queued connection
+    _written = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers)
+        # Running save and filename of the next save for each FileNode, keyed by id
+        self._running = {}
+        self._pending = {}
+        self._written.connect(self._finish, QtCore.Qt.QueuedConnection)
+
+
+    def save(self, fileNode, filename: str):
+        """ Starts saving fileNode to filename, or queues the save if the FileNode is already being saved.
+
+        Args:
+            fileNode: The FileNode to save.
+            filename: The filename to save it to.
+        """
+        key = id(fileNode)
+        if key in self._running:
+            self._pending[key] = (fileNode, filename)
+            return
+        job = _SaveJob(fileNode, filename, fileNode.takeSnapshot(filename))
+        self._running[key] = job
+        job.future = self._executor.submit(job.snapshot.write)
+        job.future.add_done_callback(lambda future: self._written.emit(job))
+
+
+    def isSaving(self, fileNode) -> bool:
+        """ Returns True if a save of fileNode is running or queued. """
+        return id(fileNode) in self._running
+
+
+    def waitForDone(self):
+        """ Blocks until every running and queued save has finished, for example before the application quits. """
+        while self._running:
+            jobs = list(self._running.values())
+            wait([job.future for job in jobs])
+            for job in jobs:
+                self._finish(job)
+
+
+    @pyqtSlot(object)
+    def _finish(self, job):
+        """ Updates the tree with the result of a save and starts the queued one, runs on the GUI thread. """
+        if job.finished:
+            return
+        job.finished = True
+        key = id(job.fileNode)
+        del self._running[key]
+        error = job.future.exception()
+        if error is None:
+            job.snapshot.markSaved()
+            self.saveFinished.emit(job.fileNode, job.filename)
+        else:
+            job.snapshot.markFailed()
+            self.saveFailed.emit(job.fileNode, str(error))
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            self.save(*pending)
+
+
+    def shutdown(self):
+        """ Waits for the running saves and stops the worker threads. """
+        self.waitForDone()
+        self._executor.shutdown()
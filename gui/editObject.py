@@ -13,6 +13,38 @@ from objectgui.gui.ui.ui_EditObject import Ui_EditObject
 
 
 class EditObject(QWidget, Ui_EditObject):
+    """ Outer edit box with the cancel and submit buttons, shows the inner form of the node it is bound to. """
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
+        self.editFormInner = None
+        # The buttons go through the bound node so the form can be rebound to another node
+        self.cancelButton.clicked.connect(self.cancel)
+        self.okButton.clicked.connect(self.submit)
+
+
+    def bindNode(self, node):
+        """ Binds the form to the given node, rebinding the inner form if there is one.
+
+        Args:
+            node: The node the form edits.
+        """
+        self.parent = node
+        if self.editFormInner is not None and hasattr(self.editFormInner, 'bindNode'):
+            self.editFormInner.bindNode(node)
+
+
+    def setInnerForm(self, editFormInner):
+        """ Shows the given inner form in the scroll area. """
+        self.editFormInner = editFormInner
+        self.scrollArea.setWidget(editFormInner)
+
+
+    @pyqtSlot()
+    def cancel(self):
+        self.parent.cancelForm()
+
+
+    @pyqtSlot()
+    def submit(self):
+        self.parent.submitForm()
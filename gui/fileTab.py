@@ -3,7 +3,7 @@ import sys
 from objectgui.gui import util
 
 from PyQt5.QtWidgets import (
-    QWidget, QFileDialog, QMenu, QHeaderView, QToolBar, QAction, QMainWindow
+    QWidget, QFileDialog, QMenu, QHeaderView, QToolBar, QAction, QMainWindow, QLineEdit
 )
 
 from PyQt5 import QtGui
@@ -13,6 +13,8 @@ from PyQt5.QtCore import pyqtSlot
 
 from objectgui.gui.ui.ui_FileTab import Ui_FileTabWidget
 from objectgui.gui.treeModel import TreeModel
+from objectgui.gui.searchProxy import SearchProxyModel
+from objectgui.core.node import Node
 from objectgui.core.fileNode import FileNode
 
 
@@ -23,25 +25,35 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
     for creating and saving files.
 
     Attributes:
-        saveFilter (str): The filter to use when saving files. Defaults to "Project File (*.json)".
-        openFilter (str): The filter to use when opening files. Defaults to "Project File (*.json)".
+        saveFilter (str): The filter to use when saving files. Offers the json and binary project formats.
+        openFilter (str): The filter to use when opening files. Accepts both project formats.
         fileNodeCls (class): The class to use for file nodes. Defaults to FileNode. 
 
     Signals:
-        saveSuccessful(str): Emitted when a file is saved successfully. Contains the filename.
+        saveSuccessful(str): Emitted when a file has been saved successfully. Contains the filename.
+            With a saver the save runs in the background and this is emitted once it finishes.
 
     Methods:
         newFileTab(): Returns a new, empty FileTab instance.
         load(filename: str): Returns a new FileTab instance with the contents of the specified file.
+        setSaver(saver): Makes saves run in the background on the given BackgroundSaver.
         save(): Saves the current file.
         save_as(): Saves the current file with a new filename.
         addNode(node): Adds gui functionality to the given node by connecting signals and slots.
-        showEditObjectWidget(widget): Shows the given editForm in the location where the object tree normally is.
+        addNodes(nodes): Adds several nodes with a single update of the tree view.
+        editFormFor(node): Returns the edit form for the given node, shared between nodes of the same class when possible.
+        showEditObjectWidget(widget): Shows the given node's editForm in the location where the object tree normally is.
+        search(text): Shows only the nodes matching text, with their ancestors.
+        closeSearch(): Frees the search index, called when the tab is closed.
         openMenu(point): Displays an appropriate context menu at the given point on the tree view.
     """
-    saveFilter = "Project File (*.json)"
-    openFilter = "Project File (*.json)"
+    saveFilter = "Project File (*.json);;Binary Project File (*.ogb)"
+    openFilter = "Project File (*.json *.ogb)"
     fileNodeCls = FileNode
+    # BackgroundSaver used by save, if None the tab saves synchronously
+    saver = None
+    # Search results whose branches are expanded, the filtered tree is fully expanded when it has fewer matches
+    maxExpandedMatches = 500
 
     saveSuccessful = pyqtSignal(str)
 
@@ -54,6 +66,10 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
         self.lastPath = ""
         self.actions = actions
         self.editWidgetVisible = False
+        # Name and filename to restore if a save as running in the background fails
+        self._saveAsRollback = None
+        # Edit forms shared by all the nodes of an editFormInnerClass that supports rebinding
+        self.editFormPool = {}
 
         self.model = TreeModel(fileNode)
         self.objectTreeView.setModel(self.model)
@@ -63,6 +79,14 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
 
         self.objectTreeView.customContextMenuRequested.connect(self.openMenu)
 
+        # The search index is only built when the first search is typed
+        self.searchModel = None
+        self.searchBox = QLineEdit(self)
+        self.searchBox.setPlaceholderText("Search")
+        self.searchBox.setClearButtonEnabled(True)
+        self.toolBar.addWidget(self.searchBox)
+        self.searchBox.textChanged.connect(self.search)
+
     
     @classmethod
     def newFileTab(cls, actions):
@@ -76,7 +100,8 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
     @classmethod
     def load(cls, filename, actions):
         """ Returns a new FileTab instance constructed from the contents of the specified file. """
-        fileNode = cls.fileNodeCls.load(filename)
+        # Nested files are read when they are expanded
+        fileNode = cls.fileNodeCls.load(filename, lazy=True)
         fileTab = cls(fileNode.name, fileNode, actions)
         fileTab.connectNodes()
         return fileTab
@@ -88,21 +113,39 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
         Args:
             node: Tree node to add to the gui.
         """
+        self.addNodes([node])
+
+
+    def addNodes(self, nodes):
+        """ Adds several new nodes at the end of the file, the tree view is updated once for all of them.
+
+        Args:
+            nodes: Tree nodes to add to the gui, with their subtrees.
+        """
         model = self.model
         parentInd = model.createIndex(0, 0, self.fileNode)
-        rowCount = model.rowCount(parentInd)
-        self.model.addRow(rowCount, parentInd, node)
-
-        self.connectNodeSignals(node)
+        model.insertNodes(nodes, parentInd)
+        for node in nodes:
+            for n in node.iterSubTree():
+                self.connectNodeSignals(n)
     
 
     def connectNodeSignals(self, node):
         node.editSubmitted.connect(self.hideEditObjectWidget)
         node.editCancelled.connect(self.hideEditObjectWidget)
+        if isinstance(node, FileNode):
+            node.childrenFetched.connect(self.connectFetchedNodes)
+    
+
+    def connectFetchedNodes(self, children):
+        """ Connects the nodes read from the file of a placeholder node once they are fetched. """
+        for child in children:
+            for n in child.iterSubTree():
+                self.connectNodeSignals(n)
     
 
     def connectNodes(self):
-        for i, node in enumerate(self.fileNode.iterSubTree()):
+        for node in self.fileNode.iterSubTree():
             self.connectNodeSignals(node)
     
 
@@ -121,14 +164,38 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
         menu.exec_(self.objectTreeView.viewport().mapToGlobal(point))
 
     
+    def editFormFor(self, node):
+        """ Returns the edit form for the given node, creating it if this is the first time it is needed.
+
+        If the node's editFormInnerClass can be rebound to another node (has a bindNode method),
+        one form is created per class and rebound to each node as it is edited.
+
+        Args:
+            node: The node to edit.
+        """
+        innerClass = node.editFormInnerClass
+        if innerClass is None or not hasattr(innerClass, 'bindNode'):
+            return node.editForm
+        form = self.editFormPool.get(innerClass)
+        if form is None:
+            form = node.editForm
+            self.editFormPool[innerClass] = form
+        else:
+            form.bindNode(node)
+        return form
+
+
     def showEditObjectWidget(self, widget):
         """ Shows the given editForm in the location where the object tree normally is.
 
         Args:
-            widget: The editForm to display in the FileTab.
+            widget: The editForm to display in the FileTab, or the node to edit in which case
+                its editForm is created (or taken from the pool) now.
         """
         if self.editWidgetVisible:
             return
+        if isinstance(widget, Node):
+            widget = self.editFormFor(widget)
         layout = self.featureLayout
         widget.parent.cacheAttributes()
         self.objectTreeView.hide()
@@ -161,6 +228,13 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
             action.setEnabled(False)
     
 
+    def setSaver(self, saver):
+        """ Makes saves run in the background on the given BackgroundSaver. """
+        self.saver = saver
+        saver.saveFinished.connect(self._saveFinished)
+        saver.saveFailed.connect(self._saveFailed)
+
+
     def save(self):
         """ Saves the currently active tab to the existing filename. """
         # If the current tab has never been saved then call save as
@@ -168,7 +242,34 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
         if fileNode.filename is None:
             self.save_as()
         else:
-            fileNode.save(fileNode.filename)
+            self._startSave(fileNode.filename)
+
+
+    def _startSave(self, filename):
+        """ Saves the fileNode to filename in the background if the tab has a saver, otherwise right away. """
+        if self.saver is not None:
+            self.saver.save(self.fileNode, filename)
+        elif self.fileNode.save(filename):
+            self._saveFinished(self.fileNode, filename)
+        else:
+            self._saveFailed(self.fileNode, "The directory of {:s} doesn't exist.".format(filename))
+
+
+    def _saveFinished(self, fileNode, filename):
+        """ Lets the application know the file has been saved. """
+        if fileNode is not self.fileNode:
+            return
+        self._saveAsRollback = None
+        self.saveSuccessful.emit(filename)
+
+
+    def _saveFailed(self, fileNode, error):
+        """ Restores the name and filename the file had before a failed save as. """
+        if fileNode is not self.fileNode:
+            return
+        if self._saveAsRollback is not None:
+            fileNode.name, fileNode.filename = self._saveAsRollback
+            self._saveAsRollback = None
     
 
     def save_as(self):
@@ -185,22 +286,69 @@ class FileTab(QMainWindow, Ui_FileTabWidget):
         # If the user clicks cancel an empty string is returned, in this case do nothing
         if filename == '':
             return
+        self._saveAsRollback = (fileNode.name, fileNode.filename)
         fileNode.filename = filename
-        name = os.path.splitext(os.path.split(fileNode.filename)[1])[0]
-        oldName = fileNode.name
-        oldfilename = fileNode.filename
-        fileNode.name = name
-
-        # Let the application know we have saved the tab with a specific name
-        if fileNode.save(fileNode.filename):
-            self.saveSuccessful.emit(fileNode.filename)
-        else:
-            fileNode.name = oldName
-            fileNode.filename = oldfilename
+        fileNode.name = os.path.splitext(os.path.split(filename)[1])[0]
+
+        # saveSuccessful lets the application know we have saved the tab with a specific name
+        self._startSave(filename)
     
 
+    @pyqtSlot(str)
+    def search(self, text):
+        """ Shows only the nodes whose name contains text, with their ancestors, or the whole tree if text is empty.
+
+        Returns:
+            matches: The matching nodes, see SearchIndex.search.
+        """
+        view = self.objectTreeView
+        searchModel = self.searchModel
+        if not text:
+            if searchModel is not None and view.model() is searchModel:
+                searchModel.modelReset.disconnect(self._expandMatches)
+                view.setModel(self.model)
+                view.setExpanded(self.model.index(0, 0, QtCore.QModelIndex()), True)
+            if searchModel is not None:
+                # Clears the old query so the hidden proxy stops running it again on every edit
+                searchModel.setSearchText('')
+            return []
+        if searchModel is None:
+            searchModel = self.searchModel = SearchProxyModel(self.model)
+        matches = searchModel.setSearchText(text)
+        if view.model() is not searchModel:
+            view.setModel(searchModel)
+            # Connected after the view so the matches are expanded once the view has been reset
+            searchModel.modelReset.connect(self._expandMatches)
+            self._expandMatches()
+        return matches
+
+
+    def _expandMatches(self):
+        """ Expands the filtered tree so the matches are visible. """
+        model = self.searchModel
+        view = self.objectTreeView
+        if len(model.matches) <= self.maxExpandedMatches:
+            view.expandAll()
+            return
+        for node in model.matches[:self.maxExpandedMatches]:
+            index = model.indexOf(node).parent()
+            while index.isValid() and not view.isExpanded(index):
+                view.setExpanded(index, True)
+                index = index.parent()
+
+
+    def closeSearch(self):
+        """ Shows the whole tree and frees the search index, it stops being kept up to date. """
+        if self.searchModel is None:
+            return
+        self.search('')
+        self.searchModel.close()
+        self.searchModel = None
+
+
     @pyqtSlot(QPoint)
     def openMenu(self, point):
+        # Proxy indexes point to the nodes too, so this works while searching
         index = self.objectTreeView.indexAt(point)
         clickedItem = index.internalPointer()
 
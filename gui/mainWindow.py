@@ -4,12 +4,12 @@ import json
 from objectgui.gui import util
 
 from PyQt5.QtWidgets import (
-    QMainWindow, QFileDialog, QAction
+    QMainWindow, QFileDialog, QAction, QMessageBox
 )
-from PyQt5 import QtGui
-from PyQt5.QtCore import pyqtSlot
+from PyQt5.QtCore import pyqtSlot, QTimer
 
 from objectgui.gui.fileTab import FileTab
+from objectgui.gui.autosave import BackgroundSaver
 # We must do thi before importing ui_MainWindow
 #import objectgui.resources_rc
 #sys.modules['resources_rc'] = objectgui.resources_rc
@@ -25,6 +25,8 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
     recentlyOpenedSave = 'data/recentlyOpened.json'
     lastPathSave = 'data/lastPath.json'
     fileTabCls = FileTab
+    # Milliseconds between autosaves of the tabs that have a filename and unsaved changes, 0 disables autosave
+    autosaveInterval = 5 * 60 * 1000
 
 
     def __init__(self, parent=None, icon=None):
@@ -34,13 +36,21 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
         self.actions = {}
 
         if icon is None:
-            icon = QtGui.QIcon(util.iconPath('icons', 'icon32x32'))
+            icon = util.icon('icons', 'icon32x32')
         self.setWindowIcon(icon)
 
         self.lastPath = ""
         self.recentlyOpened = []
         self.loadRecentlyOpened()
         self.loadLastPath()
+
+        # Saves run on a worker thread so the window doesn't freeze on big trees
+        self.saver = BackgroundSaver(self)
+        self.saver.saveFailed.connect(self.saveFailed)
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.timeout.connect(self.autosave)
+        if self.autosaveInterval > 0:
+            self.autosaveTimer.start(self.autosaveInterval)
         
 
     def addAction(self, action: QAction, slotName: str):
@@ -124,10 +134,11 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
         fileTabs = self.fileTabs
         # Provide a default location for the save_as dialog for a new file
         tab.lastPath = self.lastPath
-        args = tab.fileNode.iconPath()
-        fileTabs.addTab(tab, QtGui.QIcon(util.iconPath(*args)), tab.name)
+        fileTabs.addTab(tab, util.icon(*tab.fileNode.iconPath()), tab.name)
         fileTabs.setCurrentWidget(tab)
+        tab.setSaver(self.saver)
         tab.saveSuccessful.connect(self.addRecentlyOpened)
+        tab.saveSuccessful.connect(lambda filename: self.updateTabNames())
 
         # If this is the first tab added, enable save buttons etc.
         if fileTabs.count() == 1:
@@ -138,6 +149,7 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
         fileTabs = self.fileTabs
         tab = fileTabs.widget(index)
         fileTabs.removeTab(index)
+        tab.closeSearch()
         if fileTabs.count() == 0:
             self.disableTabActions()
     
@@ -152,7 +164,19 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
     @pyqtSlot(int)
     def closeTabDialog(self, index):
         """ Open a closed tab dialog if the window has not been saved. """
-        # This will probably be easier to do once the undo functionality is implemented
+        tab = self.fileTabs.widget(index)
+        if tab.fileNode.hasUnsavedChanges():
+            buttons = QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+            text = "Save the changes to {:s} before closing?".format(tab.fileNode.name)
+            answer = QMessageBox.question(self, "Unsaved Changes", text, buttons, QMessageBox.Save)
+            if answer == QMessageBox.Cancel:
+                return
+            if answer == QMessageBox.Save:
+                tab.save()
+                self.saver.waitForDone()
+                # The user cancelled the save as dialog or the save failed
+                if tab.fileNode.hasUnsavedChanges():
+                    return
         self.closeTab(index)
 
 
@@ -280,7 +304,7 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
 
     @pyqtSlot()
     def save(self):
-        """ Save the currently active tab to the existing filename. """
+        """ Save the currently active tab to the existing filename, the file is written in the background. """
         self.activeTab.save()
         self.updateTabNames()
 
@@ -292,9 +316,27 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
         self.updateTabNames()
 
 
+    @pyqtSlot()
+    def autosave(self):
+        """ Saves the tabs that have been saved before and have unsaved changes, in the background. """
+        fileTabs = self.fileTabs
+        for i in range(fileTabs.count()):
+            tab = fileTabs.widget(i)
+            fileNode = tab.fileNode
+            if fileNode.filename is not None and fileNode.hasUnsavedChanges() and not self.saver.isSaving(fileNode):
+                tab.save()
+
+
+    @pyqtSlot(object, str)
+    def saveFailed(self, fileNode, error):
+        """ Lets the user know a save running in the background failed. """
+        self.updateTabNames()
+        QMessageBox.warning(self, "Save Failed", "{:s} could not be saved.\n{:s}".format(fileNode.name, error))
+
+
     @pyqtSlot()
     def save_all(self):
-        """ Save all open tabs to the existing filenames. """
+        """ Save all open tabs to the existing filenames, the files are written in the background. """
         fileTabs = self.fileTabs
         for i in range(fileTabs.count()):
             tab = fileTabs.widget(i)
@@ -344,6 +386,8 @@ class MainWindow(QMainWindow, ui_MainWindow.Ui_MainWindow):
         """ Reimplements the close event to handle clean-up operations. """
         self.saveRecentlyOpened()
         self.saveLastPath()
+        # Let the saves in flight finish before the application quits
+        self.saver.shutdown()
         # TODO, check if files are saved and prompt if not
         # Better handled attaching to the close signal of the tab
         
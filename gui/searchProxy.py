@@ -0,0 +1,151 @@
+from operator import attrgetter
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt
+
+from objectgui.core.searchIndex import SearchIndex
+
+
+class SearchProxyModel(QtCore.QAbstractProxyModel):
+    """ Shows the nodes of a TreeModel matching a search, with their ancestors so they appear where they are in the tree.
+
+    QSortFilterProxyModel asks whether every row of the source model is accepted each time the filter
+    changes, here the matches are looked up in a SearchIndex and only the branches leading to them are
+    built, so a search costs the same on a tree of a million nodes as on a small one. The nodes are the
+    internal pointers of the proxy's indexes like they are in the TreeModel.
+
+    The search is run again when the rows of the source model change, unless the search text is empty.
+    Nodes can't be dragged while the tree is filtered, and placeholder nodes aren't fetched.
+
+    Args:
+        model: The TreeModel to filter.
+        index: The SearchIndex of the model's tree, one is built if not given.
+    """
+    def __init__(self, model, index: SearchIndex = None):
+        super().__init__()
+        self.searchIndex = SearchIndex(model.objectTree) if index is None else index
+        self.text = ''
+        self.matches = []
+        # Visible children of each visible node, keyed by id, and the row of each visible node among them
+        self._children = {}
+        self._rows = {}
+        self.setSourceModel(model)
+        for signal in (model.rowsInserted, model.rowsRemoved, model.rowsMoved, model.layoutChanged,
+                       model.modelReset, model.dataChanged):
+            signal.connect(self.refresh)
+
+
+    def setSearchText(self, text: str) -> list:
+        """ Shows the nodes matching text and returns them, see SearchIndex.search. """
+        self.beginResetModel()
+        self.text = text
+        self.matches = self.searchIndex.search(text)
+        self._buildBranches(self.matches)
+        self.endResetModel()
+        return self.matches
+
+
+    def refresh(self, *args):
+        """ Runs the search again after the source model changed, nothing to do while the search is cleared. """
+        if self.text:
+            self.setSearchText(self.text)
+
+
+    def _buildBranches(self, matches: list):
+        """ Collects the visible children of every node on the path from the hidden root to a match. """
+        root = self.sourceModel().rootItem
+        visible = {id(root)}
+        children = {}
+        for node in matches:
+            parent = node.parent
+            while id(node) not in visible and parent is not None:
+                visible.add(id(node))
+                siblings = children.get(id(parent))
+                if siblings is None:
+                    children[id(parent)] = [node]
+                else:
+                    siblings.append(node)
+                node = parent
+                parent = node.parent
+        rows = {}
+        getRow = attrgetter('row')
+        for siblings in children.values():
+            siblings.sort(key=getRow)
+            for row, node in enumerate(siblings):
+                rows[id(node)] = row
+        self._children = children
+        self._rows = rows
+
+
+    def indexOf(self, node, column: int = 0):
+        """ Returns the index of a node in the proxy, the invalid index if the node isn't shown. """
+        row = self._rows.get(id(node))
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, node)
+
+
+    def _node(self, index):
+        """ Returns the node of a proxy index, the hidden root for the invalid index. """
+        if not index.isValid():
+            return self.sourceModel().rootItem
+        return index.internalPointer()
+
+
+    def index(self, row, column, parentInd):
+        siblings = self._children.get(id(self._node(parentInd)), ())
+        if 0 <= row < len(siblings) and 0 <= column < self.columnCount(parentInd):
+            return self.createIndex(row, column, siblings[row])
+        return QtCore.QModelIndex()
+
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.indexOf(index.internalPointer().parent)
+
+
+    def rowCount(self, parentInd):
+        if parentInd.column() > 0:
+            return 0
+        return len(self._children.get(id(self._node(parentInd)), ()))
+
+
+    def hasChildren(self, parentInd):
+        return self.rowCount(parentInd) > 0
+
+
+    def columnCount(self, parentInd):
+        return self.sourceModel().columnCount(QtCore.QModelIndex())
+
+
+    def canFetchMore(self, parentInd):
+        """ Placeholders aren't fetched while searching, only their nodes already read are searched. """
+        return False
+
+
+    def flags(self, index):
+        """ Nodes can't be dragged or dropped on while the tree is filtered, their rows aren't the source rows. """
+        flags = super().flags(index)
+        return flags & ~(Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+
+
+    def mapToSource(self, proxyIndex):
+        if not proxyIndex.isValid():
+            return QtCore.QModelIndex()
+        return self.sourceModel()._indexFor(proxyIndex.internalPointer(), proxyIndex.column())
+
+
+    def mapFromSource(self, sourceIndex):
+        if not sourceIndex.isValid():
+            return QtCore.QModelIndex()
+        return self.indexOf(sourceIndex.internalPointer(), sourceIndex.column())
+
+
+    def close(self):
+        """ Stops following the source model and frees the search index. """
+        model = self.sourceModel()
+        for signal in (model.rowsInserted, model.rowsRemoved, model.rowsMoved, model.layoutChanged,
+                       model.modelReset, model.dataChanged):
+            signal.disconnect(self.refresh)
+        self.searchIndex.close()
@@ -5,15 +5,19 @@ from PyQt5.QtWidgets import (
     QWidget
 )
 
-from PyQt5 import QtGui
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt, QMimeData
 
 from objectgui.core.tree import NodeMixin
+from objectgui.core.node import Node
+from objectgui.core.compactTree import CompactNode
 
 
 class RootNode(NodeMixin):
     """ Blank node class for the invisible root node. """
+    # The file node shown in the view is the outermost file, see Node.owningFile
+    ownFile = False
+
     def __init__(self):
         super().__init__()
         self.name = "Root"
@@ -33,12 +37,34 @@ class DragMimeData(QMimeData):
 
 class TreeModel(QtCore.QAbstractItemModel):
     # I have no idea how some of this works, just translated the qt example into python
+    # A drop or removal scattered over more ranges than this is applied as one layout change instead of
+    # a notification per range
+    maxDropMoves = 32
+    # Nodes with more children than this show them in batches of this many rows, the next batch is
+    # fetched when the view scrolls to the last row shown
+    fetchBatchSize = 1000
+
     def __init__(self, objectTree):
         super().__init__()
         # The root node is hidden so we make an empty root and make our root its child
-        self.rootItem = RootNode()
+        self.rootItem = self._createRootItem(objectTree)
         objectTree.parent = self.rootItem
         self.objectTree = objectTree
+        # Ids of the nodes moved by the last drop, the view asks to remove them afterwards
+        self._dropped = set()
+        # Number of children at the end of each wide node the view hasn't been told about yet, see _hidden.
+        # Keyed by the node rather than its id so the entry can't be inherited by a new node
+        self._hiddenRows = {}
+        # The indexes don't keep their nodes alive, CompactTree frees handles nothing references,
+        # so the handles given to Qt are kept by id, see _createIndex
+        self._handles = {} if isinstance(objectTree, CompactNode) else None
+
+
+    def _createRootItem(self, objectTree):
+        """ Creates the invisible root item using the same storage backend as the given tree. """
+        if isinstance(objectTree, CompactNode):
+            return objectTree.tree.newNode()
+        return RootNode()
 
 
     def index(self, row, column, parentInd):
@@ -50,8 +76,7 @@ class TreeModel(QtCore.QAbstractItemModel):
             parent = self.rootItem
         else:
             parent = parentInd.internalPointer()
-        child = parent.children[row]
-        return self.createIndex(row, column, child)
+        return self._createIndex(row, column, parent.childAt(row))
 
 
     def parent(self, index):
@@ -63,11 +88,11 @@ class TreeModel(QtCore.QAbstractItemModel):
 
         if parent == self.rootItem:
             return QtCore.QModelIndex()
-        return self.createIndex(parent.row, 0, parent)
+        return self._createIndex(parent.row, 0, parent)
 
 
     def rowCount(self, parentInd):
-        """ Returns the number of children under the given parent index. """
+        """ Returns the number of children under the given parent index that have been fetched, see fetchMore. """
         if parentInd.column() > 0:
             return 0
         
@@ -75,7 +100,122 @@ class TreeModel(QtCore.QAbstractItemModel):
             parent = self.rootItem
         else:
             parent = parentInd.internalPointer()
-        return parent.numChildren()
+        return parent.numChildren() - self._hidden(parent)
+
+
+    def hasChildren(self, parentInd):
+        """ Returns if the item has children, placeholders whose children haven't been read yet are assumed to. """
+        if self.canFetchMore(parentInd):
+            return True
+        return super().hasChildren(parentInd)
+
+
+    def canFetchMore(self, parentInd):
+        """ Returns if the item is a placeholder whose children still need to be read from disk, or has rows left to show. """
+        if not parentInd.isValid():
+            return False
+        item = parentInd.internalPointer()
+        if self._hiddenRows.get(item):
+            return True
+        return isinstance(item, Node) and item.hasUnfetchedChildren()
+
+
+    def fetchMore(self, parentInd):
+        """ Reads the children of a placeholder or shows the next batch of rows of a wide node.
+
+        Called by the view when the item is expanded and when it is scrolled to the last row shown.
+        """
+        if not self.canFetchMore(parentInd):
+            return
+        if self._readPlaceholder(parentInd):
+            return
+        item = parentInd.internalPointer()
+        hidden = self._hiddenRows[item]
+        first = item.numChildren() - hidden
+        count = min(hidden, self.fetchBatchSize)
+        self.beginInsertRows(parentInd, first, first + count - 1)
+        self._addHidden(item, -count)
+        self.endInsertRows()
+
+
+    def _readPlaceholder(self, parentInd) -> bool:
+        """ Reads the children of a placeholder, returns False if the item isn't one. """
+        item = self._item(parentInd)
+        if not isinstance(item, Node) or not item.hasUnfetchedChildren():
+            return False
+        children = item.readUnfetchedChildren()
+        # Fetched children go in front of the ones added to the placeholder
+        hidden = self._hiddenInserted(item, 0, len(children))
+        shown = len(children) - hidden
+        notify = shown > 0 and self._isShown(item)
+        if notify:
+            self.beginInsertRows(parentInd, 0, shown - 1)
+        item.attachFetchedChildren(children)
+        self._addHidden(item, hidden)
+        if notify:
+            self.endInsertRows()
+        return True
+
+
+    # Rows of wide nodes are shown in batches, only the rows at the end of a node are ever hidden so the
+    # rows of the model are the rows of the tree
+    # -------------------------------------------------------------------------
+    def _hidden(self, parent) -> int:
+        """ Returns the number of children at the end of parent the view hasn't been told about yet.
+
+        The first time the children of a node wider than fetchBatchSize are counted, only the first
+        batch is shown.
+        """
+        hidden = self._hiddenRows.get(parent)
+        if hidden is None:
+            count = parent.numChildren()
+            if count <= self.fetchBatchSize:
+                return 0
+            hidden = self._hiddenRows[parent] = count - self.fetchBatchSize
+        return hidden
+
+
+    def _addHidden(self, parent, count: int):
+        """ Adds count, which can be negative, to the hidden rows of parent, called once its children changed. """
+        hidden = self._hiddenRows.get(parent, 0) + count
+        if hidden or parent.numChildren() > self.fetchBatchSize:
+            self._hiddenRows[parent] = hidden
+        else:
+            self._hiddenRows.pop(parent, None)
+
+
+    def _hiddenIn(self, parent, row: int, count: int) -> int:
+        """ Returns how many of count children of parent starting at row are hidden. """
+        end = parent.numChildren() - self._hidden(parent)
+        return max(0, row + count - max(row, end))
+
+
+    def _hiddenInserted(self, parent, row: int, count: int) -> int:
+        """ Returns how many of count children about to be inserted at row of parent are hidden.
+
+        Rows inserted among the shown rows are shown and rows inserted among the hidden rows are hidden.
+        Rows inserted right after the last shown row are hidden if there are hidden rows, otherwise at most
+        a batch of them is shown.
+        """
+        hidden = self._hidden(parent)
+        end = parent.numChildren() - hidden
+        if row < end:
+            return 0
+        if row > end or hidden:
+            return count
+        return max(count - self.fetchBatchSize, 0)
+
+
+    def _isShown(self, node) -> bool:
+        """ Returns if the view has been told about a node, False if it or an ancestor is in the hidden rows of its parent. """
+        parent = node.parent
+        while parent is not None:
+            hidden = self._hidden(parent)
+            if hidden and node.row >= parent.numChildren() - hidden:
+                return False
+            node = parent
+            parent = node.parent
+        return True
 
 
     def columnCount(self, parentInd):
@@ -100,8 +240,7 @@ class TreeModel(QtCore.QAbstractItemModel):
         if role == Qt.DisplayRole:
             return item.getDisplayData(index.column())
         elif role == Qt.DecorationRole:
-            args = item.iconPath()
-            return QtGui.QIcon(util.iconPath(*args))
+            return util.icon(*item.iconPath())
         elif role == Qt.EditRole:
             return None
         elif role == Qt.ToolTipRole:
@@ -147,6 +286,7 @@ class TreeModel(QtCore.QAbstractItemModel):
         A subclass of QMimeData is used to pass the indexes directly to the drop handler.
         """
         mimedata = DragMimeData()
+        self._dropped = set()
         encoded_data = QtCore.QByteArray()
         stream = QtCore.QDataStream(encoded_data, QtCore.QIODevice.WriteOnly)
         for index in indexes:
@@ -166,6 +306,12 @@ class TreeModel(QtCore.QAbstractItemModel):
             return allow
         else:
             parent = parentInd.internalPointer()
+
+        # Refuse dropping a node into itself or one of its own descendants
+        for index in getattr(data, 'indexes', []):
+            item = index.internalPointer()
+            if item is parent or item.isAncestorOf(parent):
+                return False
         
         childInd = self.index(row, column, parentInd)
         if childInd.isValid():
@@ -192,70 +338,171 @@ class TreeModel(QtCore.QAbstractItemModel):
             #     new_items.append((text))
             #     rows += 1  
 
-            indexes = data.indexes
-            i = 0
+            # Read a placeholder's children first so the dropped rows go after them
+            self._readPlaceholder(parentInd)
             # If dropped on the parent, move to the end of the parent
             if row == -1:
-                row = self.rowCount(parentInd)
-            for index in indexes:
-                item = index.internalPointer()
-                sourceParentInd = self.parent(index)
-                sourceRow = item.row
-                # print("Target:", item.name, sourceRow, row + i)
-                self.moveRows(sourceParentInd, sourceRow, 1, parentInd, row + i)
-                i += 1
-                # Handle cases where some rows are before the drop point
-                if self.parent(index) == parentInd and sourceRow < row:
-                    row -= 1
-
+                row = self._item(parentInd).numChildren()
+            items = [index.internalPointer() for index in data.indexes if index.isValid()]
+            self.moveItems(items, parentInd, row)
+            self._dropped = set(map(id, items))
             return True
         else:
             return False
 
 
+    def moveItems(self, items: list, parentInd, row: int):
+        """ Moves nodes from anywhere in the tree so they are contiguous in front of the given row of a parent.
+
+        The nodes end up in the order they have in the tree, nodes whose ancestor is also moved move
+        with it. Each contiguous range of nodes is moved with a single moveRows, a selection scattered
+        over more than maxDropMoves ranges is moved in one step followed by a single layout change.
+
+        Args:
+            items: The nodes to move, none can be the parent or one of its ancestors.
+            parentInd: Index of the new parent.
+            row: Row of the parent, counted before the move, to insert the nodes in front of.
+        """
+        parent = self._item(parentInd)
+        items = self._topLevelItems(items)
+        if not items:
+            return
+        runs = self._contiguousRuns(items)
+        moved = set(map(id, items))
+        # The first node that stays, every range is inserted in front of it so they end up in order
+        anchor = next((child for child in parent.children[row:] if id(child) not in moved), None)
+        if len(runs) > self.maxDropMoves:
+            newRow = row - sum(1 for item in items if item.parent is parent and item.row < row)
+            self.layoutAboutToBeChanged.emit()
+            persistent = self.persistentIndexList()
+            hiddenRemoved = self._hiddenRemoved(items)
+            hiddenInserted = self._hiddenInserted(parent, row, len(items))
+            parent.attachMany(items, row=newRow)
+            for source, count in hiddenRemoved:
+                self._addHidden(source, -count)
+            self._addHidden(parent, hiddenInserted)
+            self.changePersistentIndexList(persistent, [self._updatedIndex(index) for index in persistent])
+            self.layoutChanged.emit()
+            return
+        for run in runs:
+            destinationRow = parent.numChildren() if anchor is None else anchor.row
+            # The parent's row changes when an earlier range was moved from above it
+            self.moveRows(self._indexFor(run[0].parent), run[0].row, len(run), self._indexFor(parent), destinationRow)
+
+
+    def _topLevelItems(self, items: list) -> list:
+        """ Returns the nodes without duplicates or nodes whose ancestor is in the list, in tree order. """
+        selected = set(map(id, items))
+        paths = {}
+        for item in items:
+            if id(item) in paths:
+                continue
+            path = [item.row]
+            node = item.parent
+            while node is not None and id(node) not in selected:
+                path.append(node.row)
+                node = node.parent
+            if node is None:
+                path.reverse()
+                paths[id(item)] = (path, item)
+        return [item for path, item in sorted(paths.values(), key=lambda entry: entry[0])]
+
+
+    @staticmethod
+    def _contiguousRuns(items: list) -> list:
+        """ Splits nodes in tree order into lists of siblings in consecutive rows. """
+        runs = []
+        for item in items:
+            if runs and runs[-1][-1].parent is item.parent and runs[-1][-1].row + 1 == item.row:
+                runs[-1].append(item)
+            else:
+                runs.append([item])
+        return runs
+
+
+    def _hiddenRemoved(self, nodes: list) -> list:
+        """ Returns (parent, count) for each parent of the nodes, count being how many of its nodes are hidden. """
+        counts = {}
+        for node in nodes:
+            parent = node.parent
+            entry = counts.setdefault(id(parent), [parent, 0])
+            entry[1] += self._hiddenIn(parent, node.row, 1)
+        return [entry for entry in counts.values() if entry[1]]
+
+
+    def _item(self, index):
+        """ Returns the node of an index, the hidden root for the invalid index. """
+        if not index.isValid():
+            return self.rootItem
+        return index.internalPointer()
+
+
+    def _indexFor(self, node, column: int = 0):
+        """ Returns the index of a node in the model, the invalid index for the hidden root. """
+        if node is self.rootItem:
+            return QtCore.QModelIndex()
+        return self._createIndex(node.row, column, node)
+
+
+    def _createIndex(self, row: int, column: int, node):
+        """ Creates an index pointing to a node, keeping the handle of a compact node alive while Qt may use it. """
+        if self._handles is not None:
+            self._handles[node.id] = node
+        return self.createIndex(row, column, node)
+
+
+    def _updatedIndex(self, index, removed: set = None):
+        """ Returns the index for the current position of the node of a persistent index after a layout change.
+
+        Args:
+            index: The persistent index.
+            removed: Ids of the nodes removed by the change, the indexes of their subtrees become invalid.
+                So do the indexes of nodes moved to the hidden rows of a wide node.
+        """
+        node = index.internalPointer()
+        if removed:
+            ancestor = node
+            while ancestor is not None and ancestor is not self.rootItem:
+                if id(ancestor) in removed:
+                    return QtCore.QModelIndex()
+                ancestor = ancestor.parent
+        if not self._isShown(node):
+            return QtCore.QModelIndex()
+        return self._indexFor(node, index.column())
+
+
     def moveRows(self, sourceParentInd, sourceRow, count, destinationParentInd, destinationRow):
-        """ Moves a item from one parent/row combination to a different parent/row combination. """
-        # Return false if we try and move an object on top of itself
+        """ Moves count rows from one parent/row combination to a different parent/row combination. """
+        # Return false if we try and move a range in front of itself or one of its own rows
         # This handles issues that occur when multiple rows are selected
-        if sourceParentInd == destinationParentInd and sourceRow == destinationRow:
-            return False
-        if sourceParentInd == destinationParentInd and sourceRow == destinationRow - 1:
+        if sourceParentInd == destinationParentInd and sourceRow <= destinationRow <= sourceRow + count:
             return False
-        
-        # XXX An invalid index is thrown when a item outside a folder is selected, followed by an item
-        # inside the folder and the resulting combo is dragged onto the folder 
-        # the items appear to be moved correctly by 
+
+        sourceParent = self._item(sourceParentInd)
+        destinationParent = self._item(destinationParentInd)
+        hiddenRemoved = self._hiddenIn(sourceParent, sourceRow, count)
+        hiddenInserted = self._hiddenInserted(destinationParent, destinationRow, count)
+        if hiddenRemoved or hiddenInserted or not (self._isShown(sourceParent) and self._isShown(destinationParent)):
+            # The view doesn't know some of the rows involved, it lays out the tree again instead
+            self.layoutAboutToBeChanged.emit()
+            persistent = self.persistentIndexList()
+            sourceParent.moveRange(sourceRow, count, destinationParent, destinationRow)
+            self._addHidden(sourceParent, -hiddenRemoved)
+            self._addHidden(destinationParent, hiddenInserted)
+            self.changePersistentIndexList(persistent, [self._updatedIndex(index) for index in persistent])
+            self.layoutChanged.emit()
+            return True
 
         # Tell the view the info it needs to move the items persistent indexes
         sourceLast = sourceRow + count - 1
-        # print(sourceRow, destinationRow)
-        self.beginMoveRows(sourceParentInd, sourceRow, sourceLast, destinationParentInd, destinationRow)
+        if not self.beginMoveRows(sourceParentInd, sourceRow, sourceLast, destinationParentInd, destinationRow):
+            return False
 
-        if not sourceParentInd.isValid():
-            sourceParent = self.rootItem
-        else:
-            sourceParent = sourceParentInd.internalPointer()
-
-        # Source and destination parents are the same
-        if sourceParentInd == destinationParentInd:
-            for i in range(count):
-                item = sourceParent.children[sourceRow]
-                if sourceRow < destinationRow:
-                    item.row = destinationRow - 1
-                else:
-                    item.row = destinationRow + i
-        # Source and destination parents are different
-        else:
-            if not destinationParentInd.isValid():
-                destinationParent = self.rootItem
-            else:
-                destinationParent = destinationParentInd.internalPointer()
-            for i in range(count):
-                item = sourceParent.children[sourceRow]
-                item.parent = destinationParent
-                item.row = destinationRow + i
+        # Move the whole block in one splice rather than one item at a time
+        sourceParent.moveRange(sourceRow, count, destinationParent, destinationRow)
+        self._addHidden(sourceParent, 0)
+        self._addHidden(destinationParent, 0)
 
-        # print("Moved to:", item.name, item.row)
         # Tell the view we are done moving so it can go ahead and update/verify indexes
         self.endMoveRows()
         return True
@@ -269,34 +516,105 @@ class TreeModel(QtCore.QAbstractItemModel):
 
     def addRow(self, row, parentInd, item):
         """ Adds the passed item to the tree at the given parent and row. """
-        if row == -1:
-            row = self.rowCount(parentInd)
-        self.beginInsertRows(parentInd, row, row)
+        return self.insertNodes([item], parentInd, row)
 
-        if not parentInd.isValid():
-            parent = self.rootItem
-        else:
-            parent = parentInd.internalPointer()
-        item.parent = parent
-        item.row = row
-        self.endInsertRows()
+
+    def insertNodes(self, nodes: list, parentInd, row: int = -1):
+        """ Inserts nodes that aren't in the tree as a block of rows, notifying the view once.
+
+        Args:
+            nodes: The new nodes, in the order they should appear.
+            parentInd: Index of the parent to insert them in.
+            row: Row to insert them at, -1 to append them.
+        """
+        nodes = list(nodes)
+        if any(node.parent is not None for node in nodes):
+            raise ValueError("Only nodes that aren't in a tree can be inserted, use moveItems to move nodes.")
+        parent = self._item(parentInd)
+        self._readPlaceholder(parentInd)
+        if row == -1:
+            row = parent.numChildren()
+        if not nodes:
+            return True
+        # Rows inserted among the rows not fetched yet are shown once they are fetched
+        hidden = self._hiddenInserted(parent, row, len(nodes))
+        shown = len(nodes) - hidden
+        notify = shown > 0 and self._isShown(parent)
+        if notify:
+            self.beginInsertRows(parentInd, row, row + shown - 1)
+        parent.attachMany(nodes, row=row)
+        self._addHidden(parent, hidden)
+        if notify:
+            self.endInsertRows()
         return True
 
 
+    def removeNodes(self, nodes: list):
+        """ Removes nodes from the tree, notifying the view once per range of consecutive rows.
+
+        Nodes whose ancestor is also removed are removed with it. Ranges are removed from the last
+        row of each parent up so the rows of the ranges still to remove don't change. A selection
+        scattered over more than maxDropMoves ranges is removed with a single layout change.
+
+        Args:
+            nodes: The nodes to remove, from anywhere in the tree.
+        """
+        nodes = self._topLevelItems(nodes)
+        runs = self._contiguousRuns(nodes)
+        if len(runs) > self.maxDropMoves:
+            self.layoutAboutToBeChanged.emit()
+            persistent = self.persistentIndexList()
+            removed = set(map(id, nodes))
+            hiddenRemoved = self._hiddenRemoved(nodes)
+            byParent = {}
+            for node in nodes:
+                byParent.setdefault(id(node.parent), (node.parent, []))[1].append(node)
+            for parent, children in byParent.values():
+                parent.detachMany(children)
+                self._addHidden(parent, 0)
+            for parent, count in hiddenRemoved:
+                self._addHidden(parent, -count)
+            self.changePersistentIndexList(persistent, [self._updatedIndex(index, removed) for index in persistent])
+            self.layoutChanged.emit()
+            return
+        for run in reversed(runs):
+            parent = run[0].parent
+            first = run[0].row
+            # Only the shown part of a range is removed from the view
+            hidden = self._hiddenIn(parent, first, len(run))
+            shown = len(run) - hidden
+            notify = shown > 0 and self._isShown(parent)
+            if notify:
+                self.beginRemoveRows(self._indexFor(parent), first, first + shown - 1)
+            parent.detachMany(run)
+            self._addHidden(parent, -hidden)
+            if notify:
+                self.endRemoveRows()
+
+
+    def resetChildren(self, parentInd, nodes: list):
+        """ Replaces all the children of a parent, the view is reset once instead of being told about each row.
+
+        Args:
+            parentInd: Index of the parent whose children are replaced.
+            nodes: The new children, nodes that aren't in the tree or that are already its children.
+        """
+        self.beginResetModel()
+        self._item(parentInd).children = list(nodes)
+        # The view counts every row again, wide nodes start over from their first batch
+        self._hiddenRows.clear()
+        self.endResetModel()
+
+
     def removeRows(self, row, count, parentInd):
         """ Removes count rows from the model starting with the given row under the given parent. """
-        # XXX Remove rows gets called after items are moved with a drag-drop event
-        # It tries to remove the rows we just moved, if this method is implemented, it breaks things
-        
-        # if not parentInd.isValid():
-        #     parent = self.rootItem
-        # else:
-        #     parent = parentInd.internalPointer()
-
-        # self.beginRemoveRows(parentInd, row, row + count - 1)
-        # for i in range(count):
-        #     child = parent.children[row]
-        #     child.parent = None
-        # self.endRemoveRows()
-        # return True
-        return False
+        parent = self._item(parentInd)
+        if count <= 0 or row < 0 or row + count > parent.numChildren():
+            return False
+        nodes = parent.children[row:row + count]
+        # After a drop the view removes the dragged rows, which moveItems already moved
+        if self._dropped and all(id(node) in self._dropped for node in nodes):
+            self._dropped.difference_update(map(id, nodes))
+            return False
+        self.removeNodes(nodes)
+        return True
@@ -1,6 +1,13 @@
 import os
 import objectgui.config as config
 
+from PyQt5 import QtGui
+from PyQt5 import QtCore
+
+
+# Icons already created by icon, keyed by the arguments they were requested with
+_icons = {}
+
 
 def iconPath(*args):
     """ Loads an icon in the given resource subdirectory. 
@@ -21,4 +28,24 @@ def iconPath(*args):
             base = args[2]
             return os.path.join(base, 'resources', location, name)
 
-        
\ No newline at end of file
+
+def icon(*args) -> QtGui.QIcon:
+    """ Returns the icon at the path built by iconPath, creating it the first time it is requested.
+
+    Icons are shared by everything that requests the same path so each image is only read from disk
+    once. If the compiled resources module has been imported, icons it contains are taken from it.
+
+    Args:
+        Same as iconPath.
+    """
+    cached = _icons.get(args)
+    if cached is None:
+        path = iconPath(*args)
+        if len(args) == 2:
+            # resources.qrc uses the location as the prefix and lists the files with it too
+            resource = ':/{0}/{0}/{1}'.format(*args)
+            if QtCore.QFile.exists(resource):
+                path = resource
+        cached = QtGui.QIcon(path)
+        _icons[args] = cached
+    return cached
@@ -0,0 +1,69 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QCoreApplication
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+from objectgui.gui.autosave import BackgroundSaver
+import pytest
+
+
+@pytest.fixture
+def saver():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    saver = BackgroundSaver()
+    yield saver
+    saver.shutdown()
+
+
+def test_save_runs_in_the_background(tmp_path, saver):
+    """ Tests that a background save writes the file and reports it once finished. """
+    root = FileNode(name="root")
+    Node("child").parent = root
+    filename = str(tmp_path / 'root.json')
+    finished = []
+    saver.saveFinished.connect(lambda fileNode, name: finished.append((fileNode, name)))
+
+    saver.save(root, filename)
+    assert saver.isSaving(root)
+    saver.waitForDone()
+
+    assert finished == [(root, filename)]
+    assert not saver.isSaving(root)
+    assert not root.hasUnsavedChanges()
+    assert FileNode.load(filename).childByName('child') is not None
+
+
+def test_saves_requested_while_saving_are_coalesced(tmp_path, saver):
+    """ Tests that several saves requested while one is running result in a single extra save. """
+    root = FileNode(name="root")
+    filename = str(tmp_path / 'root.json')
+    finished = []
+    saver.saveFinished.connect(lambda fileNode, name: finished.append(name))
+
+    saver.save(root, filename)
+    Node("first").parent = root
+    saver.save(root, filename)
+    Node("second").parent = root
+    saver.save(root, filename)
+    saver.waitForDone()
+
+    assert len(finished) == 2
+    assert [child.name for child in FileNode.load(filename).children] == ['first', 'second']
+    assert not root.hasUnsavedChanges()
+
+
+def test_failed_save_is_reported(tmp_path, saver):
+    """ Tests that a save that can't be written emits saveFailed and keeps the unsaved changes. """
+    root = FileNode(name="root")
+    failed = []
+    saver.saveFailed.connect(lambda fileNode, error: failed.append(fileNode))
+
+    saver.save(root, str(tmp_path / 'missing' / 'root.json'))
+    saver.waitForDone()
+
+    assert failed == [root]
+    assert root.hasUnsavedChanges()
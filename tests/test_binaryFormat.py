@@ -0,0 +1,121 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.core import binaryFormat
+import json
+import pytest
+
+
+# Monkey patch the gui part of the Node class for testing
+def _createEditForm(self):
+    pass
+
+Node._createEditForm = _createEditForm
+
+
+def _saveDict():
+    return {
+        'attributes': {'name': 'root', 'filename': None},
+        'class': 'FileNode',
+        'children': [
+            {
+                'attributes': {'name': 'folder'},
+                'class': 'FolderNode',
+                'children': [
+                    {'attributes': {'name': 'child1_1'}, 'class': 'Node', 'children': []},
+                ]
+            },
+            {
+                'attributes': {
+                    'name': 'values', 'int': -3, 'big': 1 << 70, 'float': 0.1, 'flag': True,
+                    'none': None, 'list': [1, 2.5, 'three', [False]], 'dict': {'a': {'b': 'ü'}}
+                },
+                'class': 'Node',
+                'children': []
+            }
+        ]
+    }
+
+
+def _encode(data):
+    writer = binaryFormat.BinaryTreeWriter()
+    binaryFormat.writeSaveDict(writer, data)
+    return writer.getvalue()
+
+
+def test_save_dict_round_trips_through_binary():
+    """ Tests that every attribute type and the tree structure survive encoding and decoding. """
+    data = _saveDict()
+
+    reader = binaryFormat.BinaryTreeReader(_encode(data))
+
+    assert binaryFormat.readSaveDict(reader) == data
+
+
+def test_class_and_attribute_names_are_stored_once():
+    """ Tests that repeated class and attribute names are stored in the string table only once. """
+    data = _saveDict()
+
+    reader = binaryFormat.BinaryTreeReader(_encode(data))
+
+    assert len(reader.strings) == len(set(reader.strings))
+    assert 'Node' in reader.strings
+    assert 'name' in reader.strings
+
+
+def test_childOffsets_skips_subtrees():
+    """ Tests that the record lengths let a reader jump straight to each child. """
+    reader = binaryFormat.BinaryTreeReader(_encode(_saveDict()))
+
+    offsets = reader.childOffsets(reader.rootOffset)
+
+    assert [reader.readRecord(offset)[1]['name'] for offset in offsets] == ['folder', 'values']
+
+
+def test_reader_rejects_other_files():
+    """ Tests that a file without the magic or with a newer version raises a BinaryFormatError. """
+    with pytest.raises(binaryFormat.BinaryFormatError):
+        binaryFormat.BinaryTreeReader(json.dumps(_saveDict()).encode('utf-8'))
+
+    data = bytearray(_encode(_saveDict()))
+    binaryFormat.HEADER.pack_into(data, 0, binaryFormat.MAGIC, binaryFormat.VERSION + 1, 0, 0)
+    with pytest.raises(binaryFormat.BinaryFormatError):
+        binaryFormat.BinaryTreeReader(bytes(data))
+
+
+def test_json_and_binary_files_convert_both_ways(tmp_path):
+    """ Tests that converting a json file to binary and back gives the same json. """
+    jsonFilename = str(tmp_path / 'project.json')
+    binaryFilename = str(tmp_path / 'project.ogb')
+    with open(jsonFilename, 'w') as f:
+        json.dump(_saveDict(), f)
+
+    binaryFormat.jsonToBinary(jsonFilename, binaryFilename)
+    os.remove(jsonFilename)
+    binaryFormat.binaryToJson(binaryFilename, jsonFilename)
+
+    with open(jsonFilename, 'r') as f:
+        assert json.load(f) == _saveDict()
+
+
+def test_fileNode_saves_and_loads_binary_files(tmp_path):
+    """ Tests that FileNode picks the binary format from the extension and reloads the same tree. """
+    filename = str(tmp_path / 'project.ogb')
+    root = FileNode(name="root")
+    folder = FolderNode(name="folder")
+    folder.parent = root
+    Node("child1_1").parent = folder
+    Node("child2").parent = root
+
+    assert root.save(filename)
+    loaded = FileNode.load(filename)
+
+    assert binaryFormat.isBinaryFile(filename)
+    assert isinstance(loaded.find('folder'), FolderNode)
+    assert loaded._buildSaveDict() == root._buildSaveDict()
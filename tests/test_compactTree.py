@@ -0,0 +1,148 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.tree import CircularTreeError
+from objectgui.core.compactTree import CompactTree, CompactNode
+import pytest
+
+
+def test_setParent():
+    """ Tests adding a child to a node. """
+    tree = CompactTree()
+    node = tree.newNode()
+    leaf = tree.newNode()
+    leaf.parent = node
+    assert node.children == [leaf], "The leaf should be the child of node"
+    assert leaf.parent is node, "The node should be the parent of leaf"
+    assert node.row is None, "The node is root so row should be None"
+    assert leaf.row == 0, "The leaf should be at index 0 in node.children"
+    assert leaf.depth == 1, "The leaf should be one level below node"
+    del leaf.parent
+    assert not node.children, "The node should not have any children"
+    assert leaf.row is None and leaf.depth == 0, "The leaf should be a root"
+
+
+def test_handlesAreMaterializedOnDemand():
+    """ Tests that nodes allocated by id only get a handle when accessed and keep it. """
+    tree = CompactTree()
+    root = tree.newNode()
+    ids = tree.newIds(1000, root.id)
+    assert len(tree._handles) == 1, "Only the root should have a handle"
+    assert root.numChildren() == 1000, "All the allocated nodes should be children of root"
+    child = root.children[10]
+    assert child is tree.node(ids[10]), "Each id should have exactly one handle"
+    assert child.row == 10, "The child should be at index 10"
+
+
+def test_handlesAreFreedWhenUnreferenced():
+    """ Tests that walking the tree doesn't keep a handle for every node and a freed handle's node is unchanged. """
+    tree = CompactTree()
+    root = tree.newNode()
+    tree.newIds(1000, root.id)
+    root.childAt(5).name = "named"
+    assert len(list(root.iterSubTree())) == 1001
+    assert len(tree._handles) == 1, "Only the referenced root should keep its handle"
+    child = root.childAt(5)
+    assert child.name == "named" and child.row == 5 and child.parent is root
+
+
+def test_storedRowsFollowChanges():
+    """ Tests that the stored rows match the order of the children after every kind of change. """
+    tree = CompactTree()
+    node1 = tree.newNode()
+    node2 = tree.newNode()
+    leaves = [tree.newNode(node1) for i in range(8)]
+    assert not tree._staleRows, "Appending should keep the rows up to date"
+    leaves[6].row = 1
+    leaves[0].parent = None
+    node1.moveRange(2, 3, node2, 0)
+    node2.attachMany([leaves[7]], row=1)
+    tree.newNode(node2)
+    for node in (node1, node2):
+        assert [child.row for child in node.children] == list(range(node.numChildren()))
+    assert leaves[0].row is None
+    assert not tree._staleRows, "Reading a row should renumber the stale siblings"
+
+
+def test_rowAndMoves():
+    """ Tests changing rows and moving ranges between nodes. """
+    tree = CompactTree()
+    node1 = tree.newNode()
+    node2 = tree.newNode()
+    leaves = [tree.newNode(node1) for i in range(6)]
+    leaves[5].row = 0
+    assert node1.children == [leaves[5]] + leaves[:5], "The last leaf should move to the front"
+    node1.moveRange(1, 2, node2, 0)
+    assert node2.children == leaves[:2], "The range should be moved to node2"
+    node1.moveRange(0, 1, node1, 3)
+    assert node1.children == [leaves[2], leaves[3], leaves[5], leaves[4]], "The range should move in front of row 3"
+    assert [c.row for c in node1.children] == [0, 1, 2, 3], "The rows should match the order of children"
+    assert leaves[3].nextSibling() is leaves[5], "The next sibling should follow the children order"
+    assert leaves[4].nextSibling() is leaves[2], "The last child should wrap to the first"
+
+
+def test_circularTree():
+    """ Tests that loops are refused and the tree is left unchanged. """
+    tree = CompactTree()
+    node1 = tree.newNode()
+    node2 = tree.newNode(node1)
+    node3 = tree.newNode(node2)
+    with pytest.raises(CircularTreeError):
+        node1.parent = node3
+    with pytest.raises(CircularTreeError):
+        node2.children = [node2]
+    assert node1.parent is None, "The refused move should not change the tree"
+    assert node1.isAncestorOf(node3), "Node1 should be an ancestor of node3"
+    assert node3.root is node1, "Node1 should be the root of node3"
+
+
+def test_iterSubtree():
+    """ Tests that the traversal orders match NodeMixin. """
+    tree = CompactTree()
+    root = tree.newNode()
+    a = tree.newNode(root)
+    b = tree.newNode(root)
+    a1 = tree.newNode(a)
+    b1 = tree.newNode(b)
+    assert list(root.iterSubTree()) == [root, a, a1, b, b1], "Pre-order should visit parents first"
+    assert list(root.iterSubTree(order='post')) == [a1, a, b1, b, root], "Post-order should visit children first"
+    assert list(root.iterSubTree(order='breadth')) == [root, a, b, a1, b1], "Breadth first should visit level by level"
+
+
+def test_nodesFromDifferentTrees():
+    """ Tests that nodes cannot be connected across trees. """
+    node1 = CompactNode()
+    node2 = CompactNode()
+    with pytest.raises(ValueError):
+        node1.parent = node2
+
+
+def test_childAtMatchesChildren():
+    """ Tests that looking children up by row in any order, around moves, gives the same nodes as the children list. """
+    tree = CompactTree()
+    root = tree.newNode()
+    tree.newIds(50, root.id)
+    children = root.children
+    for row in list(range(50)) + list(range(49, -1, -3)) + [25, 26, 24, 0, 49]:
+        assert root.childAt(row) is children[row]
+    root.childAt(10).row = 40
+    root.childAt(3).parent = None
+    children = root.children
+    assert [root.childAt(row) for row in range(49)] == children
+    assert root.childAt(-1) is children[-1]
+    with pytest.raises(IndexError):
+        root.childAt(49)
+
+
+def test_displayInterface():
+    """ Tests that compact nodes have the name and display interface of Node. """
+    tree = CompactTree()
+    node = tree.newNode()
+    assert node.getDisplayData(0) == node.name == "Node0"
+    node.name = "named"
+    assert node.getDisplayData(0) == "named" and node.getDisplayData(1) == ""
+    assert node.iconPath() == ('icons', 'test.png')
+    assert node.dragable and node.dropable and not node.suppressed and not node.default
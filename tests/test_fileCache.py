@@ -0,0 +1,129 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+from objectgui.core.fileCache import FileCache
+import pytest
+
+
+# Monkey patch the gui part of the Node class for testing
+def _createEditForm(self):
+    pass
+
+Node._createEditForm = _createEditForm
+
+
+class ListNode(Node):
+    savedAttributes = ('values',)
+
+    def __init__(self, values=None, **kwargs):
+        self.values = values
+        super().__init__(**kwargs)
+
+
+class CachedFileNode(FileNode):
+    fileCache = FileCache()
+    classMapping = dict(FileNode.classMapping, ListNode=ListNode.fromAttributes)
+
+
+def _saveProject(tmp_path, name='root'):
+    root = CachedFileNode(name=name)
+    Node("child").parent = root
+    filename = str(tmp_path / '{}.json'.format(name))
+    root.save(filename)
+    return filename
+
+
+def test_cache_evicts_least_recently_used_files():
+    """ Tests that files are evicted oldest use first once the budget is exceeded. """
+    cache = FileCache(maxBytes=25)
+    cache.put('a', (10, 0, 0), {'a': 1}, 10)
+    cache.put('b', (10, 0, 0), {'b': 1}, 10)
+    assert cache.get('a', (10, 0, 0)) == {'a': 1}
+    cache.put('c', (10, 0, 0), {'c': 1}, 10)
+
+    assert cache.get('b', (10, 0, 0)) is None
+    assert cache.get('a', (10, 0, 0)) is not None and cache.get('c', (10, 0, 0)) is not None
+    assert cache.size == 20
+    cache.put('d', (1, 0, 0), {}, 30)
+    assert len(cache) == 2
+
+
+def test_cache_misses_for_a_changed_file():
+    """ Tests that an entry is only returned for the version of the file it was read from. """
+    cache = FileCache()
+    cache.put('a', (10, 1, 0), {'a': 1}, 10)
+
+    assert cache.get('a', (10, 2, 0)) is None
+    assert cache.get('a', (11, 1, 0)) is None
+    assert cache.get('a', (10, 1, 0)) == {'a': 1}
+
+
+def test_files_are_cached_the_first_time_they_are_read(tmp_path, monkeypatch):
+    """ Tests that the first load of a file fills the cache unless the file is larger than the budget. """
+    assert FileCache(maxBytes=100).shouldCache('a', (10, 1, 0))
+    assert not FileCache(maxBytes=100).shouldCache('b', (200, 1, 0))
+    filename = _saveProject(tmp_path)
+    first = CachedFileNode.load(filename)
+    monkeypatch.setattr(CachedFileNode, '_parseFile', classmethod(lambda *args: pytest.fail("file was parsed")))
+
+    assert CachedFileNode.load(filename)._buildSaveDict() == first._buildSaveDict()
+
+
+def test_cache_size_estimates_the_memory_of_the_trees(tmp_path):
+    """ Tests that the budget counts the memory held by the recorded nodes rather than the size of the file. """
+    root = CachedFileNode(name='root')
+    for i in range(100):
+        ListNode(name="child{:d}".format(i), values=list(range(i))).parent = root
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+    cache = CachedFileNode.fileCache
+    cache.clear()
+    CachedFileNode.load(filename)
+
+    tree = cache.get(filename, cache.stamp(filename))
+    assert len(tree.attributes) == 100
+    assert cache.size == tree.size > os.path.getsize(filename)
+
+
+def test_load_builds_from_the_cache_without_parsing(tmp_path, monkeypatch):
+    """ Tests that loading an unchanged file again doesn't parse it and gives a separate tree. """
+    filename = _saveProject(tmp_path)
+    first = CachedFileNode.load(filename)
+    monkeypatch.setattr(CachedFileNode, '_parseFile', classmethod(lambda *args: pytest.fail("file was parsed")))
+
+    second = CachedFileNode.load(filename)
+
+    assert second._buildSaveDict() == first._buildSaveDict()
+    assert second.children[0] is not first.children[0]
+
+
+def test_cached_attribute_values_are_not_shared(tmp_path):
+    """ Tests that changing a list attribute of a loaded node doesn't change the cached file. """
+    root = CachedFileNode(name='root')
+    child = ListNode(name="child", values=[1, 2])
+    child.parent = root
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+
+    CachedFileNode.load(filename).children[0].values.append(3)
+    CachedFileNode.load(filename).children[0].values.append(4)
+
+    assert CachedFileNode.load(filename).children[0].values == [1, 2]
+
+
+def test_saving_a_file_replaces_its_cached_tree(tmp_path):
+    """ Tests that a file saved after it was cached is read again. """
+    filename = _saveProject(tmp_path)
+    root = CachedFileNode.load(filename)
+    assert CachedFileNode.fileCache.get(filename, CachedFileNode.fileCache.stamp(filename)) is not None
+    root.journalLimit = 0
+    root.children[0].name = 'renamed'
+
+    root.save(filename)
+
+    assert CachedFileNode.load(filename).children[0].name == 'renamed'
@@ -125,19 +125,484 @@ def test_buildSaveDict_encodes_tree_with_ownFile():
     assert data == expected
 
 
-# TODO create some basic json files and test the load function
-# Create tests for the same three scenarios as above
+def _writeJson(path, data):
+    import json
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    return str(path)
 
-def test_load_fileNode_and_children():
+
+def _nodeData(name, children=(), clsType='Node', **attributes):
+    attributes['name'] = name
+    return {'attributes': attributes, 'class': clsType, 'children': list(children)}
+
+
+def test_load_fileNode_and_children(tmp_path):
     """ Tests that load decodes json and generate the contained node with children. """
+    data = _nodeData('root', [_nodeData('child1'), _nodeData('child2')], 'FileNode', filename=None)
+    filename = _writeJson(tmp_path / 'root.json', data)
+
+    root = FileNode.load(filename)
 
+    assert isinstance(root, FileNode)
+    assert [child.name for child in root.children] == ['child1', 'child2']
+    assert root._buildSaveDict() == data
 
-def test_load_tree_with_multiple_levels():
+
+def test_load_tree_with_multiple_levels(tmp_path):
     """ Tests that load decodes json and generate the contained node with children."""
+    child1 = _nodeData('child1', [_nodeData('child1_1'), _nodeData('child1_2')])
+    data = _nodeData('root', [child1, _nodeData('child2')], 'FileNode', filename=None)
+    filename = _writeJson(tmp_path / 'root.json', data)
+
+    root = FileNode.load(filename)
+
+    assert root.find('child1/child1_2').depth == 2
+    assert root._buildSaveDict() == data
 
 
-def test_load_tree_with_ownFile():
+class NestedNode(FileNode):
+    """ File node nested in another file for the ownFile tests. """
+
+
+class NestingFileNode(FileNode):
+    classMapping = dict(FileNode.classMapping, NestedNode=NestedNode.fromAttributes)
+
+
+def test_load_tree_with_ownFile(tmp_path):
     """ Tests that load decodes and creates a tree from multiple json files."""
+    nestedFilename = str(tmp_path / 'nested.json')
+    _writeJson(nestedFilename, _nodeData('nested', [_nodeData('hidden')], 'FileNode', filename=nestedFilename))
+    nested = _nodeData('nested', [], 'NestedNode', filename=nestedFilename)
+    data = _nodeData('root', [_nodeData('child1', [nested])], 'FileNode', filename=None)
+    filename = _writeJson(tmp_path / 'root.json', data)
+
+    root = NestingFileNode.load(filename)
+
+    assert [child.name for child in root.find('child1/nested').children] == ['hidden']
+    assert root.find('child1/nested/hidden').depth == 3
+
+
+def test_load_streaming_reports_progress(tmp_path):
+    """ Tests that the streaming loader reports the bytes read as it goes. """
+    data = _nodeData('root', [_nodeData('child{:d}'.format(i)) for i in range(200)], 'FileNode', filename=None)
+    filename = _writeJson(tmp_path / 'root.json', data)
+    progress = []
+
+    from objectgui.core.jsonReader import JsonTreeReader
+    with open(filename, 'rb') as f:
+        root = JsonTreeReader(f, progress.append, chunkSize=64).read(FileNode.fromAttributes, FileNode._createStreamedNode)
+
+    assert progress == sorted(progress)
+    assert progress[-1] == os.path.getsize(filename)
+    assert root._buildSaveDict() == data
+
+
+def test_streaming_reader_gives_the_same_tree_for_any_chunk_size(tmp_path):
+    """ Tests that nodes, long values and numbers cut off by the end of a chunk are read whole, with parents attached first. """
+    leaves = [_nodeData('leaf{:d}'.format(i), value=i * 1.5, flag=i % 2 == 0, other=None) for i in range(6)]
+    deep = _nodeData('deep', [_nodeData('deeper', [_nodeData('deepest', text='é' * 300)])])
+    data = _nodeData('root', [_nodeData('first', leaves[:3]), deep, _nodeData('long', leaves[3:], text='x' * 500), _nodeData('last', values=list(range(50)))], 'FileNode', filename=None)
+    filename = _writeJson(tmp_path / 'root.json', data)
+
+    from objectgui.core.jsonReader import JsonTreeReader
+    for chunkSize in (1, 5, 64, 1 << 16):
+        # The root and the nodes attached so far
+        attached = []
+        def createNode(className, attributes, parent):
+            return {'attributes': attributes, 'class': className, 'children': []}
+        def createRoot(attributes):
+            attached.append(createNode('FileNode', attributes, None))
+            return attached[0]
+        def attachChildren(parent, children):
+            assert any(parent is node for node in attached)
+            parent['children'].extend(children)
+            attached.extend(children)
+        with open(filename, 'rb') as f:
+            root = JsonTreeReader(f, chunkSize=chunkSize).read(createRoot, createNode, attachChildren)
+        assert root == data
+        assert len(attached) == 13
+
+
+def test_load_falls_back_for_other_key_order(tmp_path):
+    """ Tests that files with children written before the attributes are still loaded. """
+    import json
+    data = _nodeData('root', [_nodeData('child1', [_nodeData('child1_1')])], 'FileNode', filename=None)
+    filename = str(tmp_path / 'root.json')
+    with open(filename, 'w') as f:
+        f.write(json.dumps(data['children'][0], sort_keys=True).join(['{"children": [', '], "class": "FileNode", "attributes": {"name": "root", "filename": null}}']))
+
+    root = FileNode.load(filename)
+
+    assert root._buildSaveDict() == data
+
+
+def test_load_raises_for_broken_json(tmp_path):
+    """ Tests that a truncated file raises a json error rather than returning part of the tree. """
+    import json
+    data = _nodeData('root', [_nodeData('child1')], 'FileNode', filename=None)
+    filename = str(tmp_path / 'root.json')
+    with open(filename, 'w') as f:
+        f.write(json.dumps(data)[:-10])
+
+    with pytest.raises(json.JSONDecodeError):
+        FileNode.load(filename)
+
+
+# TODO create tests that save a tree to file and recreate it by loading from file
+
+def test_writeNode_matches_json_dump():
+    """ Tests that streaming the tree to a file gives the same text as dumping the save dictionary. """
+    import io
+    import json
+    root = FileNode(name="root")
+    child1 = Node("child1")
+    child1.parent = root
+    child2 = Node("chïld \"2\"")
+    child2.parent = root
+    child1_1 = Node("child1_1")
+    child1_1.parent = child1
+    nested = Node("nested")
+    nested.ownFile = True
+    nested.parent = child1
+    Node("hidden").parent = nested
+
+    f = io.StringIO()
+    root._writeNode(f, root)
+
+    assert f.getvalue() == json.dumps(root._buildSaveDict())
+
+
+def _savedProject(tmp_path):
+    """ Saves a project with a nested file and returns it reloaded from disk. """
+    nestedFilename = str(tmp_path / 'nested.json')
+    root = NestingFileNode(name="root")
+    folder = Node("folder")
+    folder.parent = root
+    nested = NestedNode(name="nested", filename=nestedFilename)
+    nested.parent = folder
+    Node("hidden").parent = nested
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+    return NestingFileNode.load(filename), filename
+
+
+def test_new_and_loaded_files_are_dirty_and_clean(tmp_path):
+    """ Tests that a new file has unsaved changes and a freshly saved or loaded one doesn't. """
+    root = FileNode(name="root")
+    assert root.hasUnsavedChanges()
+
+    root.save(str(tmp_path / 'root.json'))
+    assert not root.hasUnsavedChanges()
+
+    loaded, filename = _savedProject(tmp_path)
+    assert not any(n.dirty or n.nestedDirty for n in loaded.iterSubTree())
+
+
+def test_changes_mark_the_file_they_are_saved_in(tmp_path):
+    """ Tests that edits mark the owning file dirty and the files above it as having a dirty nested file. """
+    root, filename = _savedProject(tmp_path)
+    nested = root.find('folder/nested')
+
+    Node("new").parent = nested
+    assert nested.dirty
+    assert not root.dirty and root.nestedDirty
+
+    root.markSaved()
+    root.find('folder').updateAttributes({'name': 'renamed'})
+    assert root.dirty and not nested.dirty
+
+
+def test_save_only_writes_changed_nested_files(tmp_path, monkeypatch):
+    """ Tests that saving skips nested files that haven't changed and writes those that have. """
+    root, filename = _savedProject(tmp_path)
+    nested = root.find('folder/nested')
+    saved = []
+    originalWrite = FileNode._writeFile
+    monkeypatch.setattr(FileNode, '_writeFile', lambda self, f: saved.append(self.name) or originalWrite(self, f))
+
+    root.save(filename)
+    assert saved == ['root']
+
+    saved.clear()
+    nested.find('hidden').name = 'shown'
+    root.save(filename)
+    assert saved == ['root', 'nested']
+    assert not root.hasUnsavedChanges() and not nested.hasUnsavedChanges()
+    assert NestingFileNode.load(filename).find('folder/nested/shown') is not None
+
+
+def test_nested_files_are_saved_and_loaded_in_parallel(tmp_path, monkeypatch):
+    """ Tests that many nested files, some nested in each other, round trip with a thread pool. """
+    monkeypatch.setattr(FileNode, 'maxWorkers', 4)
+    root = NestingFileNode(name="root")
+    for i in range(20):
+        nested = NestedNode(name="nested{:d}".format(i), filename=str(tmp_path / 'nested{:d}.json'.format(i)))
+        nested.parent = root
+        inner = NestedNode(name="inner", filename=str(tmp_path / 'inner{:d}.ogb'.format(i)))
+        inner.parent = nested
+        Node("leaf{:d}".format(i)).parent = inner
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+
+    loaded = NestingFileNode.load(filename)
+
+    assert [child.name for child in loaded.children] == ["nested{:d}".format(i) for i in range(20)]
+    for i in range(20):
+        assert loaded.find('nested{:d}/inner/leaf{:d}'.format(i, i)).depth == 3
+    assert not loaded.hasUnsavedChanges()
+
+
+def test_lazy_load_reads_nested_files_when_needed(tmp_path):
+    """ Tests that nested files are placeholders until their children are used. """
+    root = NestingFileNode(name="root")
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.json'))
+    nested.parent = root
+    inner = NestedNode(name="inner", filename=str(tmp_path / 'inner.json'))
+    inner.parent = nested
+    Node("leaf").parent = inner
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+
+    loaded = NestingFileNode.load(filename, lazy=True)
+    nested = loaded.find('nested')
+    fetched = []
+    nested.childrenFetched.connect(fetched.append)
+
+    assert nested.hasUnfetchedChildren() and nested.numChildren() == 0
+    assert [child.name for child in nested.children] == ['inner']
+    assert fetched == [nested.children]
+    inner = nested.childByName('inner')
+    assert inner.hasUnfetchedChildren()
+    assert inner.children[0].name == 'leaf'
+    assert not loaded.hasUnsavedChanges()
+
+
+def test_lazy_placeholders_keep_their_file_when_saved(tmp_path):
+    """ Tests that saving, renaming and adding to placeholders doesn't lose the children in their files. """
+    root = NestingFileNode(name="root")
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.json'))
+    nested.parent = root
+    Node("leaf").parent = nested
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+
+    loaded = NestingFileNode.load(filename, lazy=True)
+    loaded.save(filename)
+    placeholder = NestingFileNode.load(filename, lazy=True).find('nested')
+    placeholder.updateAttributes({'name': 'renamed'})
+    Node("added").parent = placeholder
+    placeholder.root.save(filename)
+
+    assert [child.name for child in NestingFileNode.load(filename).find('renamed').children] == ['leaf', 'added']
+
+
+def test_insert_under_a_placeholder_while_searching_keeps_its_file(tmp_path):
+    """ Tests that the search index doesn't read a placeholder's file while a child is being inserted under it. """
+    from objectgui.core.searchIndex import SearchIndex
+    root = NestingFileNode(name="root")
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.json'))
+    nested.parent = root
+    nested.attachMany([Node("a"), Node("b")])
+    filename = str(tmp_path / 'root.json')
+    root.save(filename)
+
+    loaded = NestingFileNode.load(filename, lazy=True)
+    index = SearchIndex(loaded)
+    try:
+        placeholder = loaded.find('nested')
+        Node(name='c').parent = placeholder
+        assert [node.name for node in index.search('c')] == ['c']
+        loaded.save(filename)
+    finally:
+        index.close()
+
+    assert [child.name for child in NestingFileNode.load(filename).find('nested').children] == ['a', 'b', 'c']
+
+
+def test_snapshot_writes_the_same_files_as_save(tmp_path):
+    """ Tests that writing a snapshot gives the same files as a synchronous save and clears the flags. """
+    root = NestingFileNode(name="root")
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.ogb'))
+    nested.parent = root
+    Node("leaf").parent = nested
+    filename = str(tmp_path / 'root.json')
+    root.save(str(tmp_path / 'expected.json'))
+    nested.markDirty()
+
+    snapshot = root.takeSnapshot(filename)
+    snapshot.write()
+    snapshot.markSaved()
+
+    with open(filename, 'r') as f, open(str(tmp_path / 'expected.json'), 'r') as expected:
+        assert f.read() == expected.read().replace('expected', 'root')
+    assert NestingFileNode.load(filename).find('nested/leaf') is not None
+    assert not root.hasUnsavedChanges() and not nested.hasUnsavedChanges()
+    assert sorted(os.listdir(str(tmp_path))) == ['expected.json', 'nested.ogb', 'root.json']
+
+
+def test_snapshot_is_captured_before_the_tree_changes(tmp_path):
+    """ Tests that a snapshot writes the tree as it was when taken, in both formats, even if it changes before write. """
+    root = NestingFileNode(name="root")
+    for i in range(3):
+        folder = Node("folder{:d}".format(i))
+        folder.parent = root
+        folder.attachMany([Node("node{:d}_{:d}".format(i, j)) for j in range(i)])
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.json'))
+    nested.parent = root.find('folder2')
+    Node("hidden").parent = nested
+    expected = root._buildSaveDict()
+
+    snapshots = [root.takeSnapshot(str(tmp_path / name)) for name in ('root.json', 'root.ogb')]
+    root.find('folder1').name = "renamed"
+    Node("late").parent = root.find('folder0')
+    for snapshot in snapshots:
+        snapshot.write()
+
+    import json
+    with open(str(tmp_path / 'root.json'), 'r') as f:
+        assert json.load(f) == expected
+    assert NestingFileNode.load(str(tmp_path / 'root.ogb'))._buildSaveDict() == expected
+
+
+def test_snapshot_keeps_changes_made_while_it_is_written(tmp_path):
+    """ Tests that files changed after the snapshot was taken stay dirty once it has been written. """
+    root = NestingFileNode(name="root")
+    nested = NestedNode(name="nested", filename=str(tmp_path / 'nested.json'))
+    nested.parent = root
+    filename = str(tmp_path / 'root.json')
+
+    snapshot = root.takeSnapshot(filename)
+    Node("late").parent = nested
+    snapshot.write()
+    snapshot.markSaved()
+
+    assert not root.dirty
+    assert nested.dirty and root.nestedDirty
+    assert NestingFileNode.load(filename).find('nested/late') is None
+
+
+def _editProject(root):
+    """ Makes one of each kind of journaled change to a project saved by _savedProject. """
+    folder = root.find('folder')
+    folder.updateAttributes({'name': 'renamed'})
+    group = Node("group")
+    Node("grandchild").parent = group
+    root.attachMany([group, Node("last")], row=0)
+    folder.moveRange(0, 1, group, 1)
+    root.find('last').parent = None
+    root.find('group/grandchild').row = 1
+
+
+def test_save_appends_edits_to_the_journal(tmp_path):
+    """ Tests that a save after small edits only appends to the journal and that loading replays it. """
+    root, filename = _savedProject(tmp_path)
+    with open(filename, 'rb') as f:
+        before = f.read()
+
+    _editProject(root)
+    root.save(filename)
+
+    with open(filename, 'rb') as f:
+        assert f.read() == before
+    assert os.path.exists(filename + '.journal')
+    loaded = NestingFileNode.load(filename)
+    assert loaded._buildSaveDict() == root._buildSaveDict()
+    assert [n.name for n in loaded.find('group').children] == ['nested', 'grandchild']
+    assert loaded.find('group/nested/hidden') is not None
+    assert not loaded.hasUnsavedChanges()
+
+
+def test_updated_attributes_are_journaled_once(tmp_path):
+    """ Tests that updating the attributes of a node, its name included, adds one journal entry and one change. """
+    root, filename = _savedProject(tmp_path)
+    changes = root._changes
+
+    root.find('folder').updateAttributes({'name': 'renamed'})
+
+    with open(filename + '.journal', 'r') as f:
+        assert len(f.read().splitlines()) == 2
+    assert root._changes == changes + 1
+
+
+def test_journal_is_compacted_past_the_limit(tmp_path, monkeypatch):
+    """ Tests that a save rewrites the file and removes the journal once it would have too many entries. """
+    monkeypatch.setattr(FileNode, 'journalLimit', 3)
+    root, filename = _savedProject(tmp_path)
+
+    root.name = 'first'
+    root.save(filename)
+    assert os.path.exists(filename + '.journal')
+    _editProject(root)
+    root.save(filename)
+
+    assert not os.path.exists(filename + '.journal')
+    assert NestingFileNode.load(filename)._buildSaveDict() == root._buildSaveDict()
+    root.find('renamed').name = 'again'
+    root.save(filename)
+    assert NestingFileNode.load(filename).find('again') is not None
+
+
+def test_truncated_or_stale_journal(tmp_path):
+    """ Tests that a journal cut short is replayed up to its last whole save and one left by an older file is ignored. """
+    root, filename = _savedProject(tmp_path)
+    root.find('folder').name = 'first'
+    root.save(filename)
+    root.find('first').name = 'second'
+    root.save(filename)
+    with open(filename + '.journal', 'r') as f:
+        text = f.read()
+    with open(filename + '.journal', 'w') as f:
+        f.write(text[:-5])
+
+    loaded = NestingFileNode.load(filename)
+    assert loaded.find('first') is not None and loaded.find('second') is None
+    loaded.save(filename)
+    assert not os.path.exists(filename + '.journal')
+
+    with open(filename + '.journal', 'w') as f:
+        f.write(text)
+    assert NestingFileNode.load(filename).find('first') is not None
+
+
+def test_unsaved_edits_are_in_the_journal_and_can_be_recovered(tmp_path):
+    """ Tests that edits reach the journal before a save and are only replayed when a load recovers them. """
+    root, filename = _savedProject(tmp_path)
+    root.name = 'saved'
+    root.save(filename)
+    _editProject(root)
+    root.find('group/nested/hidden').name = 'shown'
+    expected = root._buildSaveDict()
+    assert NestingFileNode.hasRecoverableChanges(filename)
+
+    # The program stops without saving
+    loaded = NestingFileNode.load(filename)
+    assert loaded.name == 'saved' and loaded.find('group') is None and loaded.find('folder/nested/hidden') is not None
+    assert not loaded.hasUnsavedChanges()
+    recovered = NestingFileNode.load(filename, recover=True)
+    assert recovered._buildSaveDict() == expected
+    assert recovered.find('group/nested/shown') is not None
+    assert recovered.dirty and recovered.find('group/nested').dirty
+    lazy = NestingFileNode.load(filename, lazy=True, recover=True)
+    placeholder = lazy.find('group/nested')
+    assert [child.name for child in placeholder.children] == ['shown'] and placeholder.dirty
+
+    recovered.save(filename)
+    assert not NestingFileNode.hasRecoverableChanges(filename)
+    assert NestingFileNode.load(filename)._buildSaveDict() == expected
+
+
+def test_snapshot_appends_edits_to_the_journal(tmp_path):
+    """ Tests that a background save of a small edit appends to the journal and keeps later edits journaled. """
+    root, filename = _savedProject(tmp_path)
+    root.find('folder').name = 'renamed'
 
+    snapshot = root.takeSnapshot(filename)
+    Node("late").parent = root
+    snapshot.write()
+    snapshot.markSaved()
+    assert root.dirty
+    root.save(filename)
 
-# TODO create tests that save a tree to file and recreate it by loading from file
\ No newline at end of file
+    assert os.path.exists(filename + '.journal')
+    assert NestingFileNode.load(filename)._buildSaveDict() == root._buildSaveDict()
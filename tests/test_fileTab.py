@@ -13,4 +13,33 @@ import pytest
 
 # Test creating a new file, save action, complete dialog, save again
 
-# Test creating a new file, save action, complete dialog, file save fails
\ No newline at end of file
+# Test creating a new file, save action, complete dialog, file save fails
+
+@pytest.fixture
+def fileTab():
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    root = FileNode(name="root")
+    root.attachMany([Node("node{:d}".format(i)) for i in range(5)])
+    fileTab = FileTab(root.name, root, None)
+    yield fileTab
+    fileTab.closeSearch()
+
+
+def test_cleared_search_is_not_run_again_when_the_tree_changes(fileTab):
+    """ Tests that edits made after the search box is cleared show the whole tree and don't run the old query. """
+    model = fileTab.model
+    assert len(fileTab.search('node1')) == 1
+    fileTab.search('')
+    proxy = fileTab.searchModel
+    resets = []
+    proxy.modelReset.connect(lambda: resets.append(True))
+
+    model.insertNodes([Node("node1_new")], model._indexFor(fileTab.fileNode))
+    model.removeNodes([fileTab.fileNode.childByName('node1')])
+
+    assert fileTab.objectTreeView.model() is model
+    assert proxy.text == '' and proxy.matches == []
+    assert resets == []
+    assert model.rowCount(model._indexFor(fileTab.fileNode)) == 5
+    assert [node.name for node in fileTab.search('node1')] == ['node1_new']
@@ -4,7 +4,7 @@ import sys
 scriptPath = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
 
-from objectgui.core.node import Node
+from objectgui.core.node import Node, Attribute
 import pytest
 
 
@@ -38,6 +38,23 @@ def test_creating_subclass_fromAttributes():
     assert obj.name == 'Test'
 
 
+def test_fromAttributes_skips_the_constructor_only_when_it_is_the_default():
+    """ Tests that nodes created without going through __init__ are complete, and that overrides still run. """
+    obj = Node.fromAttributes({'name': 'Test'})
+    assert (obj.name, obj.parent, obj.children, obj.depth) == ('Test', None, [], 0)
+    child = Node.fromAttributes({'name': 'Child'})
+    child.parent = obj
+    assert obj.childByName('Child') is child and child.row == 0
+
+    created = []
+    class InitNode(Node):
+        def __init__(self, **kwargs):
+            created.append(kwargs['name'])
+            super().__init__(**kwargs)
+    assert InitNode.fromAttributes({'name': 'Init'}).name == 'Init'
+    assert created == ['Init']
+
+
 def test_addAttribute_default_getter_and_setter():
     """ Tests adding an attribute using the default getter and setter. """
     obj = Node("Test")
@@ -112,6 +129,24 @@ def test_updateAttributes_sets_attributes_correctly():
     assert obj.attr2 == 2
 
 
+def test_updateAttributes_calls_onChange_once():
+    """ Tests that setting several attributes, the name included, reports a single change. """
+    changes = []
+    class CountingNode(Node):
+        def onChange(self, children=False):
+            changes.append(children)
+            super().onChange(children)
+    obj = CountingNode("Test")
+    obj.addAttribute('attr1')
+    changes.clear()
+    obj.updateAttributes({'name': 'Renamed', 'attr1': 1})
+    assert changes == [False]
+    assert obj.name == 'Renamed' and obj.attr1 == 1
+    assert '_updating' not in vars(obj)
+    obj.name = 'Again'
+    assert changes == [False, False]
+
+
 def test_updateAttributes_with_invalid_attributes_raises_exception():
     """ Tests that update attributes will fail if not given a valid dictionary. """
     obj = Node("Test")
@@ -154,3 +189,66 @@ def test_cacheAttributes_overwrites_existing_cache():
     node.attr1 = 3
     node.restoreAttributesFromCache()
     assert node.attr1 == 2
+
+
+def test_editForm_not_created_on_construction():
+    """ Tests that constructing a node does not build its edit form. """
+    created = []
+    class CustomNode(Node):
+        def _createEditForm(self):
+            created.append(self)
+            self._editForm = object()
+    node = CustomNode("Test")
+    assert not created, "The edit form should not be created when the node is constructed"
+    form = node.editForm
+    assert created == [node], "The edit form should be created the first time it is requested"
+    assert node.editForm is form, "The edit form should only be created once"
+
+
+def test_signals_without_qt():
+    """ Tests connecting and emitting the node signals without Qt. """
+    node = Node("Test")
+    other = Node("Other")
+    calls = []
+    node.editSubmitted.connect(lambda: calls.append('submitted'))
+    node.submitForm()
+    other.submitForm()
+    assert calls == ['submitted'], "Only the slots connected to the emitting node should be called"
+    node.editSubmitted.disconnect()
+    node.submitForm()
+    assert calls == ['submitted'], "Disconnected slots should not be called"
+
+
+def test_core_imports_without_qt():
+    """ Tests that the core modules can be imported without importing PyQt5. """
+    import subprocess
+    code = (
+        "import sys; sys.path.append({!r}); "
+        "import objectgui.core.fileNode; "
+        "assert not [m for m in sys.modules if m.startswith('PyQt5')]"
+    ).format(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_savedAttributes_declared_on_class():
+    """ Tests declaring attributes once on the class, including inherited and custom ones. """
+    class CustomNode(Node):
+        savedAttributes = ('x', Attribute('y', lambda node: node.y * 2, lambda node, value: setattr(node, 'y', value // 2)))
+        def __init__(self, x=0, y=0, **kwargs):
+            self.x = x
+            self.y = y
+            super().__init__(**kwargs)
+    class SubNode(CustomNode):
+        savedAttributes = ('z',)
+        def __init__(self, z=0, **kwargs):
+            self.z = z
+            super().__init__(**kwargs)
+    obj = SubNode(name='Test', x=1, y=2, z=3)
+    assert obj.getAttributes() == {'name': 'Test', 'x': 1, 'y': 4, 'z': 3}
+    obj.updateAttributes({'y': 10, 'z': 5})
+    assert obj.y == 5
+    assert obj.z == 5
+    copy = SubNode(name='Copy')
+    copy.updateAttributes(obj.getAttributes())
+    assert copy.getAttributes() == obj.getAttributes()
+    assert Node("Other").getAttributes() == {'name': 'Other'}, "Subclass attributes should not be added to Node"
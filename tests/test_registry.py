@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import threading
+from importlib import metadata
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.fileNode import FileNode
+from objectgui.core import registry
+from objectgui.core.registry import NodeRegistry
+import pytest
+
+
+# Monkey patch the gui part of the Node class for testing
+def _createEditForm(self):
+    pass
+
+Node._createEditForm = _createEditForm
+
+
+_PLUGIN = """
+from objectgui.core.node import Node
+
+class {0}(Node):
+    pass
+"""
+
+
+@pytest.fixture
+def plugins(tmp_path, monkeypatch):
+    """ Writes plugin modules that each define a node class named after the module, returns a function creating them. """
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def create(name, prefix=''):
+        with open(str(tmp_path / (name + '.py')), 'w') as f:
+            f.write(prefix + _PLUGIN.format(name.capitalize()))
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        return name + '.' + name.capitalize()
+
+    return create
+
+
+def test_registered_classes_are_imported_when_first_loaded(tmp_path, plugins):
+    """ Tests that a class registered by dotted path is only imported once a file using it is loaded. """
+    nodeRegistry = NodeRegistry(entryPoints=False)
+    nodeRegistry.register('Used', plugins('used'))
+    nodeRegistry.register('Unused', plugins('unused'))
+
+    class PluginFileNode(FileNode):
+        pass
+    PluginFileNode.nodeRegistry = nodeRegistry
+    data = {'attributes': {'name': 'root', 'filename': None}, 'class': 'FileNode', 'children': [
+        {'attributes': {'name': 'a'}, 'class': 'Used', 'children': []}]}
+    filename = str(tmp_path / 'root.json')
+    with open(filename, 'w') as f:
+        json.dump(data, f)
+
+    assert 'used' not in sys.modules
+    loaded = PluginFileNode.load(filename)
+
+    assert type(loaded.children[0]).__name__ == 'Used'
+    assert 'used' in sys.modules and 'unused' not in sys.modules
+    assert nodeRegistry.isImported('Used') and not nodeRegistry.isImported('Unused')
+
+
+def test_registering_a_class_or_an_unknown_name():
+    """ Tests that classes can be registered directly and unknown names raise a KeyError. """
+    class Direct(Node):
+        pass
+    nodeRegistry = NodeRegistry(entryPoints=False)
+    nodeRegistry.register('Direct', Direct)
+
+    assert isinstance(nodeRegistry.constructor('Direct')({'name': 'direct'}), Direct)
+    assert 'Missing' not in nodeRegistry
+    with pytest.raises(KeyError):
+        nodeRegistry.constructor('Missing')
+
+
+def test_entry_points_are_searched_for_unknown_names(plugins, monkeypatch):
+    """ Tests that classes listed as entry points are found and imported when needed. """
+    path = plugins('listed')
+    entryPoint = metadata.EntryPoint('Listed', path.replace('.', ':'), registry.ENTRY_POINT_GROUP)
+    monkeypatch.setattr(metadata, 'entry_points', lambda group: [entryPoint] if group == registry.ENTRY_POINT_GROUP else [])
+    nodeRegistry = NodeRegistry()
+
+    assert 'Listed' in nodeRegistry
+    assert 'listed' not in sys.modules
+    assert type(nodeRegistry.constructor('Listed')({'name': 'listed'})).__name__ == 'Listed'
+
+
+def test_classes_are_imported_once_by_concurrent_loads(plugins):
+    """ Tests that threads loading the same lazily registered class at once all get its constructor. """
+    nodeRegistry = NodeRegistry(entryPoints=False)
+    # The slow import keeps the other threads waiting on it, they all finish it together
+    nodeRegistry.register('Slow', plugins('slow', prefix='import time\ntime.sleep(0.2)\n'))
+    barrier = threading.Barrier(8)
+    constructors = []
+    errors = []
+
+    def load():
+        barrier.wait()
+        try:
+            constructors.append(nodeRegistry.constructor('Slow'))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=load) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(constructors) == 8 and len(set(constructors)) == 1
+    assert nodeRegistry.isImported('Slow') and 'Slow' in nodeRegistry
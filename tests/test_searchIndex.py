@@ -0,0 +1,113 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.core.searchIndex import SearchIndex, activeIndexes
+import pytest
+
+
+@pytest.fixture
+def root():
+    root = FileNode(name="root")
+    for i in range(3):
+        folder = FolderNode(name="Folder{:d}".format(i))
+        folder.parent = root
+        folder.attachMany([Node("Node{:d}_{:d}".format(i, j)) for j in range(5)])
+    return root
+
+
+@pytest.fixture
+def index(root):
+    index = SearchIndex(root)
+    yield index
+    index.close()
+
+
+def _names(nodes):
+    return sorted(node.name for node in nodes)
+
+
+def test_search_matches_substrings_ignoring_case(index):
+    """ Tests that every node containing the query is found once, whatever the case and length of the query. """
+    assert len(index) == 19
+    assert _names(index.search('node1_')) == ["Node1_{:d}".format(j) for j in range(5)]
+    assert _names(index.search('FOLDER2')) == ["Folder2"]
+    assert len(index.search('_')) == 15
+    assert len(index.search('o')) == 19
+    assert index.search('') == []
+    assert index.search('missing') == []
+
+
+def test_search_stops_at_the_limit(index):
+    """ Tests that a search returns at most limit nodes. """
+    assert len(index.search('node', limit=4)) == 4
+    index.maxResults = 7
+    assert len(index.search('node')) == 7
+
+
+def test_index_follows_renames(index, root):
+    """ Tests that renamed nodes are found by their new name only. """
+    node = root.find('Folder1/Node1_3')
+    node.updateAttributes({'name': 'Renamed'})
+    root.find('Folder0/Node0_0').name = 'Other'
+
+    assert index.search('renamed') == [node]
+    assert index.search('node1_3') == []
+    assert _names(index.search('other')) == ['Other']
+    assert len(index.search('node')) == 13
+
+
+def test_index_follows_insertions_removals_and_moves(index, root):
+    """ Tests that added subtrees are found and removed subtrees are not. """
+    folder = FolderNode(name="Added")
+    folder.attachMany([Node("leaf{:d}".format(i)) for i in range(3)])
+    root.attachMany([folder])
+    root.find('Folder0').parent = None
+    root.find('Folder1').detachMany(root.find('Folder1').children[:2])
+    root.find('Folder2').moveRange(0, 2, folder, 0)
+
+    assert _names(index.search('leaf')) == ['leaf0', 'leaf1', 'leaf2']
+    assert index.search('folder0') == []
+    assert _names(index.search('node1_')) == ['Node1_2', 'Node1_3', 'Node1_4']
+    assert _names(index.search('node2_')) == ["Node2_{:d}".format(j) for j in range(5)]
+    assert len(index) == 15
+    assert root.find('Added/Node2_0') in index
+
+
+def test_index_matches_a_fresh_index_after_many_changes(index, root):
+    """ Tests that the slots added and emptied by many changes are joined and compacted without losing nodes. """
+    index.maxPending = 4
+    folder = root.find('Folder0')
+    for i in range(50):
+        node = Node("extra{:d}".format(i))
+        node.parent = folder
+        if i % 3 == 0:
+            node.name = "moved{:d}".format(i)
+            node.parent = root.find('Folder2')
+        if i % 5 == 0:
+            node.parent = None
+        index.search('e')
+
+    fresh = SearchIndex(root)
+    try:
+        for query in ('extra', 'moved', 'node', 'folder', '1', 'e'):
+            assert _names(index.search(query)) == _names(fresh.search(query))
+        assert len(index) == len(fresh)
+        assert len(index._nodes) < 2 * len(fresh)
+    finally:
+        fresh.close()
+
+
+def test_closed_index_stops_following_the_tree(root):
+    """ Tests that a closed index is no longer updated. """
+    index = SearchIndex(root)
+    index.close()
+
+    assert index not in activeIndexes
+    root.attachMany([Node("late")])
+    assert index.search('late') == []
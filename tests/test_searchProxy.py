@@ -0,0 +1,76 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QCoreApplication, QModelIndex, Qt
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.gui.treeModel import TreeModel
+from objectgui.gui.searchProxy import SearchProxyModel
+import pytest
+
+
+@pytest.fixture
+def proxy():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    root = FileNode(name="root")
+    for i in range(3):
+        folder = FolderNode(name="folder{:d}".format(i))
+        folder.parent = root
+        folder.attachMany([Node("node{:d}_{:d}".format(i, j)) for j in range(5)])
+    proxy = SearchProxyModel(TreeModel(root))
+    yield proxy
+    proxy.close()
+
+
+def _rows(proxy, parentInd=QModelIndex()):
+    """ Returns the names shown below an index, nested lists for the shown children. """
+    rows = []
+    for row in range(proxy.rowCount(parentInd)):
+        index = proxy.index(row, 0, parentInd)
+        assert proxy.parent(index) == parentInd
+        children = _rows(proxy, index)
+        name = proxy.data(index, Qt.DisplayRole)
+        rows.append((name, children) if children else name)
+    return rows
+
+
+def test_shows_matches_with_their_ancestors_in_tree_order(proxy):
+    """ Tests that only the matches and the branches leading to them are shown, in the order of the tree. """
+    matches = proxy.setSearchText('_3')
+
+    assert len(matches) == 3
+    assert _rows(proxy) == [('root', [('folder0', ['node0_3']), ('folder1', ['node1_3']), ('folder2', ['node2_3'])])]
+    assert proxy.setSearchText('folder1') == [proxy.sourceModel().objectTree.find('folder1')]
+    assert _rows(proxy) == [('root', ['folder1'])]
+    proxy.setSearchText('missing')
+    assert _rows(proxy) == []
+
+
+def test_maps_indexes_to_and_from_the_model(proxy):
+    """ Tests that proxy indexes map to the model index of the same node and back. """
+    model = proxy.sourceModel()
+    proxy.setSearchText('node2_4')
+    folder = proxy.index(0, 0, proxy.index(0, 0, QModelIndex()))
+    index = proxy.index(0, 0, folder)
+    source = proxy.mapToSource(index)
+
+    assert source.internalPointer() is index.internalPointer()
+    assert (source.row(), source.parent().row()) == (4, 2)
+    assert proxy.mapFromSource(source) == index
+    assert not proxy.mapFromSource(model.index(0, 0, source.parent())).isValid()
+    assert not proxy.flags(index) & (Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+
+
+def test_search_runs_again_when_the_model_changes(proxy):
+    """ Tests that nodes added or removed through the model are shown or hidden. """
+    model = proxy.sourceModel()
+    root = model.objectTree
+    proxy.setSearchText('node1_')
+    model.insertNodes([Node("node1_new")], model._indexFor(root.find('folder0')))
+    model.removeNodes([root.find('folder1/node1_0'), root.find('folder1/node1_1')])
+
+    assert _rows(proxy) == [('root', [('folder0', ['node1_new']), ('folder1', ['node1_2', 'node1_3', 'node1_4'])])]
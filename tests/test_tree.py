@@ -394,3 +394,329 @@ def test_selfChild():
     with pytest.raises(CircularTreeError):
         node.children = [node]
     
+
+
+def test_rowAfterMoves():
+    """ Tests that the row of every child stays correct after a mix of moves and removals. """
+    node = Node(0)
+    other = Node(1)
+    leaves = [Node(i) for i in range(10)]
+    node.children = leaves
+    leaves[7].row = 2
+    leaves[0].row = -1
+    leaves[4].parent = other
+    leaves[9].row = 100
+    del leaves[3].parent
+    for i, child in enumerate(node.children):
+        assert child.row == i, "The cached row should match the index in node.children"
+    assert leaves[4].row == 0, "The moved leaf should be at index 0 in other.children"
+    assert leaves[3].row is None, "The removed leaf is root so row should be None"
+
+
+def test_circularTreeLeavesTreeUnchanged():
+    """ Test that a refused move does not modify the tree. """
+    node1 = Node(1)
+    node2 = Node(2)
+    node3 = Node(3)
+    other = Node(4)
+    node2.parent = node1
+    node3.parent = node2
+    node1.parent = other
+    with pytest.raises(CircularTreeError):
+        node1.parent = node3
+    assert node1.parent is other, "The refused move should not detach the node from its parent"
+    assert other.children == [node1], "The refused move should not change the old parent's children"
+    assert not node3.children, "The refused move should not add a child to the target"
+
+
+def test_depth():
+    """ Tests that the depth of a subtree is updated when it is moved. """
+    root = Node(0)
+    node1 = Node(1)
+    node2 = Node(2)
+    leaf = Node(3)
+    leaf.parent = node2
+    assert leaf.depth == 1, "The leaf should be one level below node2"
+    node2.parent = node1
+    assert leaf.depth == 2, "The leaf should be two levels below node1"
+    node1.parent = root
+    assert node1.depth == 1, "Node1 should be one level below root"
+    assert node2.depth == 2, "Node2 should be two levels below root"
+    assert leaf.depth == 3, "The leaf should be three levels below root"
+    del node2.parent
+    assert node2.depth == 0, "Node2 is a root so its depth should be 0"
+    assert leaf.depth == 1, "The leaf should be one level below node2"
+
+
+def test_isAncestorOf():
+    """ Tests ancestor queries between nodes in and out of the same tree. """
+    root = Node(0)
+    node1 = Node(1)
+    node2 = Node(2)
+    leaf = Node(3)
+    root.children = [node1, node2]
+    leaf.parent = node1
+    assert root.isAncestorOf(leaf), "Root should be an ancestor of the leaf"
+    assert node1.isAncestorOf(leaf), "Node1 should be an ancestor of the leaf"
+    assert not node2.isAncestorOf(leaf), "Node2 should not be an ancestor of the leaf"
+    assert not leaf.isAncestorOf(root), "The leaf should not be an ancestor of root"
+    assert not leaf.isAncestorOf(leaf), "A node should not be its own ancestor"
+    assert not root.isAncestorOf(Node(4)), "Root should not be an ancestor of a node in another tree"
+
+
+def test_lowestCommonAncestor():
+    """ Tests finding the lowest common ancestor of two nodes. """
+    root = Node(0)
+    node1 = Node(1)
+    node2 = Node(2)
+    leaf1 = Node(3)
+    leaf2 = Node(4)
+    root.children = [node1, node2]
+    node1.children = [leaf1, leaf2]
+    assert leaf1.lowestCommonAncestor(leaf2) is node1, "Sibling leaves should share node1"
+    assert leaf1.lowestCommonAncestor(node2) is root, "Nodes in different branches should share root"
+    assert node1.lowestCommonAncestor(leaf2) is node1, "An ancestor is its own common ancestor with a descendant"
+    assert leaf1.lowestCommonAncestor(Node(5)) is None, "Nodes in different trees have no common ancestor"
+
+
+def test_attachMany():
+    """ Tests attaching a block of nodes from several parents at a given row. """
+    node1 = Node(10)
+    node2 = Node(20)
+    leaves = [Node(i) for i in range(6)]
+    node1.children = leaves[:3]
+    node2.children = leaves[3:]
+    node2.attachMany([leaves[0], leaves[2]], row=1)
+    assert node1.children == [leaves[1]], "Only the second leaf should be left in node1"
+    assert node2.children == [leaves[3], leaves[0], leaves[2], leaves[4], leaves[5]], "The block should be inserted at row 1"
+    for parent in (node1, node2):
+        for i, child in enumerate(parent.children):
+            assert child.parent is parent, "Every child should point back to its parent"
+            assert child.row == i, "The cached row should match the index in children"
+
+
+def test_attachManyCircular():
+    """ Tests that attachMany refuses a loop without modifying the tree. """
+    node1 = Node(1)
+    node2 = Node(2)
+    leaf = Node(3)
+    node2.parent = node1
+    with pytest.raises(CircularTreeError):
+        node2.attachMany([leaf, node1])
+    assert leaf.parent is None, "The refused attach should not move any node"
+    assert node1.parent is None, "The refused attach should not move any node"
+
+
+def test_attachManyEmpty():
+    """ Tests that attaching no nodes leaves the node unchanged and calls no hooks. """
+    calls = []
+
+    class WatchedNode(Node):
+        def onChange(self, children=False):
+            calls.append(('changed', children))
+
+        def onChildrenInserted(self, row, count):
+            calls.append(('inserted', row, count))
+
+    root = WatchedNode(0)
+    leaf = WatchedNode(1)
+    leaf.parent = root
+    calls.clear()
+    root.attachMany([])
+    root.attachMany(iter([]), row=0)
+    assert calls == [], "Attaching no nodes should not report a change"
+    assert root.children == [leaf] and leaf.row == 0
+
+
+def test_detachMany():
+    """ Tests detaching several children of a node at once. """
+    node = Node(0)
+    leaves = [Node(i) for i in range(5)]
+    node.children = leaves
+    node.detachMany([leaves[3], leaves[1]])
+    assert node.children == [leaves[0], leaves[2], leaves[4]], "The detached leaves should be removed"
+    assert [c.row for c in node.children] == [0, 1, 2], "The remaining rows should be renumbered"
+    assert leaves[1].parent is None and leaves[1].row is None, "The detached leaf should be a root"
+    with pytest.raises(ValueError):
+        node.detachMany([Node(9)])
+
+
+def test_moveRange():
+    """ Tests moving a range of children within a node and to a different node. """
+    node1 = Node(10)
+    node2 = Node(20)
+    leaves = [Node(i) for i in range(6)]
+    node1.children = leaves
+    node1.moveRange(0, 2, node1, 4)
+    assert node1.children == [leaves[2], leaves[3], leaves[0], leaves[1], leaves[4], leaves[5]], "The range should move in front of row 4"
+    node1.moveRange(3, 2, node2, 0)
+    assert node1.children == [leaves[2], leaves[3], leaves[0], leaves[5]], "The range should be removed from node1"
+    assert node2.children == [leaves[1], leaves[4]], "The range should be added to node2"
+    for parent in (node1, node2):
+        for i, child in enumerate(parent.children):
+            assert child.parent is parent, "Every child should point back to its parent"
+            assert child.row == i, "The cached row should match the index in children"
+
+
+def _buildTraversalTree():
+    """ Builds the tree used by the traversal tests and returns root and a name lookup. """
+    root = Node('root')
+    nodes = {name: Node(name) for name in ['a', 'b', 'a1', 'a2', 'b1', 'a1x']}
+    root.children = [nodes['a'], nodes['b']]
+    nodes['a'].children = [nodes['a1'], nodes['a2']]
+    nodes['b'].children = [nodes['b1']]
+    nodes['a1x'].parent = nodes['a1']
+    return root
+
+
+def test_iterSubtreeOrders():
+    """ Tests the pre-order, post-order and breadth first traversals. """
+    root = _buildTraversalTree()
+    pre = [n.a for n in root.iterSubTree()]
+    post = [n.a for n in root.iterSubTree(order='post')]
+    breadth = [n.a for n in root.iterSubTree(order='breadth')]
+    assert pre == ['root', 'a', 'a1', 'a1x', 'a2', 'b', 'b1'], "Pre-order should visit parents first"
+    assert post == ['a1x', 'a1', 'a2', 'a', 'b1', 'b', 'root'], "Post-order should visit children first"
+    assert breadth == ['root', 'a', 'b', 'a1', 'a2', 'b1', 'a1x'], "Breadth first should visit level by level"
+    with pytest.raises(ValueError):
+        root.iterSubTree(order='sideways')
+
+
+def test_iterSubtreePruneAndMaxDepth():
+    """ Tests skipping subtrees with a prune function and limiting the depth of a traversal. """
+    root = _buildTraversalTree()
+    pruned = [n.a for n in root.iterSubTree(prune=lambda n: n.a == 'a')]
+    assert pruned == ['root', 'a', 'b', 'b1'], "The pruned node should be visited but not its children"
+    prunedPost = [n.a for n in root.iterSubTree(order='post', prune=lambda n: n.a == 'a')]
+    assert prunedPost == ['a', 'b1', 'b', 'root'], "The pruned node should be visited but not its children"
+    limited = [n.a for n in root.children[0].iterSubTree(order='breadth', maxDepth=1)]
+    assert limited == ['a', 'a1', 'a2'], "Only one level below the starting node should be visited"
+
+
+def test_iterSubtreeDeep():
+    """ Tests that iterating a tree deeper than the recursion limit works. """
+    root = Node(0)
+    node = root
+    depth = sys.getrecursionlimit() + 100
+    for i in range(depth):
+        leaf = Node(i + 1)
+        leaf.parent = node
+        node = leaf
+    assert sum(1 for n in root.iterSubTree()) == depth + 1, "Every node in the chain should be visited"
+    assert next(iter(root.iterSubTree(order='post'))) is node, "The deepest node should be first in post-order"
+
+
+def test_numDescendants():
+    """ Tests that the cached descendant count follows moves in the tree. """
+    root = _buildTraversalTree()
+    a, b = root.children
+    assert root.numDescendants() == 6, "Root should have 6 nodes below it"
+    assert a.numDescendants() == 3, "Node a should have 3 nodes below it"
+    a.children[0].parent = b
+    assert root.numDescendants() == 6, "Moving within the tree should not change the total"
+    assert a.numDescendants() == 1, "Node a should only have a2 below it"
+    assert b.numDescendants() == 3, "Node b should now have b1, a1 and a1x below it"
+    del b.children
+    assert root.numDescendants() == 3, "Root should only have a, a2 and b below it"
+
+
+def test_registeredAggregates():
+    """ Tests registering sum, min and max reductions over a numeric attribute. """
+    class WeightedNode(NodeMixin):
+        def __init__(self, weight):
+            self.weight = weight
+            super().__init__()
+    WeightedNode.registerAggregate('total', 'weight', 'sum')
+    WeightedNode.registerAggregate('lightest', 'weight', 'min')
+    WeightedNode.registerAggregate('heaviest', 'weight', 'max')
+    root = WeightedNode(None)
+    folder = WeightedNode(None)
+    leaves = [WeightedNode(w) for w in (3, 1, 4)]
+    folder.children = leaves
+    folder.parent = root
+    assert root.aggregate('total') == 8, "The weights should be summed over the subtree"
+    assert root.aggregate('lightest') == 1, "The smallest weight should be found"
+    assert root.aggregate('heaviest') == 4, "The largest weight should be found"
+    leaves[2].weight = 10
+    leaves[2].invalidateAggregates()
+    assert root.aggregate('total') == 14, "Changing an attribute should update the sum"
+    del leaves[1].parent
+    assert root.aggregate('lightest') == 3, "Removing a node should update the minimum"
+    assert 'total' not in NodeMixin.subtreeAggregates, "Registering should not affect other classes"
+
+
+def _buildNamedTree():
+    """ Builds a small tree of named nodes and returns its root. """
+    root = Node(0)
+    root.name = 'root'
+    for name, parentPath in [('File1', ''), ('Folder3', 'File1'), ('Node17', 'File1/Folder3'), ('Node18', 'File1/Folder3')]:
+        node = Node(0)
+        node.name = name
+        node.parent = root.find(parentPath)
+    return root
+
+
+def test_findAndPath():
+    """ Tests looking up nodes by path and building the path of a node. """
+    root = _buildNamedTree()
+    node = root.find("File1/Folder3/Node17")
+    assert node is not None and node.name == 'Node17', "The node should be found by its path"
+    assert node.path == "File1/Folder3/Node17", "The path should list the names below the root"
+    assert root.find(node.path) is node, "Finding a node's own path should return the node"
+    assert root.find("File1/Missing") is None, "A missing name should return None"
+    assert root.find("") is root, "An empty path should return the node itself"
+
+
+def test_findAfterRenameAndMove():
+    """ Tests that the name index follows renames and moves. """
+    root = _buildNamedTree()
+    folder = root.find("File1/Folder3")
+    node = root.find("File1/Folder3/Node17")
+    node.name = 'Renamed'
+    assert root.find("File1/Folder3/Node17") is None, "The old name should no longer be found"
+    assert root.find("File1/Folder3/Renamed") is node, "The new name should be found"
+    node.parent = root.find("File1")
+    assert folder.childByName('Renamed') is None, "The moved node should be removed from the old parent's index"
+    assert root.find("File1/Renamed") is node, "The moved node should be found under its new parent"
+    folder.children = []
+    assert root.find("File1/Folder3/Node18") is None, "Removed children should not be found"
+
+
+def test_duplicateChildNames():
+    """ Tests detecting children that share a name. """
+    root = _buildNamedTree()
+    folder = root.find("File1/Folder3")
+    assert folder.duplicateChildNames() == set(), "The children should start with unique names"
+    other = folder.childByName('Node18')
+    other.name = 'Node17'
+    assert folder.duplicateChildNames() == {'Node17'}, "Renaming should create a duplicate"
+    assert folder.childByName('Node17').row == 0, "The first matching child should be returned"
+    del other.parent
+    assert folder.duplicateChildNames() == set(), "Removing the duplicate should clear it"
+
+
+def test_onChange():
+    """ Tests that every mutation of the tree calls the onChange hook of the nodes that changed. """
+    calls = []
+
+    class WatchedNode(Node):
+        def onChange(self, children=False):
+            calls.append((self.a, children))
+
+    root = WatchedNode(0)
+    other = WatchedNode(1)
+    leaf1 = WatchedNode(2)
+    leaf2 = WatchedNode(3)
+    calls.clear()
+    leaf1.parent = root
+    assert calls == [(0, True)], "Attaching should report a change of the parent's children"
+    calls.clear()
+    root.attachMany([leaf2])
+    leaf2.row = 0
+    assert calls == [(0, True), (0, True)], "Bulk attaching and reordering should report a change"
+    calls.clear()
+    root.moveRange(0, 2, other, 0)
+    assert set(calls) == {(0, True), (1, True)}, "Moving should report a change on both parents"
+    calls.clear()
+    leaf1.name = 'renamed'
+    assert calls == [(2, False)], "Renaming should report a change of the node itself"
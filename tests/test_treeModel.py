@@ -0,0 +1,368 @@
+import os
+import sys
+
+scriptPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.realpath(os.path.join(scriptPath, '..', '..')))
+
+from PyQt5.QtCore import QCoreApplication, QModelIndex, QPersistentModelIndex, Qt, qInstallMessageHandler
+from objectgui.core.node import Node
+from objectgui.core.folderNode import FolderNode
+from objectgui.core.fileNode import FileNode
+from objectgui.core.compactTree import CompactTree
+from objectgui.gui.treeModel import TreeModel, DragMimeData
+from objectgui.gui import util
+import pytest
+
+
+@pytest.fixture
+def model():
+    app = QCoreApplication.instance() or QCoreApplication([])
+    root = FileNode(name="root")
+    for i in range(3):
+        folder = FolderNode(name="folder{:d}".format(i))
+        folder.parent = root
+        folder.attachMany([Node("node{:d}_{:d}".format(i, j)) for j in range(5)])
+    yield TreeModel(root)
+
+
+def _index(model, *rows):
+    """ Returns the index of the item at the given rows below the file node. """
+    index = model.index(0, 0, QModelIndex())
+    for row in rows:
+        index = model.index(row, 0, index)
+    return index
+
+
+def test_decorations_share_one_icon_per_path(model):
+    """ Tests that every item with the same icon path gets the same cached icon. """
+    folderIcon = model.data(_index(model, 0), Qt.DecorationRole)
+
+    assert model.data(_index(model, 2), Qt.DecorationRole) is folderIcon
+    assert model.data(_index(model, 1, 3), Qt.DecorationRole) is util.icon('icons', 'test.png')
+    assert model.data(_index(model, 1, 3), Qt.DecorationRole) is not folderIcon
+
+
+def test_compact_tree_is_displayed_unchanged():
+    """ Tests that a CompactTree can be shown, navigated and rearranged by the model like a tree of Nodes. """
+    app = QCoreApplication.instance() or QCoreApplication([])
+    tree = CompactTree()
+    root = tree.newNode()
+    root.name = "root"
+    for i in range(3):
+        folder = tree.newNode(root)
+        folder.name = "folder{:d}".format(i)
+        for j in range(5):
+            tree.newNode(folder).name = "node{:d}_{:d}".format(i, j)
+    model = TreeModel(root)
+
+    assert model.columnCount(QModelIndex()) == 1
+    assert model.data(_index(model), Qt.DisplayRole) == "root"
+    index = _index(model, 1, 3)
+    assert model.data(index, Qt.DisplayRole) == "node1_3"
+    assert index.internalPointer() is root.childAt(1).childAt(3), "The model should keep the handles of its indexes"
+    assert model.data(index, Qt.DecorationRole) is util.icon('icons', 'test.png')
+    assert model.flags(index) & Qt.ItemIsDragEnabled and model.flags(index) & Qt.ItemIsDropEnabled
+    assert model.parent(index) == _index(model, 1) and model.parent(_index(model)) == QModelIndex()
+    assert [model.data(model.index(row, 0, _index(model, 2)), Qt.DisplayRole) for row in range(5)] == \
+        ["node2_{:d}".format(j) for j in range(5)]
+
+    assert _drop(model, [_index(model, 0, 1), _index(model, 1, 0)], 0, _index(model, 2))
+    assert _names(root.childAt(2))[:2] == ['node0_1', 'node1_0']
+    assert model.rowCount(_index(model, 0)) == 4 and model.rowCount(_index(model, 2)) == 7
+
+
+def _drop(model, indexes, row, parentInd):
+    data = DragMimeData()
+    for index in indexes:
+        data.add_index(index)
+    return model.dropMimeData(data, Qt.MoveAction, row, 0, parentInd)
+
+
+def _names(node):
+    return [child.name for child in node.children]
+
+
+def test_drop_moves_each_contiguous_range_at_once(model):
+    """ Tests that a drop of three ranges of rows is done with one move per range, in tree order. """
+    moves = []
+    model.rowsMoved.connect(lambda *args: moves.append(args))
+    selection = [_index(model, 0, 4), _index(model, 0, 1), _index(model, 0, 2), _index(model, 1, 0)]
+
+    assert _drop(model, selection, 1, _index(model, 2))
+
+    assert len(moves) == 3
+    folder = model.objectTree.children[2]
+    assert _names(folder) == ['node2_0', 'node0_1', 'node0_2', 'node0_4', 'node1_0', 'node2_1', 'node2_2', 'node2_3', 'node2_4']
+    assert _names(model.objectTree.children[0]) == ['node0_0', 'node0_3']
+
+
+def test_drop_of_items_from_different_parents(model):
+    """ Tests that a folder and a node inside another folder can be dropped together on a folder. """
+    root = model.objectTree
+    selection = [_index(model, 1, 2), _index(model, 0), _index(model, 0, 3)]
+    # Moving folder0 first changes the row of folder2, every later move must use its new index
+    persistent = [QPersistentModelIndex(index) for index in
+                  (_index(model, 2), _index(model, 2, 4), _index(model, 1, 2), _index(model, 1, 3), _index(model, 0, 3))]
+    nodes = [QModelIndex(index).internalPointer() for index in persistent]
+
+    assert _drop(model, selection, -1, _index(model, 2))
+
+    assert _names(root) == ['folder1', 'folder2']
+    assert _names(root.children[1])[-2:] == ['folder0', 'node1_2']
+    assert 'node0_3' in _names(root.children[1].childByName('folder0'))
+    _assertPersistent(model, persistent, nodes)
+
+    # A node from above the drop parent moved first moves the parent up a row
+    root = FileNode(name="root")
+    first = Node("a")
+    folder = FolderNode(name="F")
+    root.attachMany([first, folder])
+    second = Node("f")
+    second.parent = folder
+    Node("g").parent = second
+    model = TreeModel(root)
+    nodes = list(root.iterSubTree())[1:]
+    persistent = [QPersistentModelIndex(model._indexFor(node)) for node in nodes]
+    messages = []
+    previous = qInstallMessageHandler(lambda kind, context, message: messages.append(message))
+    try:
+        model.moveItems([first, second], model._indexFor(folder), 0)
+    finally:
+        qInstallMessageHandler(previous)
+
+    assert messages == []
+    assert _names(root) == ['F'] and _names(folder) == ['a', 'f']
+    _assertPersistent(model, persistent, nodes)
+
+
+def _assertPersistent(model, persistent, nodes):
+    """ Checks that persistent indexes still point to their nodes, at their current row and parent. """
+    for index, node in zip(persistent, nodes):
+        assert index.isValid() and QModelIndex(index).internalPointer() is node
+        assert index.row() == node.row and QModelIndex(index) == model._indexFor(node)
+        assert index.parent() == model._indexFor(node.parent)
+
+
+def test_drop_within_the_same_parent(model):
+    """ Tests that rows dropped further down their own parent keep their order and land before the drop row. """
+    assert _drop(model, [_index(model, 0, 0), _index(model, 0, 1)], 4, _index(model, 0))
+
+    assert _names(model.objectTree.children[0]) == ['node0_2', 'node0_3', 'node0_0', 'node0_1', 'node0_4']
+
+
+def test_scattered_drop_is_one_layout_change(model, monkeypatch):
+    """ Tests that a drop scattered over many ranges changes the layout once and updates persistent indexes. """
+    monkeypatch.setattr(TreeModel, 'maxDropMoves', 1)
+    layouts = []
+    model.layoutChanged.connect(lambda *args: layouts.append(args))
+    persistent = QPersistentModelIndex(_index(model, 1, 3))
+    selection = [_index(model, 0, 0), _index(model, 0, 2), _index(model, 1, 3)]
+
+    assert _drop(model, selection, 0, _index(model, 2))
+
+    assert len(layouts) == 1
+    assert _names(model.objectTree.children[2])[:3] == ['node0_0', 'node0_2', 'node1_3']
+    assert persistent.row() == 2 and persistent.parent().internalPointer().name == 'folder2'
+
+
+def test_insert_nodes_notifies_once(model):
+    """ Tests that inserting many nodes is a single row insertion for the view. """
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    nodes = [Node("new{:d}".format(i)) for i in range(100)]
+
+    model.insertNodes(nodes, _index(model, 1), 2)
+
+    assert inserted == [(2, 101)]
+    assert model.objectTree.children[1].children[2:102] == nodes
+    with pytest.raises(ValueError):
+        model.insertNodes([model.objectTree.children[0]], _index(model, 1))
+
+
+def test_remove_nodes_notifies_once_per_range(model):
+    """ Tests that removing a selection is one row removal per range of consecutive rows. """
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((parent.internalPointer().name, first, last)))
+    folder0, folder1 = model.objectTree.children[:2]
+
+    model.removeNodes([folder0.children[1], folder0.children[2], folder0.children[4], folder1, folder1.children[0]])
+
+    assert removed == [('root', 1, 1), ('folder0', 4, 4), ('folder0', 1, 2)]
+    assert _names(folder0) == ['node0_0', 'node0_3']
+    assert _names(model.objectTree) == ['folder0', 'folder2']
+
+
+def test_remove_rows_after_a_drop_keeps_the_moved_rows(model):
+    """ Tests that the view removing the dragged rows after a drop doesn't delete the nodes that were moved. """
+    assert _drop(model, [_index(model, 0, 0), _index(model, 0, 1)], 0, _index(model, 2))
+
+    assert not model.removeRows(0, 2, _index(model, 2))
+    assert _names(model.objectTree.children[2])[:2] == ['node0_0', 'node0_1']
+    assert model.removeRows(0, 1, _index(model, 2))
+    assert _names(model.objectTree.children[2])[0] == 'node0_1'
+
+
+def test_reset_children(model):
+    """ Tests that replacing the children of a node resets the model once. """
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    nodes = [Node("replacement{:d}".format(i)) for i in range(3)]
+
+    model.resetChildren(_index(model, 0), nodes)
+
+    assert resets == [True]
+    assert model.rowCount(_index(model, 0)) == 3 and model.objectTree.children[0].children == nodes
+
+
+def test_scattered_removal_is_one_layout_change(model, monkeypatch):
+    """ Tests that removing many separate rows changes the layout once and invalidates their persistent indexes. """
+    monkeypatch.setattr(TreeModel, 'maxDropMoves', 1)
+    layouts = []
+    model.layoutChanged.connect(lambda *args: layouts.append(args))
+    removedIndex = QPersistentModelIndex(_index(model, 1, 2))
+    keptIndex = QPersistentModelIndex(_index(model, 1, 3))
+    folder1 = model.objectTree.children[1]
+
+    model.removeNodes([folder1.children[0], folder1.children[2], folder1.children[4]])
+
+    assert len(layouts) == 1
+    assert _names(folder1) == ['node1_1', 'node1_3']
+    assert not removedIndex.isValid()
+    assert keptIndex.row() == 1
+
+
+class _RowCounts():
+    """ Keeps the row counts of some nodes the way a view does, from the signals of the model. """
+    def __init__(self, model, nodes):
+        self.model = model
+        self.counts = {node: model.rowCount(model._indexFor(node)) for node in nodes}
+        model.rowsInserted.connect(lambda parent, first, last: self._add(parent, last - first + 1))
+        model.rowsRemoved.connect(lambda parent, first, last: self._add(parent, first - last - 1))
+        model.rowsMoved.connect(self._moved)
+        model.layoutChanged.connect(self._recount)
+        model.modelReset.connect(self._recount)
+
+
+    def _add(self, parentInd, count):
+        node = parentInd.internalPointer()
+        if node in self.counts:
+            self.counts[node] += count
+
+
+    def _moved(self, parentInd, first, last, destinationInd, row):
+        self._add(parentInd, first - last - 1)
+        self._add(destinationInd, last - first + 1)
+
+
+    def _recount(self):
+        self.counts = {node: self.model.rowCount(self.model._indexFor(node)) for node in self.counts}
+
+
+    def check(self):
+        for node, count in self.counts.items():
+            assert self.model.rowCount(self.model._indexFor(node)) == count, node.name
+
+
+@pytest.fixture
+def wide(monkeypatch):
+    """ Model of a file with a folder of 25 nodes and an empty folder, shown in batches of 10 rows. """
+    app = QCoreApplication.instance() or QCoreApplication([])
+    monkeypatch.setattr(TreeModel, 'fetchBatchSize', 10)
+    root = FileNode(name="root")
+    folder = FolderNode(name="wide")
+    folder.parent = root
+    folder.attachMany([Node("node{:d}".format(i)) for i in range(25)])
+    FolderNode(name="other").parent = root
+    model = TreeModel(root)
+    # The counts the view would have must always match rowCount
+    counts = _RowCounts(model, root.children)
+    yield model
+    counts.check()
+
+
+def test_wide_node_shows_its_rows_in_batches(wide):
+    """ Tests that a wide node starts with one batch of rows and fetches the next batch each time. """
+    inserted = []
+    wide.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    folderInd = _index(wide, 0)
+
+    assert wide.rowCount(folderInd) == 10 and wide.canFetchMore(folderInd)
+    wide.fetchMore(folderInd)
+    assert wide.rowCount(folderInd) == 20
+    wide.fetchMore(folderInd)
+    assert wide.rowCount(folderInd) == 25 and not wide.canFetchMore(folderInd)
+    assert inserted == [(10, 19), (20, 24)]
+    assert len(wide.objectTree.children[0].children) == 25
+
+
+def test_changes_to_rows_not_fetched_are_not_notified(wide):
+    """ Tests that rows inserted or removed among the hidden rows only show up once they are fetched. """
+    inserted = []
+    removed = []
+    wide.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    wide.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    folderInd = _index(wide, 0)
+    folder = wide.objectTree.children[0]
+
+    wide.insertNodes([Node("appended")], folderInd)
+    wide.insertNodes([Node("shown")], folderInd, 5)
+    wide.removeNodes(folder.children[9:13])
+
+    assert inserted == [(5, 5)] and removed == [(9, 10)]
+    assert wide.rowCount(folderInd) == 9
+    while wide.canFetchMore(folderInd):
+        wide.fetchMore(folderInd)
+    assert wide.rowCount(folderInd) == 23 and folder.children[-1].name == 'appended'
+
+
+def test_moves_into_rows_not_fetched_are_a_layout_change(wide):
+    """ Tests that moving rows to the hidden rows of a node hides them and invalidates their persistent indexes. """
+    layouts = []
+    wide.layoutChanged.connect(lambda *args: layouts.append(args))
+    other = wide.objectTree.children[1]
+    wide.insertNodes([Node("moved{:d}".format(i)) for i in range(3)], _index(wide, 1))
+    movedIndex = QPersistentModelIndex(_index(wide, 1, 0))
+    keptIndex = QPersistentModelIndex(_index(wide, 0, 4))
+
+    assert _drop(wide, [_index(wide, 1, 0), _index(wide, 1, 1)], -1, _index(wide, 0))
+
+    assert len(layouts) == 1
+    assert not movedIndex.isValid() and keptIndex.row() == 4
+    assert wide.rowCount(_index(wide, 0)) == 10 and wide.rowCount(_index(wide, 1)) == 1
+    assert _names(wide.objectTree.children[0])[-2:] == ['moved0', 'moved1']
+    assert _drop(wide, [_index(wide, 0, 0)], 0, _index(wide, 1))
+    assert wide.rowCount(_index(wide, 0)) == 9 and _names(other) == ['node0', 'moved2']
+
+
+def test_large_insert_shows_one_batch(wide):
+    """ Tests that inserting more than a batch of rows at the end of a node only shows the first batch. """
+    otherInd = _index(wide, 1)
+
+    wide.insertNodes([Node("new{:d}".format(i)) for i in range(15)], otherInd)
+
+    assert wide.rowCount(otherInd) == 10 and wide.canFetchMore(otherInd)
+    wide.resetChildren(otherInd, wide.objectTree.children[1].children[:12])
+    assert wide.rowCount(_index(wide, 1)) == 10
+
+
+def test_moves_in_and_out_of_a_partly_fetched_node(wide):
+    """ Tests that rows moved between the shown rows of a partly fetched node and another node keep their persistent indexes. """
+    moves = []
+    wide.rowsMoved.connect(lambda *args: moves.append(args[1:3] + args[4:]))
+    folder, other = wide.objectTree.children
+    folderInd = _index(wide, 0)
+    movedIndex = QPersistentModelIndex(_index(wide, 0, 2))
+    keptIndex = QPersistentModelIndex(_index(wide, 0, 8))
+
+    assert wide.moveRows(folderInd, 2, 3, _index(wide, 1), 0)
+    assert wide.rowCount(folderInd) == 7 and wide.rowCount(_index(wide, 1)) == 3
+    assert movedIndex.parent() == _index(wide, 1) and keptIndex.row() == 5
+    wide.moveItems(other.children[1:], folderInd, 1)
+
+    assert moves == [(2, 4, 0), (1, 2, 1)]
+    assert wide.rowCount(folderInd) == 9 and wide.rowCount(_index(wide, 1)) == 1
+    assert _names(folder)[:4] == ['node0', 'node3', 'node4', 'node1'] and _names(other) == ['node2']
+    assert movedIndex.row() == 0 and keptIndex.row() == 7
+    while wide.canFetchMore(folderInd):
+        wide.fetchMore(folderInd)
+    assert wide.rowCount(folderInd) == 24